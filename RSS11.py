@@ -1,25 +1,11 @@
-import os
 import sys
-import subprocess
-import tempfile
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
-# ===== GitHub 上の共通関数を一時ディレクトリにクローン =====
-REPO_URL = "https://github.com/aiueo0306/shared-python-env.git"
-SHARED_DIR = os.path.join(tempfile.gettempdir(), "shared-python-env")
-
-if not os.path.exists(SHARED_DIR):
-    print("🔄 共通関数を初回クローン中...")
-    subprocess.run(["git", "clone", "--depth", "1", REPO_URL, SHARED_DIR], check=True)
-else:
-    print("🔁 共通関数を更新中...")
-    subprocess.run(["git", "-C", SHARED_DIR, "pull"], check=True)
-
-sys.path.append(SHARED_DIR)
+import shared_env  # noqa: F401  共通関数（rss_utils / scraper_utils）を読み込めるようにする
 
 # ===== 共通関数のインポート =====
-from rss_utils import generate_rss
+from feed_writer import generate_rss
 from scraper_utils import extract_items
+from site_runner import run_standalone
 
 # ===== 固定情報（学会サイト） =====
 BASE_URL = "http://www.josteo.com/news/"
@@ -39,28 +25,12 @@ day_unit = "日"
 date_format = f"%Y{year_unit}%m{month_unit}%d{day_unit}"
 date_regex = rf"(\d{{2,4}}){year_unit}(\d{{1,2}}){month_unit}(\d{{1,2}}){day_unit}"
 
-# ===== Playwright 実行ブロック =====
-with sync_playwright() as p:
-    print("▶ ブラウザを起動中...")
-    browser = p.chromium.launch(headless=True)
-    context = browser.new_context()
-    page = context.new_page()
+# ===== 出力先 =====
+RSS_PATH = "rss_output/Feed11.xml"
 
-    try:
-        print("▶ ページにアクセス中...")
-        page.goto(BASE_URL, timeout=120000)
-        try:
-            page.wait_for_load_state("networkidle", timeout=120000)
-        except Exception:
-            page.wait_for_load_state("domcontentloaded")
-        page.wait_for_load_state("load", timeout=30000)
-    except TimeoutError as e:
-        print("⚠ ページの読み込みに失敗しました。")
-        browser.close()
-        exit()
 
-    print("▶ 記事を抽出しています...")
-    items = extract_items(
+def scrape(page):
+    return extract_items(
         page,
         SELECTOR_DATE,
         SELECTOR_TITLE,
@@ -75,10 +45,7 @@ with sync_playwright() as p:
         date_regex,
     )
 
-    if not items:
-        print("⚠ 抽出できた記事がありません。HTML構造が変わっている可能性があります。")
 
-    os.makedirs("rss_output", exist_ok=True)
-    rss_path = "rss_output/Feed11.xml"
-    generate_rss(items, rss_path, BASE_URL, GAKKAI)
-    browser.close()
\ No newline at end of file
+# ===== Playwright 実行ブロック =====
+if __name__ == "__main__":
+    run_standalone(sys.modules[__name__])
@@ -1,10 +1,12 @@
 
-from feedgen.feed import FeedGenerator
 from datetime import datetime, timezone
 from urllib.parse import urljoin
 import os
 import re
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+import sys
+from feed_formats import entries_from_items
+from feed_writer import write_feeds
+from site_runner import run_standalone
 
 BASE_URL = "https://jasweb.or.jp/"
 GAKKAI = "日本喘息学会"
@@ -25,37 +27,51 @@ date_regex = rf"(\d{{2,4}}){year_unit}(\d{{1,2}}){month_unit}(\d{{1,2}}){day_uni
 
 
 def generate_rss(items, output_path, BASE_URL, gakkai_name):
-    fg = FeedGenerator()
-    fg.title(f"{gakkai_name}トピックス")
-    fg.link(href=BASE_URL)
-    fg.description(f"{gakkai_name}の最新トピック情報")
-    fg.language("ja")
-    fg.generator("python-feedgen")
-    fg.docs("http://www.rssboard.org/rss-specification")
-    fg.lastBuildDate(datetime.now(timezone.utc))
-
-    for item in items:
-        entry = fg.add_entry()
-        entry.title(item['title'])
-        entry.link(href=item['link'])
-        entry.description(item['description'])
-
-        if item['pub_date'] is not None:
-            guid_value = f"{item['link']}#{item['pub_date'].strftime('%Y%m%d')}"
-            entry.guid(guid_value, permalink=False)
-            entry.pubDate(item['pub_date'])
-        else:
-            # 日付がない場合はリンクそのものをGUIDにしてpermalink=True
-            entry.guid(item['link'], permalink=True)
-            # pubDateは設定しない
+    channel = {
+        "title": f"{gakkai_name}トピックス",
+        "link": BASE_URL,
+        "description": f"{gakkai_name}の最新トピック情報",
+        "language": "ja",
+    }
+
+    # 日付がない記事はリンクそのものを GUID（permalink）にし、pubDate は設定しない
+    entries = entries_from_items(items)
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fg.rss_file(output_path)
+    updated = write_feeds(channel, entries, output_path)
     print(f"\n✅ RSSフィード生成完了！📄 保存先: {output_path}")
+    return updated
+
+
+def row_link(href):
+    # 相対リンクを絶対 URL にする（href がなければ学会のトップ）
+    return urljoin(BASE_URL, href) if href else BASE_URL
+
+
+def parse_date(date_text):
+    match = re.search(date_regex, date_text)
+    if not match:
+        return None
+    year_str, month_str, day_str = match.groups()
+    year = int(year_str)
+    if year < 100:
+        year += 2000  # 2桁西暦 → 2000年以降と仮定
+    return datetime(year, int(month_str), int(day_str), tzinfo=timezone.utc)
+
+
+def parse_row(title, full_link, date_text):
+    """1行分のタイトル・リンク・日付の文字列から記事を作る（日付が取れなければ pub_date は None）。"""
+    return {
+        "title": title,
+        "link": full_link,
+        "description": title,
+        "pub_date": parse_date(date_text),
+    }
+
 
-def extract_items(page):
-    # iframeを待機して取得
-    page.wait_for_selector("iframe", timeout=10000)
+def extract_items(page, watermark=None):
+    # iframeを待機して取得（タイムアウトは site_runner がページの既定値として設定する）
+    page.wait_for_selector("iframe")
     iframe_element = page.locator("iframe").first.element_handle()
 
     if iframe_element is None:
@@ -67,7 +83,7 @@ def extract_items(page):
         print("⚠ iframeの中身（frame）がまだ読み込まれていません")
         return []
 
-    frame.wait_for_selector(SELECTOR_TITLE , timeout=10000)
+    frame.wait_for_selector(SELECTOR_TITLE)
 
     blocks1 = frame.locator(SELECTOR_TITLE )
     count = blocks1.count()
@@ -82,30 +98,33 @@ def extract_items(page):
             block1 = blocks1.nth(i)
             block2 = blocks2.nth(i)
 
-            if title_selector:
-                title_elem = block1.locator(title_selector).nth(title_index)
-                title = title_elem.inner_text().strip()
-            else:
-                title = block1.inner_text().strip()
-            print(title)
-
-            # URL
+            # URL（前回の最新記事に着いたらタイトル・日付は読まずに打ち切る）
             if title_selector:
                 try:
                     href = block1.locator(href_selector).nth(href_index).get_attribute("href")
-                    full_link = urljoin(BASE_URL, href)
+                    full_link = row_link(href)
                 except:
                     href = ""
                     full_link = BASE_URL
             else:
                 try:
                     href = block1.get_attribute("href")
-                    full_link = urljoin(BASE_URL, href)
+                    full_link = row_link(href)
                 except:
                     href = ""
                     full_link = BASE_URL
+            if watermark is not None and watermark.reached(full_link):
+                print(f"⏩ 前回までに取得した記事に到達しました（新しい記事 {len(items)} 件）")
+                break
+
+            if title_selector:
+                title_elem = block1.locator(title_selector).nth(title_index)
+                title = title_elem.inner_text().strip()
+            else:
+                title = block1.inner_text().strip()
+            print(title)
             print(full_link)
-            
+
             # 日付
             # date_selector が空文字や None でない場合 → 子要素探索、それ以外はそのまま
             if date_selector:
@@ -121,24 +140,10 @@ def extract_items(page):
                     print(f"⚠ 直接日付取得に失敗: {e}")
                     date_text = ""
             print(date_text)
-            match = re.search(date_regex, date_text)
-
-            if match:
-                year_str, month_str, day_str = match.groups()
-                year = int(year_str)
-                if year < 100:
-                    year += 2000  # 2桁西暦 → 2000年以降と仮定
-                pub_date = datetime(year, int(month_str), int(day_str), tzinfo=timezone.utc)
-            else:
+            item = parse_row(title, full_link, date_text)
+            if item["pub_date"] is None:
                 print("⚠ 日付の抽出に失敗しました")
-                pub_date = None  # or continue
-
-            items.append({
-                "title": title,
-                "link": full_link,
-                "description": title,
-                "pub_date": pub_date
-            })
+            items.append(item)
 
         except Exception as e:
             print(f"⚠ 行{i+1}の解析に失敗: {e}")
@@ -146,31 +151,15 @@ def extract_items(page):
 
     return items
 
-with sync_playwright() as p:
-    print("▶ ブラウザを起動中...")
-    browser = p.chromium.launch(headless=True)
-    context = browser.new_context()
-    page = context.new_page()
 
-    try:
-        print("▶ ページにアクセス中...")
-        page.goto(BASE_URL, timeout=120000)
-        try:
-            page.wait_for_load_state("networkidle", timeout=120000)
-        except Exception:
-            page.wait_for_load_state("domcontentloaded")
-        page.wait_for_load_state("load", timeout=30000)
-    except PlaywrightTimeoutError:
-        print("⚠ ページの読み込みに失敗しました。")
-        browser.close()
-        exit()
-
-    print("▶ 記事を抽出しています...")
-    items = extract_items(page)
-
-    if not items:
-        print("⚠ 抽出できた記事がありません。HTML構造が変わっている可能性があります。")
-
-    rss_path = "rss_output/Feed3.xml"
-    generate_rss(items, rss_path,BASE_URL,GAKKAI)
-    browser.close()
+# ===== 出力先 =====
+RSS_PATH = "rss_output/Feed3.xml"
+
+
+def scrape(page, watermark=None):
+    return extract_items(page, watermark)
+
+
+# ===== Playwright 実行ブロック =====
+if __name__ == "__main__":
+    run_standalone(sys.modules[__name__])
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+
+from feed_writer import write_bytes
+
+# ===== ブラウザが読み込む静的ファイルのディスクキャッシュ =====
+# Chromium を使うサイト（RSS3 の iframe ページや WordPress のテーマ）は、毎回同じ jQuery や
+# テーマの JS / CSS / フォントをダウンロードしている。コンテキストに context.route を仕掛け、
+#   - Cache-Control / Expires / ETag / Last-Modified に従って、新鮮なものはディスクから返す
+#   - 期限切れで検証子があれば条件付きで取得し、304 ならディスクの本文を返す
+#   - no-store や 200 以外の応答は保存しない
+# 本文は内容のハッシュをファイル名にして保存し（同じ jQuery を複数のサイトで共有）、
+# 合計が MAX_BYTES を超えたら最後に使った時刻の古い URL から捨てる。
+
+ASSET_CACHE_DIR = ".cache/assets"
+MAX_BYTES = 200 * 1024 * 1024
+
+# キャッシュする資源の種類（ドキュメントや XHR は対象外）
+RESOURCE_TYPES = {"script", "stylesheet", "font", "image"}
+
+# 鮮度の情報がなく Last-Modified だけある応答は、経過時間の 10% を上限 1 日まで新鮮とみなす
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_SEC = 24 * 3600
+
+# 保存した応答ヘッダーのうち、ディスクから返すときに付けないもの
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie", "date", "age"}
+_MAX_AGE = re.compile(r"(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*\"?(\d+)")
+
+
+def _http_time(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_sec(headers, now):
+    """応答ヘッダーから、新鮮とみなせる秒数を求める（0 なら毎回検証）。"""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return int(match.group(1))
+    expires = _http_time(headers.get("expires"))
+    if expires is not None:
+        date = _http_time(headers.get("date")) or now
+        return max(0, expires - date)
+    last_modified = _http_time(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(max(0, now - last_modified) * HEURISTIC_FRACTION, HEURISTIC_MAX_SEC)
+    return 0
+
+
+def storable(status, headers):
+    cache_control = headers.get("cache-control", "").lower()
+    return status == 200 and "no-store" not in cache_control and "private" not in cache_control
+
+
+class AssetCache:
+    def __init__(self, directory=ASSET_CACHE_DIR, max_bytes=MAX_BYTES, now=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.now = now or time.time
+        self.index_path = os.path.join(directory, "index.json")
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.site = None
+        self.stats = {}
+
+    # ----- 本文の保存先 -----
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _read_object(self, record):
+        try:
+            with open(self._object_path(record["sha256"]), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _store(self, url, headers, body):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            write_bytes(body, path)
+        now = self.now()
+        self.index[url] = {
+            "sha256": digest,
+            "size": len(body),
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "expires": now + freshness_sec(headers, now),
+            "used": now,
+        }
+
+    # ----- 統計 -----
+    def begin_site(self, name):
+        """以降のヒット／ミスを name（学会名など）の分として数える。"""
+        self.site = name
+
+    def _count(self, kind, size=0):
+        stats = self.stats.setdefault(self.site or "-", {"hit": 0, "revalidated": 0, "miss": 0, "saved_bytes": 0})
+        stats[kind] += 1
+        if kind != "miss":
+            stats["saved_bytes"] += size
+
+    # ----- ルーティング -----
+    def attach(self, context):
+        context.route("**/*", self.handle)
+
+    def handle(self, route):
+        request = route.request
+        if request.method != "GET" or request.resource_type not in RESOURCE_TYPES or not request.url.startswith("http"):
+            route.continue_()
+            return
+        try:
+            self._handle_asset(route, request.url)
+        except Exception:
+            # キャッシュ側の不具合でページの読み込みを止めない
+            try:
+                route.continue_()
+            except Exception:
+                pass
+
+    def _handle_asset(self, route, url):
+        now = self.now()
+        record = self.index.get(url)
+        body = self._read_object(record) if record else None
+        if record and body is None:
+            del self.index[url]
+            record = None
+
+        if record and now < record["expires"]:
+            record["used"] = now
+            self._count("hit", len(body))
+            route.fulfill(status=200, headers=record["headers"], body=body)
+            return
+
+        headers = dict(route.request.headers)
+        if record and record["etag"]:
+            headers["if-none-match"] = record["etag"]
+        if record and record["last_modified"]:
+            headers["if-modified-since"] = record["last_modified"]
+        response = route.fetch(headers=headers)
+        response_headers = {k.lower(): v for k, v in response.headers.items()}
+
+        if record and response.status == 304:
+            # 本文は変わっていない。新しい鮮度情報で期限だけ延ばす
+            merged = dict(record["headers"], **{k: v for k, v in response_headers.items() if k not in _DROP_HEADERS})
+            record["headers"] = merged
+            record["expires"] = now + freshness_sec(merged, now)
+            record["used"] = now
+            self._count("revalidated", len(body))
+            route.fulfill(status=200, headers=record["headers"], body=body)
+            return
+
+        fetched = response.body()
+        self._count("miss")
+        if storable(response.status, response_headers):
+            self._store(url, response_headers, fetched)
+        elif url in self.index:
+            del self.index[url]
+        route.fulfill(response=response, body=fetched)
+
+    # ----- 保存と容量の管理 -----
+    def _evict(self):
+        total = sum(record["size"] for record in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for url, record in sorted(self.index.items(), key=lambda kv: kv[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            del self.index[url]
+            total -= record["size"]
+        # どの URL からも参照されなくなった本文を消す
+        referenced = {record["sha256"] for record in self.index.values()}
+        objects_dir = os.path.join(self.directory, "objects")
+        for root, _, files in os.walk(objects_dir):
+            for name in files:
+                if name not in referenced:
+                    os.remove(os.path.join(root, name))
+
+    def save(self):
+        self._evict()
+        write_bytes(json.dumps(self.index, ensure_ascii=False).encode("utf-8"), self.index_path)
+
+    def report(self):
+        if not self.stats:
+            return
+        print("🗃 静的ファイルのキャッシュ（ヒット / 再検証 / ミス / 節約）:")
+        for site, s in self.stats.items():
+            print(f"  - {site}: {s['hit']} / {s['revalidated']} / {s['miss']} / {s['saved_bytes'] / 1024:.0f} KB")
@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.sync_api import sync_playwright
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_pool import BrowserPool, browser_rss_mb  # noqa: E402
+
+# ===== ブラウザプールのベンチマーク =====
+# ローカル HTTP サーバーで学会トップページ風の一覧ページを配信し、
+# 20 / 100 / 500 サイト分のジョブを
+#   - pool   : BrowserPool でコンテキストを使い回す
+#   - nopool : 現行スクリプトと同じくサイトごとにブラウザを起動する
+# の2通りで処理して、スループットとピークメモリを比べる。
+#
+#   python benchmarks/bench_browser_pool.py --jobs 20 100 500
+
+ROWS = 30
+
+
+def site_html(n):
+    rows = "".join(
+        f'<tr><td>2026.08.{(i % 28) + 1:02d}</td><td><a href="/site/{n}/news/{i}">学会{n} のお知らせ {i}</a></td></tr>'
+        for i in range(ROWS)
+    )
+    return f"<html><head><meta charset='utf-8'><title>site {n}</title></head><body><table class='righttbl'>{rows}</table></body></html>"
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        n = self.path.strip("/").split("/")[1] if self.path.startswith("/site/") else "0"
+        body = site_html(n).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def scrape(page, url):
+    page.goto(url)
+    page.wait_for_load_state("load")
+    rows = page.locator("table.righttbl tr")
+    return [rows.nth(i).locator("a").first.inner_text() for i in range(min(rows.count(), 10))]
+
+
+def run_pool(p, urls):
+    peak = 0.0
+    pool = BrowserPool(p, size=2, recycle_after=20).start()
+    try:
+        for url in urls:
+            with pool.page() as page:
+                scrape(page, url)
+            peak = max(peak, browser_rss_mb())
+    finally:
+        pool.close()
+    return peak
+
+
+def run_nopool(p, urls):
+    peak = 0.0
+    for url in urls:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_context().new_page()
+        scrape(page, url)
+        peak = max(peak, browser_rss_mb())
+        browser.close()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--modes", nargs="+", default=["pool", "nopool"])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    runners = {"pool": run_pool, "nopool": run_nopool}
+    print(f"{'mode':<8}{'jobs':>6}{'秒':>10}{'jobs/s':>10}{'peak MB':>10}")
+    with sync_playwright() as p:
+        for jobs in args.jobs:
+            urls = [f"{base}/site/{n}/" for n in range(jobs)]
+            for mode in args.modes:
+                start = time.perf_counter()
+                peak = runners[mode](p, urls)
+                elapsed = time.perf_counter() - start
+                print(f"{mode:<8}{jobs:>6}{elapsed:>10.1f}{jobs / elapsed:>10.1f}{peak:>10.0f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from charset import CharsetCache, detect  # noqa: E402
+
+# ===== エンコーディング判定とデコードのベンチマーク =====
+# UTF-8 / CP932 / EUC-JP / ISO-2022-JP の学会ページ風の HTML を、正しい・間違った・無い
+# charset 宣言の組み合わせで作り、
+#   1. 正しさ: CharsetCache.decode の結果が元の文字列と一致するか（文字化けしないか）
+#   2. 速さ: 毎回判定してデコードする場合と、サイトごとに覚えたエンコーディングで直接デコードする場合
+# を比べる。
+#
+#   python benchmarks/bench_charset.py --pages 2000 --size 30
+
+NEWS = [
+    "第{n}回日本骨粗鬆症学会学術集会の演題募集を開始しました",
+    "①理事会議事録（令和８年度第{n}回）を掲載しました",
+    "㈱メディカル・トリビューン主催セミナーのご案内（{n}月）",
+    "専門医更新のための単位申請について【重要】",
+    "ＮＥＷＳ　会員の皆様へ：年会費のお支払いのお願い～第{n}期～",
+    "評議員選挙の結果について（選挙管理委員会）",
+]
+
+# (エンコーディング, Content-Type, <meta charset>)
+CASES = [
+    ("utf-8", "text/html; charset=UTF-8", "utf-8"),
+    ("utf-8", "text/html", None),
+    ("cp932", "text/html; charset=Shift_JIS", "Shift_JIS"),
+    ("cp932", "text/html; charset=UTF-8", None),  # ヘッダーが間違っている
+    ("cp932", "text/html", "utf-8"),  # <meta> が間違っている
+    ("euc_jp", "text/html", "EUC-JP"),
+    ("euc_jp", "text/html", None),
+    ("iso2022_jp", "text/html; charset=ISO-2022-JP", None),
+    ("iso2022_jp", "text/html", None),
+]
+
+
+def make_page(encoding, meta, size, seed):
+    lines = []
+    for i in range(size):
+        text = NEWS[(seed + i) % len(NEWS)].format(n=seed + i)
+        if encoding in ("euc_jp", "iso2022_jp"):
+            # CP932 の機種依存文字は EUC-JP / ISO-2022-JP には無い
+            text = text.replace("①", "(1)").replace("㈱", "(株)").replace("～", "〜")
+        lines.append(f'<li><span class="date">2026.{i % 12 + 1:02d}.{i % 28 + 1:02d}</span><a href="/news/{seed}/{i}.html">{text}</a></li>')
+    head = f'<meta charset="{meta}">' if meta else ""
+    text = f"<html><head>{head}<title>お知らせ</title></head><body><ul>{''.join(lines)}</ul></body></html>"
+    return text, text.encode(encoding)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000, help="ケースごとのページ数")
+    parser.add_argument("--size", type=int, default=30, help="1ページの記事数")
+    args = parser.parse_args()
+
+    cache = CharsetCache(os.path.join(tempfile.mkdtemp(), "charsets.json"))
+    print(f"{'エンコーディング':<12}{'Content-Type':<32}{'meta':<11}{'判定':<12}{'確信度':>7}{'正しい':>8}{'判定MB/s':>10}{'キャッシュMB/s':>15}{'倍率':>7}")
+    for index, (encoding, content_type, meta) in enumerate(CASES):
+        pages = [make_page(encoding, meta, args.size, seed) for seed in range(args.pages)]
+        url = f"https://plaza.umin.ac.jp/society{index}/news/index.html"
+        total_mb = sum(len(body) for _, body in pages) / 1024 / 1024
+
+        # 毎回判定する
+        start = time.perf_counter()
+        for _, body in pages:
+            charset, _ = detect(body, content_type)
+            str(body, charset)
+        detect_sec = time.perf_counter() - start
+
+        # サイトごとに覚える（1回目だけ判定）
+        start = time.perf_counter()
+        decoded = [cache.decode(body, url, content_type) for _, body in pages]
+        cached_sec = time.perf_counter() - start
+
+        correct = sum(text == expected for text, (expected, _) in zip(decoded, pages))
+        charset, confidence = detect(pages[0][1], content_type)
+        print(
+            f"{encoding:<12}{content_type:<32}{meta or '-':<11}{charset or '-':<12}{confidence:>7.3f}"
+            f"{correct:>5}/{len(pages):<3}{total_mb / detect_sec:>9.1f}{total_mb / cached_sec:>15.1f}{detect_sec / cached_sec:>7.1f}"
+        )
+        assert correct == len(pages), f"文字化けしました: {encoding} / {content_type} / {meta}"
+    print(f"統計: {cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dedupe import find_duplicate_groups  # noqa: E402
+
+# ===== 重複検出のベンチマーク =====
+# 合成タイトル（ひらがな・カタカナ・漢字の語を組み合わせたもの）に、別の学会名義で
+# 表記揺れさせた「ほぼ重複」を一定割合混ぜ、件数を増やしたときの処理時間を測る。
+# 1件あたりの時間がほぼ一定なら全ペア比較（2乗）ではなく線形に近いことが分かる。
+#
+#   python benchmarks/bench_dedupe.py --items 10000 30000 100000
+
+KANJI = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+KANA = [chr(c) for c in range(0x30A1, 0x30F6)]
+VARIANTS = [("お知らせ", "のお知らせ"), ("について", "に関して"), ("", "（再掲）"), ("", "【重要】")]
+
+
+def make_word(rng):
+    pool = KANJI if rng.random() < 0.7 else KANA
+    return "".join(rng.choice(pool) for _ in range(rng.randint(2, 4)))
+
+
+def make_records(n, dup_rate, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [make_word(rng) for _ in range(20000)]
+    records = []
+    planted = 0
+    for i in range(n):
+        if records and rng.random() < dup_rate:
+            _, title, _ = records[rng.randrange(len(records))]
+            old, new = rng.choice(VARIANTS)
+            title = title.replace(old, new, 1) if old else new + title
+            records.append((f"学会{rng.randrange(200)}", title, ""))
+            planted += 1
+        else:
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(4, 9))]
+            title = "".join(words) + rng.choice(["について", "のお知らせ", "お知らせ", ""])
+            records.append((f"学会{rng.randrange(200)}", title, f"https://example{i % 500}.jp/news/{i}"))
+    return records, planted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[10000, 30000, 100000])
+    parser.add_argument("--dup-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'items':>8}{'秒':>8}{'µs/件':>9}{'仕込んだ重複':>12}{'まとめた件数':>12}")
+    for n in args.items:
+        records, planted = make_records(n, args.dup_rate)
+        start = time.perf_counter()
+        groups = find_duplicate_groups(records)
+        elapsed = time.perf_counter() - start
+        collapsed = sum(len(g) - 1 for g in groups)
+        print(f"{n:>8}{elapsed:>8.2f}{elapsed / n * 1e6:>9.1f}{planted:>12}{collapsed:>12}")
+
+
+if __name__ == "__main__":
+    main()
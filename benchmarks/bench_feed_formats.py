@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from feedgen.feed import FeedGenerator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feed_formats import FragmentCache, iso8601, make_entry, render_all, rfc822  # noqa: E402
+
+# ===== 3形式出力のベンチマーク =====
+# feedgen で RSS / Atom を別々に出力し JSON Feed を別途組み立てる「3回走査」と、
+# feed_formats.render_all の1回走査（キャッシュなし / 断片キャッシュあり）を比べる。
+#
+#   python benchmarks/bench_feed_formats.py --items 10 1000 10000
+
+CHANNEL = {"title": "ベンチ学会トピックス", "link": "https://example.com/", "description": "ベンチ用", "language": "ja"}
+
+
+def make_entries(n):
+    base = datetime(2026, 8, 1, tzinfo=timezone.utc)
+    entries = []
+    for i in range(n):
+        link = f"https://example.com/news/{i}.html"
+        title = f"第{i}回 学術集会のお知らせ（演題募集）"
+        entries.append(make_entry(title, link, title, f"{link}#{i}", False, rfc822(base - timedelta(days=i % 365))))
+    return entries
+
+
+def three_feedgen_passes(entries):
+    fg = FeedGenerator()
+    fg.id(CHANNEL["link"])
+    fg.title(CHANNEL["title"])
+    fg.link(href=CHANNEL["link"])
+    fg.description(CHANNEL["description"])
+    fg.language("ja")
+    for e in entries:
+        fe = fg.add_entry(order="append")
+        fe.id(e["guid"])
+        fe.title(e["title"])
+        fe.link(href=e["link"])
+        fe.description(e["description"])
+        fe.guid(e["guid"], permalink=False)
+        fe.pubDate(e["pub_date"])
+    rss = fg.rss_str()
+    atom = fg.atom_str()
+    items = [
+        {"id": e["guid"], "url": e["link"], "title": e["title"], "content_text": e["description"],
+         "date_published": iso8601(e["pub_date"])}
+        for e in entries
+    ]
+    json_feed = json.dumps({"version": "https://jsonfeed.org/version/1.1", "title": CHANNEL["title"], "items": items},
+                           ensure_ascii=False).encode("utf-8")
+    return {"rss": rss, "atom": atom, "json": json_feed}
+
+
+def timed(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>7} {'方式':<14}{'ms':>10}{'RSS KB':>9}{'Atom KB':>9}{'JSON KB':>9}")
+    for n in args.items:
+        entries = make_entries(n)
+        warm = FragmentCache(path=None)
+        render_all(CHANNEL, entries, warm)
+
+        cases = [
+            ("feedgen x3", lambda: three_feedgen_passes(entries)),
+            ("1pass cold", lambda: render_all(CHANNEL, entries, FragmentCache(path=None))),
+            ("1pass cached", lambda: render_all(CHANNEL, entries, warm)),
+        ]
+        for label, func in cases:
+            elapsed, out = timed(func, args.repeat)
+            sizes = [len(out[fmt]) / 1024 for fmt in ("rss", "atom", "json")]
+            print(f"{n:>7} {label:<14}{elapsed * 1000:>10.2f}" + "".join(f"{size:>9.1f}" for size in sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import gzip
+import http.client
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from feed_formats import make_entry, render_all, rfc822  # noqa: E402
+from scheduler import percentile  # noqa: E402
+
+# ===== フィード配信サーバーの負荷試験 =====
+# 合成した統合フィード（既定 300 件）を一時ディレクトリに書き、feed_server.py を別プロセスで
+# 起動して、複数のクライアントスレッドが keep-alive で投げ続けたときの
+# requests/sec と p50 / p99 レイテンシを、リクエストの種類ごとに測る。
+#
+#   python benchmarks/bench_feed_server.py --clients 8 --seconds 5
+
+SCENARIOS = {
+    "full": ("/combined.xml", {}),
+    "gzip": ("/combined.xml", {"Accept-Encoding": "gzip"}),
+    "304": ("/combined.xml", {"If-None-Match": None}),
+    "limit": ("/combined.json?limit=20", {}),
+}
+
+
+def write_feed(directory, n_items):
+    now = datetime.now(timezone.utc)
+    entries = [
+        make_entry(f"【学会{i % 20}】お知らせ {i}", f"https://example{i % 20}.jp/news/{i}",
+                   f"本文 {i}", pub_date=rfc822(now - timedelta(hours=i)))
+        for i in range(n_items)
+    ]
+    channel = {"title": "学会RSS統合", "link": "https://example.com/rss_output/combined.xml", "description": "", "language": "ja"}
+    rss = render_all(channel, entries)["rss"]
+    path = os.path.join(directory, "combined.xml")
+    with open(path, "wb") as f:
+        f.write(rss)
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(rss, compresslevel=9, mtime=0))
+    return len(rss)
+
+
+def start_server(directory):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "feed_server.py"), "--root", directory, "--port", "0", "--quiet"],
+        stdout=subprocess.PIPE, text=True, cwd=ROOT,
+    )
+    port = int(re.search(r":(\d+)/", proc.stdout.readline()).group(1))
+    return proc, port
+
+
+def client(port, path, headers, deadline, latencies):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run(port, path, headers, clients, seconds):
+    deadline = time.perf_counter() + seconds
+    per_thread = [[] for _ in range(clients)]
+    threads = [threading.Thread(target=client, args=(port, path, headers, deadline, lat)) for lat in per_thread]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies = [x for lat in per_thread for x in lat]
+    return len(latencies) / elapsed, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        size = write_feed(directory, args.items)
+        proc, port = start_server(directory)
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            conn.request("GET", "/combined.xml")
+            response = conn.getresponse()
+            response.read()
+            etag = response.getheader("ETag")
+            conn.close()
+
+            print(f"combined.xml {size / 1024:.0f} KB / クライアント {args.clients} / 各 {args.seconds:.0f} 秒")
+            print(f"{'種類':<8}{'req/s':>10}{'p50ms':>9}{'p99ms':>9}")
+            for name, (path, headers) in SCENARIOS.items():
+                headers = {k: (etag if v is None else v) for k, v in headers.items()}
+                rps, p50, p99 = run(port, path, headers, args.clients, args.seconds)
+                print(f"{name:<8}{rps:>10.0f}{p50:>9.2f}{p99:>9.2f}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.sync_api import sync_playwright
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_pool import descendant_pids  # noqa: E402
+from render_profiles import FULL, LITE, comparable, context_options  # noqa: E402
+
+# ===== 描画プロファイル（full / lite）のベンチマーク =====
+# ローカル HTTP サーバーで学会サイト風の一覧ページ（フィクスチャ）を配信し、
+# それぞれを full（JavaScript あり）と lite（JavaScript なし）のコンテキストで読み込んで
+#   - ページが使えるようになるまでの時間（goto 〜 load）
+#   - ブラウザ子プロセスが使った CPU 時間（/proc の utime + stime）
+#   - 抽出した記事が full と lite で一致するか
+# を比べる。js_list はクライアント側で一覧を描画するので lite では一致しない（full のまま）。
+#
+#   python benchmarks/bench_render_profiles.py --repeat 20
+
+ROWS = 30
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+# 重いテーマ JS（アニメーションや計測タグの代わりに CPU を使うだけのスクリプト）
+HEAVY_SCRIPT = "<script>(function(){var t=Date.now(),x=0;while(Date.now()-t<150){x+=Math.sqrt(x+1);}})();</script>"
+
+
+def rows_html():
+    return "".join(
+        f'<tr><td>2026.08.{(i % 28) + 1:02d}</td><td><a href="/news/{i}">お知らせ {i}</a></td></tr>'
+        for i in range(ROWS)
+    )
+
+
+FIXTURES = {
+    # サーバー側で一覧が HTML に入っている素朴なページ
+    "static": f"<table class='righttbl'>{rows_html()}</table>",
+    # 一覧は HTML にあるが、重いテーマ JS も読み込む WordPress 風のページ
+    "wp_theme": f"<div class='vk_posts'><table class='righttbl'>{rows_html()}</table></div>{HEAVY_SCRIPT * 3}",
+    # 一覧を JavaScript で描画するページ（lite では記事が取れない）
+    "js_list": "<table class='righttbl'></table><script>document.querySelector('table').innerHTML = "
+               + repr(rows_html()) + ";</script>",
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        name = self.path.strip("/")
+        body = f"<html><head><meta charset='utf-8'></head><body>{FIXTURES.get(name, '')}</body></html>".encode("utf-8")
+        self.send_response(200 if name in FIXTURES else 404)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def browser_cpu_sec():
+    total = 0
+    for pid in descendant_pids():
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])
+    return total / CLOCK_TICKS
+
+
+def scrape(page, url):
+    page.goto(url)
+    page.wait_for_load_state("load")
+    rows = page.locator("table.righttbl tr")
+    items = []
+    for i in range(min(rows.count(), 10)):
+        link = rows.nth(i).locator("a").first
+        items.append({"title": link.inner_text(), "link": link.get_attribute("href"), "pub_date": None})
+    return items
+
+
+def measure(browser, profile, url, repeat):
+    context = browser.new_context(**context_options(profile))
+    page = context.new_page()
+    items = scrape(page, url)  # 1回目は温め
+    cpu_start = browser_cpu_sec()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        items = scrape(page, url)
+    elapsed = time.perf_counter() - started
+    cpu = browser_cpu_sec() - cpu_start
+    context.close()
+    return elapsed / repeat * 1000, cpu / repeat * 1000, items
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        print(f"{'fixture':<10}{'full ms':>9}{'lite ms':>9}{'full CPU':>10}{'lite CPU':>10}{'一致':>6}")
+        for name in FIXTURES:
+            full_ms, full_cpu, full_items = measure(browser, FULL, base + name, args.repeat)
+            lite_ms, lite_cpu, lite_items = measure(browser, LITE, base + name, args.repeat)
+            same = "yes" if full_items and comparable(full_items) == comparable(lite_items) else "no"
+            print(f"{name:<10}{full_ms:>9.1f}{lite_ms:>9.1f}{full_cpu:>10.1f}{lite_cpu:>10.1f}{same:>6}")
+        browser.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
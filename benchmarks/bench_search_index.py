@@ -0,0 +1,77 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_index import SearchIndex  # noqa: E402
+
+# ===== 検索インデックスのベンチマーク =====
+# 合成した記事を指定件数まで投入し、よく使いそうな検索語で検索したときの
+# 応答時間（p50 / p99）を測る。タイトルはランダムな語に、よく使われる語（WORDS）を
+# 一定の割合で混ぜて作る。インデックスは一時ディレクトリに作る。
+#
+#   python benchmarks/bench_search_index.py --items 1000000
+
+WORDS = [
+    "ガイドライン", "学術集会", "演題募集", "お知らせ", "新型コロナウイルス", "感染症", "ワクチン", "声明",
+    "厚生労働省", "気象庁", "熱中症", "注意喚起", "会員", "開催", "延期", "年度", "総会", "理事会",
+    "公募", "委員会", "報告", "改訂", "資料", "掲載", "セミナー", "講習会", "オンライン", "専門医",
+    "認定", "更新", "申請", "締切", "奨励賞", "候補者", "推薦", "倫理", "利益相反", "COVID-19",
+]
+QUERIES = ["ガイドライン 改訂", "演題募集", "COVID", "熱中症 注意喚起", "専門医 更新", "奨励賞", "利益相反", "声明"]
+
+
+KANJI = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+
+
+def make_vocabulary(rng, size=20000):
+    return ["".join(rng.choice(KANJI) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def make_rows(rng, vocabulary, n, start, common_rate):
+    for i in range(start, start + n):
+        words = [rng.choice(WORDS) if rng.random() < common_rate else rng.choice(vocabulary)
+                 for _ in range(rng.randint(3, 6))]
+        title = "".join(words) + f"（第{i % 120}回）"
+        date = f"20{rng.randint(15, 26)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z"
+        yield title, f"https://example{i % 500}.jp/news/{i}", date
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--societies", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--common-rate", type=float, default=0.15, help="WORDS から語を選ぶ割合")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    vocabulary = make_vocabulary(rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, "bench.sqlite"))
+        per_society = args.items // args.societies
+        started = time.perf_counter()
+        for s in range(args.societies):
+            index.add_rows(f"学会{s}", make_rows(rng, vocabulary, per_society, s * per_society, args.common_rate))
+        index.optimize()
+        print(f"📥 {index.count()} 件を投入（{time.perf_counter() - started:.1f} 秒）")
+
+        print(f"{'検索語':<20}{'絞り込み':<12}{'件数':>6}{'p50 ms':>9}{'p99 ms':>9}")
+        for query in QUERIES:
+            for label, kwargs in [("なし", {}), ("学会+日付", {"society": "学会7", "since": "2024-01-01"})]:
+                times = []
+                for _ in range(args.repeat):
+                    t = time.perf_counter()
+                    results = index.search(query, limit=20, **kwargs)
+                    times.append((time.perf_counter() - t) * 1000)
+                times.sort()
+                p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+                print(f"{query:<20}{label:<12}{len(results):>6}{times[len(times) // 2]:>9.1f}{p99:>9.1f}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+from browser_pool import descendant_pids  # noqa: E402
+from scheduler import percentile  # noqa: E402
+from site_farm import add_farm_args, farm_from_args, write_site_configs  # noqa: E402
+
+# ===== サイトファームでの run_all.py の負荷試験 =====
+# benchmarks/site_farm.py で N 個（既定 20 / 200 / 2,000）の合成サイトを別プロセスで配信し、
+# 一時ディレクトリに書き出したサイト設定に対して run_all.py を別プロセスで実行して
+#   - スループット（サイト / 秒）と全体の所要時間
+#   - サイトごとの所要時間の p50 / p95 / p99 / 最大（state/site_latency.json の今回の値）
+#   - ピークメモリ（run_all.py の Python プロセスだけ / Chromium などの子プロセスを含む合計）
+#   - 出力できたフィードの数と、正常なサイトの数
+# を測る。遅延や障害の入れ方は site_farm.py と同じオプションで指定する。
+# run_all.py は実行時と同じく shared_env（共通関数の取得）と Playwright を使う。
+#
+#   python benchmarks/bench_site_farm.py --scales 20 200 --latency-ms 50 --jitter-ms 30 --fail-rate 0.02
+
+SAMPLE_SEC = 0.25
+
+
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class MemorySampler(threading.Thread):
+    # 実行中の run_all.py とその子孫プロセスの RSS を一定間隔で測り、ピークを覚える
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.stop_event = threading.Event()
+        self.peak_python_kb = 0
+        self.peak_total_kb = 0
+
+    def run(self):
+        while not self.stop_event.wait(SAMPLE_SEC):
+            python_kb = rss_kb(self.pid)
+            total_kb = python_kb + sum(rss_kb(pid) for pid in descendant_pids(self.pid))
+            self.peak_python_kb = max(self.peak_python_kb, python_kb)
+            self.peak_total_kb = max(self.peak_total_kb, total_kb)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def farm_argv(args, sites):
+    argv = ["--sites", str(sites), "--rows", str(args.rows), "--seed", str(args.seed)]
+    for name in ("latency_ms", "jitter_ms", "slow_rate", "fail_rate", "hang_rate", "hang_sec", "flaky_rate"):
+        argv += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    return argv
+
+
+def start_farm(args, sites):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "site_farm.py"), "serve", "--port", "0"] + farm_argv(args, sites),
+        stdout=subprocess.PIPE, text=True,
+    )
+    port = int(re.search(r":(\d+)/", proc.stdout.readline()).group(1))
+    return proc, port
+
+
+def site_durations(workdir):
+    # run_all.py が記録した各サイトの今回の所要時間（履歴の最後の値）
+    try:
+        with open(os.path.join(workdir, "state", "site_latency.json"), "r", encoding="utf-8") as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [rec["durations"][-1] for rec in records.values() if rec.get("durations")]
+
+
+def run_scale(args, sites):
+    workdir = tempfile.mkdtemp(prefix=f"site-farm-{sites}-")
+    farm = farm_from_args(argparse.Namespace(**dict(vars(args), sites=sites)))
+    server, port = start_farm(args, sites)
+    try:
+        write_site_configs(farm, port, workdir)
+        # run_all.py は作業ディレクトリの merge_feeds.py を呼ぶ
+        os.symlink(os.path.join(ROOT, "merge_feeds.py"), os.path.join(workdir, "merge_feeds.py"))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, BENCH_DIR, os.environ.get("PYTHONPATH", "")]))
+        runner_argv = ["--budget-sec", "0", "--pool-size", str(args.pool_size)] + args.runner_args
+        log_path = os.path.join(workdir, "run_all.log")
+        started = time.monotonic()
+        with open(log_path, "w", encoding="utf-8") as log:
+            # -c で起動すると作業ディレクトリ（合成サイトの RSSn.py）が import で最優先になる
+            runner = subprocess.Popen([sys.executable, "-c", "import run_all; run_all.main()"] + runner_argv,
+                                      cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+            sampler = MemorySampler(runner.pid)
+            sampler.start()
+            returncode = runner.wait()
+            sampler.stop()
+        elapsed = time.monotonic() - started
+
+        durations = site_durations(workdir)
+        feeds = len([name for name in os.listdir(os.path.join(workdir, "rss_output"))
+                     if re.match(r"Feed\d+\.xml$", name)]) if os.path.isdir(os.path.join(workdir, "rss_output")) else 0
+        healthy = sum(site.behavior in ("ok", "slow") for site in farm.sites)
+        return {
+            "sites": sites,
+            "returncode": returncode,
+            "elapsed_sec": elapsed,
+            "sites_per_sec": sites / elapsed,
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "p99": percentile(durations, 99),
+            "max": max(durations) if durations else None,
+            "python_mb": sampler.peak_python_kb / 1024,
+            "total_mb": sampler.peak_total_kb / 1024,
+            "feeds": feeds,
+            "healthy": healthy,
+            "log": log_path,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _sec(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--keep", action="store_true", help="作業ディレクトリ（ログ・フィード・状態）を残す")
+    parser.add_argument("--runner-args", nargs=argparse.REMAINDER, default=[], help="run_all.py にそのまま渡す引数")
+    add_farm_args(parser)
+    args = parser.parse_args()
+
+    print(f"{'サイト':>6}{'秒':>9}{'サイト/秒':>10}{'p50':>7}{'p95':>7}{'p99':>7}{'最大':>7}{'Py MB':>8}{'合計 MB':>9}{'フィード':>10}")
+    for sites in args.scales:
+        r = run_scale(args, sites)
+        print(
+            f"{r['sites']:>6}{r['elapsed_sec']:>9.1f}{r['sites_per_sec']:>10.2f}{_sec(r['p50']):>7}{_sec(r['p95']):>7}"
+            f"{_sec(r['p99']):>7}{_sec(r['max']):>7}{r['python_mb']:>8.0f}{r['total_mb']:>9.0f}{r['feeds']:>6}/{r['healthy']:<4}"
+        )
+        if r["returncode"] != 0:
+            print(f"⚠ run_all.py が終了コード {r['returncode']} で終わりました" + (f"（ログ: {r['log']}）" if args.keep else ""))
+
+
+if __name__ == "__main__":
+    main()
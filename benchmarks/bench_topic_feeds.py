@@ -0,0 +1,77 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from topic_feeds import KeywordMatcher, normalize  # noqa: E402
+
+# ===== トピック分類のベンチマーク =====
+# 合成したキーワード規則（既定 1,000 個）と記事タイトル（既定 10 万件）で、
+# Aho-Corasick による1回走査と、キーワードごとに `in` で調べる素朴な方法を比べる。
+# 両者の分類結果が一致することも確かめる。
+#
+#   python benchmarks/bench_topic_feeds.py --rules 100 1000 5000 --items 100000
+
+KANJI = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+KANA = [chr(c) for c in range(0x30A1, 0x30F6)]
+
+
+def make_word(rng):
+    pool = KANJI if rng.random() < 0.7 else KANA
+    return "".join(rng.choice(pool) for _ in range(rng.randint(2, 4)))
+
+
+def make_data(n_rules, n_items, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [make_word(rng) for _ in range(20000)]
+    rules = {}
+    for i in range(n_rules):
+        rules.setdefault(rng.choice(vocabulary), set()).add(f"topic{i % 50}")
+    titles = [
+        "".join(rng.choice(vocabulary) for _ in range(rng.randint(4, 9))) + rng.choice(["について", "のお知らせ", ""])
+        for _ in range(n_items)
+    ]
+    return rules, titles
+
+
+def naive_match(rules, text):
+    text = normalize(text)
+    found = set()
+    for keyword, labels in rules:
+        if keyword in text:
+            found |= labels
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'rules':>7}{'構築ms':>9}{'AC秒':>8}{'素朴秒':>9}{'倍率':>7}{'一致記事':>10}")
+    for n_rules in args.rules:
+        rules, titles = make_data(n_rules, args.items)
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(rules)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        fast = [matcher.match(t) for t in titles]
+        ac_sec = time.perf_counter() - start
+
+        normalized = [(normalize(k), labels) for k, labels in rules.items()]
+        start = time.perf_counter()
+        slow = [naive_match(normalized, t) for t in titles]
+        naive_sec = time.perf_counter() - start
+
+        assert fast == slow, "分類結果が一致しません"
+        hits = sum(1 for labels in fast if labels)
+        print(f"{n_rules:>7}{build_ms:>9.1f}{ac_sec:>8.2f}{naive_sec:>9.2f}{naive_sec / ac_sec:>7.1f}{hits:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import sys
+
+# ===== マイクロベンチマーク結果の比較 =====
+# benchmarks/microbench.py が保存した2つの JSON（基準と今回）を比べ、中央値が
+# しきい値（既定 10%）を超えて遅くなったケースを回帰として表示する。回帰があれば終了コード 1。
+# 回数が少なくばらつきの大きい測定を誤検知しないよう、今回の最小値も基準の中央値を超えたときだけ回帰とする。
+#
+#   python benchmarks/compare.py base.json new.json --threshold 0.1
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(base, new, threshold=DEFAULT_THRESHOLD):
+    """[(名前, 基準の中央値, 今回の中央値, 変化率, 判定), ...] を返す。"""
+    rows = []
+    for name in sorted(set(base) | set(new), key=lambda n: (n.split("/")[0], int(n.split("/")[1]))):
+        if name not in base or name not in new:
+            rows.append((name, base.get(name, {}).get("median_sec"), new.get(name, {}).get("median_sec"), None, "片方のみ"))
+            continue
+        before, after = base[name]["median_sec"], new[name]["median_sec"]
+        change = after / before - 1 if before else 0.0
+        if change > threshold and new[name]["min_sec"] > before:
+            verdict = "回帰"
+        elif change < -threshold:
+            verdict = "改善"
+        else:
+            verdict = ""
+        rows.append((name, before, after, change, verdict))
+    return rows
+
+
+def _ms(sec):
+    return "-" if sec is None else f"{sec * 1000:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回帰とみなす中央値の増加率")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    print(f"基準: {base.get('commit') or '-'}（{base.get('created')}）  今回: {new.get('commit') or '-'}（{new.get('created')}）")
+    if base.get("machine") != new.get("machine"):
+        print(f"⚠ 計測したマシンが違います: {base.get('machine')} / {new.get('machine')}")
+
+    rows = compare(base["results"], new["results"], args.threshold)
+    print(f"{'ケース':<24}{'基準 ms':>12}{'今回 ms':>12}{'変化':>9}  判定")
+    for name, before, after, change, verdict in rows:
+        change_text = "-" if change is None else f"{change:+.1%}"
+        mark = "❌ " if verdict == "回帰" else "✅ " if verdict == "改善" else ""
+        print(f"{name:<24}{_ms(before):>12}{_ms(after):>12}{change_text:>9}  {mark}{verdict}")
+
+    regressions = [row for row in rows if row[4] == "回帰"]
+    if regressions:
+        print(f"\n❌ {len(regressions)} 件のケースが {args.threshold:.0%} を超えて遅くなりました")
+        sys.exit(1)
+    print(f"\n✅ {args.threshold:.0%} を超える回帰はありません")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+import argparse
+import html
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timedelta, timezone
+from glob import glob
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from feed_formats import FragmentCache, entries_from_items, entries_from_rss, render_all  # noqa: E402
+
+# ===== ホットパスのマイクロベンチマーク =====
+# 1サイト分の処理で繰り返し通る部分を、件数（既定 10 / 1,000 / 100,000）ごとに測る。
+#   date_parse     RSS3.parse_date（date_regex での日付の抜き出しと2桁西暦の補正）
+#   urljoin        RSS3.row_link（BASE_URL と href からのリンク組み立て）
+#   row_loop       RSS3.parse_row（extract_items の1行分の処理。リンク・日付・dict 作成）
+#   serialize      記事一覧から RSS / Atom / JSON Feed を作る（feed_formats.entries_from_items + render_all）
+#   generate_rss   feed_writer.generate_rss（3形式の組み立てから書き込み・圧縮・manifest 更新まで）
+#   merge_feeds    FeedN.xml 群からの merge_feeds.main() 全体（一時ディレクトリで実行）
+#   extract_items  RSS3.extract_items を Chromium 上の一覧ページ（iframe の中の dl）に対して実行
+#                  （--browser のときだけ）
+#   shared_extract_items
+#                  共通の scraper_utils.extract_items を使うサイト（RSS10 / 11 / 13 / 17）の scrape を、
+#                  それぞれの形（table / ul / li / dl）と日付の書式の一覧に対して実行（--browser のときだけ）
+# どれも本物の関数を import して呼ぶので、RSS3.py / feed_formats.py などの変更がそのまま結果に出る。
+# 記事のタイトル・リンク・日付は rss_output/*.xml の実データを元に件数を水増しし、日付は各サイトの
+# 書式で並べる（--html で保存した一覧 HTML のリンクも使える）。
+# 結果は benchmarks/results/ に JSON で保存する。比較は benchmarks/compare.py で行う。
+#
+#   python benchmarks/microbench.py --sizes 10 1000 100000
+#   python benchmarks/microbench.py --cases date_parse row_loop --sizes 1000 --output base.json
+#   python benchmarks/compare.py base.json benchmarks/results/<最新>.json
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+CASES = ("date_parse", "urljoin", "row_loop", "serialize", "generate_rss", "merge_feeds", "extract_items", "shared_extract_items")
+SIZES = (10, 1000, 100000)
+
+BASE_URL = "https://www.example-gakkai.jp/news/"
+GAKKAI = "ベンチ学会"
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+# 共通の scraper_utils.extract_items を使うサイトのうち、一覧の形と日付の書式が違うもの
+# （table の td「.」・ul の p「年月日」・li の a「/」・dl「年月日」）。行の HTML は各サイトのセレクターに合わせる
+SHARED_LAYOUTS = {
+    "RSS10": ('<table id="sp-table-35">', "</table>", '<tr><td>{date}</td><td></td><td><a href="{link}">{title}</a></td></tr>'),
+    "RSS11": ('<ul class="news-list">', "</ul>", '<li><a href="{link}"><p>{date}</p><p>{title}</p></a></li>'),
+    "RSS13": ('<div id="main_left"><ul>', "</ul></div>", '<li><a href="{link}">{date} {title}</a></li>'),
+    "RSS17": ('<dl class="pico_block_menu">', "</dl>", '<dt>{date}</dt><dd><a href="{link}">{title}</a></dd>'),
+}
+
+
+class SkipCase(Exception):
+    """この環境では測れないケース（依存パッケージが無いなど）。"""
+
+
+def load_site(name):
+    # RSSn.py は site_runner（Playwright）や共通関数（scraper_utils）を import する
+    try:
+        return importlib.import_module(name)
+    except Exception as e:
+        raise SkipCase(f"{name} を読み込めません: {e}")
+
+
+# ----- フィクスチャ -----
+def real_items():
+    """rss_output/*.xml に載っている実際の記事（タイトル・リンク・日付の文字列）。"""
+    items = []
+    for path in sorted(glob(os.path.join(ROOT, "rss_output", "Feed*.xml"))):
+        with open(path, "rb") as f:
+            _, entries = entries_from_rss(f.read())
+        items += [(e["title"], e["link"]) for e in entries if e["title"] and e["link"]]
+    return items or [("学術集会のお知らせ", "https://www.example-gakkai.jp/news/1.html")]
+
+
+def make_items(n):
+    """実データを元に n 件の記事を作る。タイトルには通し番号を付けて重複にしない。"""
+    base = real_items()
+    items = []
+    for i in range(n):
+        title, link = base[i % len(base)]
+        parts = urlsplit(link)
+        items.append({
+            "title": f"{title}（{i}）",
+            "link": f"{parts.scheme}://{parts.netloc}{parts.path}?n={i}",
+            "description": f"{title}（{i}）",
+            "pub_date": NOW - timedelta(hours=i),
+        })
+    return items
+
+
+def date_text(site, i, pub_date):
+    # サイトの書式（year_unit など）で並べる。2桁西暦のサイトもあるので一部を2桁にする
+    year = pub_date.year % 100 if i % 5 == 0 else pub_date.year
+    return f"{year}{site.year_unit}{pub_date.month}{site.month_unit}{pub_date.day:02d}{site.day_unit}"
+
+
+def make_rows(site, n):
+    """extract_items が1行ごとに読む文字列（タイトル・href・日付）の並び。"""
+    rows = []
+    for i, item in enumerate(make_items(n)):
+        parts = urlsplit(item["link"])
+        # 相対リンク・絶対パス・完全な URL を混ぜる
+        href = [f"{parts.path.rsplit('/', 1)[-1]}?{parts.query}", f"{parts.path}?{parts.query}", item["link"]][i % 3]
+        rows.append((item["title"], href, date_text(site, i, item["pub_date"])))
+    return rows
+
+
+def rss3_html(site, items):
+    # RSS3 の一覧と同じ形（ページの iframe の中に dl dt（日付）/ dd（リンク））
+    rows = "".join(
+        f'<dt>{date_text(site, i, item["pub_date"])}</dt><dd><a href="{html.escape(item["link"])}">{html.escape(item["title"])}</a></dd>'
+        for i, item in enumerate(items)
+    )
+    inner = f"<html><head><meta charset='utf-8'></head><body><dl>{rows}</dl></body></html>"
+    return f"<html><head><meta charset='utf-8'></head><body><iframe srcdoc=\"{html.escape(inner)}\"></iframe></body></html>"
+
+
+def shared_html(site, layout, items):
+    start, end, row = layout
+    rows = "".join(
+        row.format(date=date_text(site, i, item["pub_date"]), link=html.escape(item["link"]), title=html.escape(item["title"]))
+        for i, item in enumerate(items)
+    )
+    return f"<html><head><meta charset='utf-8'></head><body>{start}{rows}{end}</body></html>"
+
+
+class _RowReader(HTMLParser):
+    # 保存した一覧 HTML から（日付らしい文字列, タイトル, href）を拾う
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.href = None
+        self.texts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self.href = dict(attrs).get("href")
+            self.texts = []
+
+    def handle_data(self, data):
+        if self.href is not None:
+            self.texts.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.href is not None:
+            self.rows.append(("".join(self.texts), self.href))
+            self.href = None
+
+
+def rows_from_html(site, paths, n):
+    """保存した一覧 HTML のリンクを n 行になるまで繰り返す。日付は合成する。"""
+    found = []
+    for path in paths:
+        reader = _RowReader()
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            reader.feed(f.read())
+        found += reader.rows
+    if not found:
+        raise SkipCase("一覧 HTML にリンクがありません")
+    return [
+        (title.strip(), href, date_text(site, i, NOW - timedelta(hours=i)))
+        for i, (title, href) in ((i, found[i % len(found)]) for i in range(n))
+    ]
+
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+# ----- ケース -----
+# setup(n, args) は (prepare, run, cleanup) を返す。prepare は毎回の計測の直前に計測外で呼ぶ。
+def setup_date_parse(n, args):
+    site = load_site("RSS3")
+    texts = [row[2] for row in make_rows(site, n)]
+
+    def run():
+        for text in texts:
+            site.parse_date(text)
+    return None, run, None
+
+
+def setup_urljoin(n, args):
+    site = load_site("RSS3")
+    hrefs = [row[1] for row in make_rows(site, n)]
+
+    def run():
+        for href in hrefs:
+            site.row_link(href)
+    return None, run, None
+
+
+def setup_row_loop(n, args):
+    site = load_site("RSS3")
+    rows = rows_from_html(site, args.html, n) if args.html else make_rows(site, n)
+
+    def run():
+        return [site.parse_row(title, site.row_link(href), text) for title, href, text in rows]
+    return None, run, None
+
+
+def setup_serialize(n, args):
+    items = make_items(n)
+    channel = {"title": f"{GAKKAI}トピックス", "link": BASE_URL, "description": f"{GAKKAI}の最新トピック情報", "language": "ja"}
+
+    def run():
+        return render_all(channel, entries_from_items(items), FragmentCache(path=None), build_date=NOW)
+    return None, run, None
+
+
+def setup_generate_rss(n, args):
+    from feed_writer import generate_rss
+
+    items = make_items(n)
+    workdir = tempfile.mkdtemp(prefix="microbench-")
+
+    def prepare():
+        shutil.rmtree(os.path.join(workdir, "rss_output"), ignore_errors=True)
+        shutil.rmtree(os.path.join(workdir, ".cache"), ignore_errors=True)
+
+    def run():
+        with working_directory(workdir):
+            generate_rss(items, "rss_output/Feed1.xml", BASE_URL, GAKKAI)
+    return prepare, run, lambda: shutil.rmtree(workdir, ignore_errors=True)
+
+
+def setup_merge_feeds(n, args):
+    try:
+        import merge_feeds
+    except ImportError as e:
+        raise SkipCase(f"merge_feeds を読み込めません: {e}")
+
+    # 20 学会分の FeedN.xml に記事を振り分けておく（同じタイトルは同じ学会に載せる）
+    feeds = 20
+    items = make_items(n)
+    source = tempfile.mkdtemp(prefix="microbench-feeds-")
+    for k in range(feeds):
+        channel = {"title": f"ベンチ学会{k}トピックス", "link": f"https://society{k}.example.jp/", "description": "ベンチ用", "language": "ja"}
+        xml = render_all(channel, entries_from_items(items[k::feeds]), build_date=NOW)["rss"]
+        os.makedirs(os.path.join(source, "rss_output"), exist_ok=True)
+        with open(os.path.join(source, "rss_output", f"Feed{k + 1}.xml"), "wb") as f:
+            f.write(xml)
+    workdir = tempfile.mkdtemp(prefix="microbench-merge-")
+
+    def prepare():
+        # 毎回、前回の combined.xml・アーカイブ・状態がない初回の実行を測る
+        shutil.rmtree(workdir, ignore_errors=True)
+        shutil.copytree(source, workdir)
+
+    def run():
+        with working_directory(workdir):
+            merge_feeds.main(now=NOW)
+
+    def cleanup():
+        shutil.rmtree(source, ignore_errors=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return prepare, run, cleanup
+
+
+def setup_extract_items(n, args):
+    if not args.browser:
+        raise SkipCase("--browser を付けたときだけ測ります")
+    site = load_site("RSS3")
+    from playwright.sync_api import sync_playwright
+
+    # RSS3.extract_items は先頭の max_items 行までしか読まないので、件数が多いほど一覧の大きさが効く
+    content = rss3_html(site, make_items(n))
+    playwright = sync_playwright().start()
+    browser = playwright.chromium.launch(headless=True)
+    page = browser.new_page()
+
+    def prepare():
+        page.set_content(content)
+
+    def run():
+        return site.extract_items(page)
+
+    def cleanup():
+        browser.close()
+        playwright.stop()
+    return prepare, run, cleanup
+
+
+def setup_shared_extract_items(n, args):
+    if not args.browser:
+        raise SkipCase("--browser を付けたときだけ測ります")
+    sites = [(load_site(name), layout) for name, layout in SHARED_LAYOUTS.items()]
+    from playwright.sync_api import sync_playwright
+
+    # 1回の計測で SHARED_LAYOUTS の各サイトの scrape（共通の extract_items）を n 行の一覧に対して実行する
+    items = make_items(n)
+    playwright = sync_playwright().start()
+    browser = playwright.chromium.launch(headless=True)
+    pages = []
+    for site, layout in sites:
+        pages.append((site, browser.new_page(), shared_html(site, layout, items)))
+
+    def prepare():
+        for _, page, content in pages:
+            page.set_content(content)
+
+    def run():
+        return [site.scrape(page) for site, page, _ in pages]
+
+    def cleanup():
+        browser.close()
+        playwright.stop()
+    return prepare, run, cleanup
+
+
+SETUPS = {
+    "date_parse": setup_date_parse,
+    "urljoin": setup_urljoin,
+    "row_loop": setup_row_loop,
+    "serialize": setup_serialize,
+    "generate_rss": setup_generate_rss,
+    "merge_feeds": setup_merge_feeds,
+    "extract_items": setup_extract_items,
+    "shared_extract_items": setup_shared_extract_items,
+}
+
+
+# ----- 計測と保存 -----
+def measure(prepare, run, repeat, max_sec):
+    """repeat 回（合計が max_sec を超えたらそこまで、最低1回）測った秒数のリスト。"""
+    times = []
+    total = 0.0
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+        if total > max_sec:
+            break
+    return times
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_suite(args):
+    results = {}
+    print(f"{'ケース':<22}{'件数':>8}{'回数':>6}{'中央値 ms':>12}{'最小 ms':>11}{'1件あたり µs':>14}")
+    for case in args.cases:
+        for n in args.sizes:
+            name = f"{case}/{n}"
+            try:
+                # merge_feeds などの出力（✅ ...）は表に混ぜない
+                with redirect_stdout(io.StringIO()):
+                    prepare, run, cleanup = SETUPS[case](n, args)
+            except SkipCase as e:
+                print(f"{case:<22}{n:>8}  ⏭ {e}")
+                break
+            try:
+                with redirect_stdout(io.StringIO()):
+                    times = measure(prepare, run, args.repeat, args.max_sec)
+            finally:
+                if cleanup:
+                    cleanup()
+            median = statistics.median(times)
+            results[name] = {
+                "case": case,
+                "items": n,
+                "runs": len(times),
+                "median_sec": median,
+                "min_sec": min(times),
+                "max_sec": max(times),
+                "per_item_us": median / n * 1e6,
+            }
+            print(f"{case:<22}{n:>8}{len(times):>6}{median * 1000:>12.3f}{min(times) * 1000:>11.3f}{median / n * 1e6:>14.2f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--max-sec", type=float, default=10.0, help="1ケース・1件数あたりの計測時間の上限")
+    parser.add_argument("--html", nargs="+", help="row_loop に使う保存済みの一覧 HTML")
+    parser.add_argument("--browser", action="store_true", help="Chromium で RSS3.extract_items と共通の extract_items も測る")
+    parser.add_argument("--output", help="結果の JSON の保存先（既定は benchmarks/results/<日時>-<commit>.json）")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+
+    commit = git_commit()
+    payload = {
+        "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} / {os.cpu_count()} CPU",
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1)
+    print(f"💾 結果を保存しました: {output}")
+
+
+if __name__ == "__main__":
+    main()
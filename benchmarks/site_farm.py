@@ -0,0 +1,342 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from feed_formats import entries_from_items  # noqa: E402
+from feed_writer import write_feeds  # noqa: E402
+
+# ===== 合成した学会サイト群（サイトファーム） =====
+# 数百〜数千サイトでの run_all.py の振る舞いを確かめるため、手元で N 個の学会サイト風の一覧ページを作って配信し、
+# それぞれに対応するサイト設定（RSSn.py）を書き出す。一覧の形は今の学会サイトで使っているもの:
+#   table     table tr の各行に日付とリンク（RSS1 など）
+#   dl        dl の dt に日付、dd にリンク（RSS3 など）
+#   ul        ul li の中に日付の span とリンク
+#   vk_posts  WordPress の VK ブロックの投稿一覧
+#   iframe    一覧が iframe の中にある（RSS3 の jasweb.or.jp）
+# サイトは s<番号>.localhost:<ポート> で配信する（Chromium は *.localhost を 127.0.0.1 として扱うので、
+# サイトごとに別ホストとして数えられる）。遅延と障害は配信側で入れる:
+#   --latency-ms / --jitter-ms   応答ごとの遅延（一様分布）
+#   --slow-rate                  遅延が 10 倍のサイトの割合
+#   --fail-rate                  一覧ページが常に 500 を返すサイトの割合
+#   --hang-rate                  一覧ページが --hang-sec 秒応答しないサイトの割合
+#   --flaky-rate                 リクエストごとに 503 を返す確率
+#
+#   python benchmarks/site_farm.py serve --sites 200 --port 8800 --latency-ms 50 --fail-rate 0.02
+#   python benchmarks/site_farm.py generate --sites 200 --port 8800 --out /tmp/farm
+# 負荷試験は benchmarks/bench_site_farm.py から行う。
+
+PATTERNS = ("table", "dl", "ul", "vk_posts", "iframe")
+MAX_ITEMS = 10
+SLOW_FACTOR = 10
+
+# 一覧の形ごとのセレクター（各 RSSn.py と同じ名前の設定）
+SELECTORS = {
+    "table": {"SELECTOR_TITLE": "table.righttbl tr", "title_selector": "a", "title_index": 0,
+              "SELECTOR_DATE": "table.righttbl tr", "date_selector": "td.date", "date_index": 0, "units": (".", ".", "")},
+    "dl": {"SELECTOR_TITLE": "dl.news dd", "title_selector": "a", "title_index": 0,
+           "SELECTOR_DATE": "dl.news dt", "date_selector": "", "date_index": 0, "units": (".", ".", "")},
+    "ul": {"SELECTOR_TITLE": "ul.news li", "title_selector": "a", "title_index": 0,
+           "SELECTOR_DATE": "ul.news li", "date_selector": "span.date", "date_index": 0, "units": ("年", "月", "日")},
+    "vk_posts": {"SELECTOR_TITLE": "div.vk_posts div.vk_post", "title_selector": "h5 a", "title_index": 0,
+                 "SELECTOR_DATE": "div.vk_posts div.vk_post", "date_selector": "div.vk_post_date", "date_index": 0,
+                 "units": ("/", "/", "")},
+    "iframe": {"SELECTOR_TITLE": "dl dd", "title_selector": "a", "title_index": 0,
+               "SELECTOR_DATE": "dl dt", "date_selector": "", "date_index": 0, "units": (".", ".", "")},
+}
+
+TOPICS = ["学術集会のお知らせ", "演題募集を開始しました", "理事会議事録を掲載しました", "専門医更新について",
+          "会員の皆様へ", "ガイドライン改訂のお知らせ", "セミナー開催のご案内", "評議員選挙の結果"]
+
+
+class FarmSite:
+    def __init__(self, index, pattern, behavior, rows, updated):
+        self.index = index
+        self.pattern = pattern
+        self.behavior = behavior  # ok / slow / fail / hang
+        self.rows = rows
+        self.updated = updated
+
+    @property
+    def host(self):
+        return f"s{self.index}.localhost"
+
+    def items(self):
+        # 新しい順。updated の日付から1日ずつさかのぼる
+        return [
+            (f"第{self.index}学会 {TOPICS[(self.index + j) % len(TOPICS)]}（{self.rows - j}）",
+             f"/news/{self.rows - j}.html", self.updated - timedelta(days=j))
+            for j in range(self.rows)
+        ]
+
+
+class Farm:
+    def __init__(self, sites, rows=20, seed=1, latency_ms=0, jitter_ms=0, slow_rate=0.0, fail_rate=0.0,
+                 hang_rate=0.0, hang_sec=30.0, flaky_rate=0.0):
+        rng = random.Random(seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.hang_sec = hang_sec
+        self.flaky_rate = flaky_rate
+        self.rng = random.Random(seed + 1)
+        base = datetime(2026, 10, 1, tzinfo=timezone.utc)
+        self.sites = []
+        for index in range(1, sites + 1):
+            roll = rng.random()
+            if roll < fail_rate:
+                behavior = "fail"
+            elif roll < fail_rate + hang_rate:
+                behavior = "hang"
+            elif roll < fail_rate + hang_rate + slow_rate:
+                behavior = "slow"
+            else:
+                behavior = "ok"
+            self.sites.append(FarmSite(index, PATTERNS[(index - 1) % len(PATTERNS)], behavior, rows,
+                                       base - timedelta(days=rng.randint(0, 60))))
+
+    def site_for_host(self, host):
+        match = re.match(r"s(\d+)\.localhost", host or "")
+        if not match:
+            return None
+        index = int(match.group(1))
+        return self.sites[index - 1] if 1 <= index <= len(self.sites) else None
+
+    def delay_sec(self, site):
+        delay = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if site.behavior == "slow":
+            delay *= SLOW_FACTOR
+        return max(0.0, delay) / 1000
+
+
+# ----- 一覧ページの HTML -----
+def _date(site, day):
+    year_unit, month_unit, day_unit = SELECTORS[site.pattern]["units"]
+    return f"{day.year}{year_unit}{day.month:02d}{month_unit}{day.day:02d}{day_unit}"
+
+
+def list_html(site):
+    rows = []
+    for title, href, day in site.items():
+        link = f'<a href="{href}">{title}</a>'
+        date = _date(site, day)
+        if site.pattern == "table":
+            rows.append(f'<tr><td class="date">{date}</td><td>{link}</td></tr>')
+        elif site.pattern in ("dl", "iframe"):
+            rows.append(f"<dt>{date}</dt><dd>{link}</dd>")
+        elif site.pattern == "ul":
+            rows.append(f'<li><span class="date">{date}</span> {link}</li>')
+        else:
+            rows.append(f'<div class="vk_post"><div class="vk_post_date">{date}</div><h5 class="vk_post_title">{link}</h5></div>')
+    body = "".join(rows)
+    wrapped = {
+        "table": f"<table class='righttbl'>{body}</table>",
+        "dl": f"<dl class='news'>{body}</dl>",
+        "ul": f"<ul class='news'>{body}</ul>",
+        "vk_posts": f"<div class='vk_posts'>{body}</div>",
+        "iframe": f"<dl>{body}</dl>",
+    }[site.pattern]
+    return _page(f"合成学会{site.index}", wrapped)
+
+
+def _page(title, body):
+    return (f"<!DOCTYPE html><html lang='ja'><head><meta charset='utf-8'><title>{title}</title></head>"
+            f"<body><header><nav><a href='/'>トップ</a></nav></header><main>{body}</main></body></html>")
+
+
+class FarmHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        farm = self.server.farm
+        site = farm.site_for_host(self.headers.get("Host", "").split(":")[0])
+        if site is None:
+            return self._send(404, "not found")
+        time.sleep(farm.delay_sec(site))
+        if farm.flaky_rate and farm.rng.random() < farm.flaky_rate:
+            return self._send(503, "busy")
+        path = self.path.split("?")[0]
+        if path == "/":
+            if site.behavior == "fail":
+                return self._send(500, _page("Internal Server Error", "<p>error</p>"))
+            if site.behavior == "hang":
+                time.sleep(farm.hang_sec)
+            if site.pattern == "iframe":
+                return self._send(200, _page(f"合成学会{site.index}", "<iframe src='/list.html' width='600' height='400'></iframe>"))
+            return self._send(200, list_html(site))
+        if path == "/list.html" and site.pattern == "iframe":
+            return self._send(200, list_html(site))
+        if path.startswith("/news/"):
+            return self._send(200, _page("お知らせ", "<p>本文</p>"))
+        return self._send(404, "not found")
+
+    def _send(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FarmServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, farm):
+        super().__init__(address, FarmHandler)
+        self.farm = farm
+
+
+# ----- サイト設定（RSSn.py）の書き出し -----
+SITE_TEMPLATE = '''import sys
+
+from site_farm import farm_extract_items, farm_generate_rss
+from site_runner import run_standalone
+
+# 合成サイト（benchmarks/site_farm.py generate で生成。形: {pattern} / 振る舞い: {behavior}）
+BASE_URL = "http://{host}:{port}/"
+GAKKAI = "合成学会{index}"
+
+PATTERN = "{pattern}"
+SELECTOR_TITLE = "{SELECTOR_TITLE}"
+title_selector = "{title_selector}"
+title_index = {title_index}
+href_selector = "{title_selector}"
+href_index = {title_index}
+SELECTOR_DATE = "{SELECTOR_DATE}"
+date_selector = "{date_selector}"
+date_index = {date_index}
+year_unit = "{year_unit}"
+month_unit = "{month_unit}"
+day_unit = "{day_unit}"
+date_regex = rf"(\\d{{{{2,4}}}}){{year_unit}}(\\d{{{{1,2}}}}){{month_unit}}(\\d{{{{1,2}}}}){{day_unit}}"
+
+RSS_PATH = "rss_output/Feed{index}.xml"
+
+generate_rss = farm_generate_rss
+
+
+def scrape(page):
+    return farm_extract_items(page, sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    run_standalone(sys.modules[__name__])
+'''
+
+
+def write_site_configs(farm, port, directory):
+    """farm の各サイトに対応する RSSn.py を directory に書き出し、パスの一覧を返す。"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for site in farm.sites:
+        selectors = SELECTORS[site.pattern]
+        year_unit, month_unit, day_unit = selectors["units"]
+        fields = {k: v for k, v in selectors.items() if k != "units"}
+        source = SITE_TEMPLATE.format(index=site.index, host=site.host, port=port, pattern=site.pattern,
+                                      behavior=site.behavior, year_unit=year_unit, month_unit=month_unit,
+                                      day_unit=day_unit, **fields)
+        path = os.path.join(directory, f"RSS{site.index}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        paths.append(path)
+    return paths
+
+
+# ----- 合成サイト用の抽出と出力（共通の extract_items / RSS3 と同じ手順） -----
+def farm_extract_items(page, site):
+    frame = page
+    if site.PATTERN == "iframe":
+        page.wait_for_selector("iframe")
+        frame = page.locator("iframe").first.element_handle().content_frame()
+    frame.wait_for_selector(site.SELECTOR_TITLE)
+    blocks1 = frame.locator(site.SELECTOR_TITLE)
+    blocks2 = frame.locator(site.SELECTOR_DATE)
+    items = []
+    for i in range(min(blocks1.count(), MAX_ITEMS)):
+        block1 = blocks1.nth(i)
+        block2 = blocks2.nth(i)
+        link = block1.locator(site.title_selector).nth(site.title_index)
+        title = link.inner_text().strip()
+        full_link = urljoin(site.BASE_URL, link.get_attribute("href") or "")
+        date_block = block2.locator(site.date_selector).nth(site.date_index) if site.date_selector else block2
+        match = re.search(site.date_regex, date_block.inner_text().strip())
+        pub_date = None
+        if match:
+            year_str, month_str, day_str = match.groups()
+            year = int(year_str)
+            if year < 100:
+                year += 2000
+            pub_date = datetime(year, int(month_str), int(day_str), tzinfo=timezone.utc)
+        items.append({"title": title, "link": full_link, "description": title, "pub_date": pub_date})
+    return items
+
+
+def farm_generate_rss(items, output_path, BASE_URL, gakkai_name):
+    channel = {"title": f"{gakkai_name}トピックス", "link": BASE_URL, "description": f"{gakkai_name}の最新トピック情報", "language": "ja"}
+    entries = entries_from_items(items)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return write_feeds(channel, entries, output_path)
+
+
+# ----- コマンドライン -----
+def add_farm_args(parser):
+    parser.add_argument("--sites", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20, help="1サイトの一覧の行数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-sec", type=float, default=30.0)
+    parser.add_argument("--flaky-rate", type=float, default=0.0)
+
+
+def farm_from_args(args):
+    return Farm(args.sites, rows=args.rows, seed=args.seed, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                slow_rate=args.slow_rate, fail_rate=args.fail_rate, hang_rate=args.hang_rate,
+                hang_sec=args.hang_sec, flaky_rate=args.flaky_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成した学会サイト群の配信とサイト設定の生成")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="サイト群を配信する")
+    add_farm_args(serve)
+    serve.add_argument("--port", type=int, default=0)
+    generate = commands.add_parser("generate", help="サイト設定（RSSn.py）を書き出す")
+    add_farm_args(generate)
+    generate.add_argument("--port", type=int, required=True)
+    generate.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    farm = farm_from_args(args)
+    if args.command == "generate":
+        paths = write_site_configs(farm, args.port, args.out)
+        print(f"📝 サイト設定を {len(paths)} 件書き出しました: {args.out}")
+        return
+    server = FarmServer(("127.0.0.1", args.port), farm)
+    counts = {b: sum(s.behavior == b for s in farm.sites) for b in ("ok", "slow", "fail", "hang")}
+    print(f"🌱 http://s1.localhost:{server.server_address[1]}/ 〜 s{len(farm.sites)}（{counts}）", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import os
+from contextlib import contextmanager
+
+from render_profiles import FULL, context_options
+
+# ===== ブラウザのコンテキスト／ページプール =====
+# 1つの Chromium で多数のサイトを処理すると、閉じ忘れたページや重い学会ページ、
+# 長生きしたコンテキストのせいでメモリが増え続ける。そこで
+#   - 事前に温めたコンテキスト＋ページを最大 size 個まで使い回す
+#   - recycle_after 回ナビゲーションしたコンテキストは作り直す
+#   - サイト間で cookie / storage / 余分なタブを掃除する
+#   - ブラウザ子プロセスの RSS 合計が memory_limit_mb を超えたらブラウザごと再起動する
+# という方針で管理する。
+
+
+def _children_map():
+    # /proc から ppid → [pid, ...] の対応表を作る（Linux のみ。取れなければ空）
+    children = {}
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return children
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm に空白や括弧が入ることがあるので最後の ")" 以降を分割する
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(pid)
+    return children
+
+
+def _rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def descendant_pids(root_pid=None):
+    """root_pid（既定は自プロセス）の子孫プロセス ID 一覧。"""
+    children = _children_map()
+    stack = [root_pid or os.getpid()]
+    found = []
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def browser_rss_mb():
+    """自プロセス配下（Playwright ドライバと Chromium の子プロセス）の RSS 合計（MB）。"""
+    return sum(_rss_kb(pid) for pid in descendant_pids()) / 1024
+
+
+class PooledPage:
+    def __init__(self, context, page, profile=FULL):
+        self.context = context
+        self.page = page
+        self.profile = profile
+        self.navigations = 0
+
+
+class BrowserPool:
+    def __init__(self, playwright, size=2, recycle_after=20, memory_limit_mb=1024, launch_options=None, asset_cache=None):
+        self.playwright = playwright
+        self.asset_cache = asset_cache
+        self.size = size
+        self.recycle_after = recycle_after
+        self.memory_limit_mb = memory_limit_mb
+        self.launch_options = launch_options or {"headless": True}
+        self.browser = None
+        self.idle = {}  # 描画プロファイル → 空いているスロット
+        self.stats = {"jobs": 0, "contexts_created": 0, "recycled": 0, "restarts": 0, "peak_rss_mb": 0.0}
+
+    # ----- ブラウザの起動・停止 -----
+    def start(self):
+        print("▶ ブラウザを起動中...")
+        self.browser = self.playwright.chromium.launch(**self.launch_options)
+        self.idle[FULL] = [self._new_slot(FULL) for _ in range(self.size)]
+        return self
+
+    def close(self):
+        for slot in self._idle_slots():
+            self._close_slot(slot)
+        self.idle = {}
+        if self.browser is not None:
+            self.browser.close()
+            self.browser = None
+
+    def restart(self):
+        print("♻ ブラウザのメモリ使用量が上限を超えたため再起動します")
+        self.stats["restarts"] += 1
+        self.close()
+        self.start()
+
+    # ----- スロット（コンテキスト＋ページ）の管理 -----
+    def _idle_slots(self):
+        return [slot for slots in self.idle.values() for slot in slots]
+
+    def _new_slot(self, profile=FULL):
+        context = self.browser.new_context(**context_options(profile))
+        if self.asset_cache is not None:
+            self.asset_cache.attach(context)
+        self.stats["contexts_created"] += 1
+        return PooledPage(context, context.new_page(), profile)
+
+    def _close_slot(self, slot):
+        try:
+            slot.context.close()
+        except Exception:
+            pass
+
+    def _reset_slot(self, slot):
+        # 次のサイトに前のサイトの状態を持ち込まない
+        try:
+            slot.page.evaluate("() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }")
+        except Exception:
+            pass
+        for extra in slot.context.pages:
+            if extra != slot.page:
+                extra.close()
+        slot.context.clear_cookies()
+        slot.context.clear_permissions()
+        slot.page.goto("about:blank")
+
+    def _sample_memory(self):
+        rss_mb = browser_rss_mb()
+        self.stats["peak_rss_mb"] = max(self.stats["peak_rss_mb"], rss_mb)
+        return rss_mb
+
+    def _check_memory(self):
+        rss_mb = self._sample_memory()
+        if self.memory_limit_mb and rss_mb > self.memory_limit_mb:
+            self.restart()
+
+    def acquire(self, profile=FULL):
+        self._check_memory()
+        idle = self.idle.get(profile)
+        slot = idle.pop() if idle else self._new_slot(profile)
+        self.stats["jobs"] += 1
+        return slot
+
+    def release(self, slot, broken=False):
+        slot.navigations += 1
+        if broken or slot.navigations >= self.recycle_after or slot.page.is_closed():
+            self._close_slot(slot)
+            self.stats["recycled"] += 1
+            slot = self._new_slot(slot.profile)
+        else:
+            try:
+                self._reset_slot(slot)
+            except Exception:
+                self._close_slot(slot)
+                self.stats["recycled"] += 1
+                slot = self._new_slot(slot.profile)
+
+        if len(self._idle_slots()) < self.size:
+            self.idle.setdefault(slot.profile, []).append(slot)
+        else:
+            self._close_slot(slot)
+
+    @contextmanager
+    def page(self, profile=FULL):
+        """with pool.page() as page: の形で1サイト分のページを借りる。profile は描画プロファイル名。"""
+        slot = self.acquire(profile)
+        broken = False
+        try:
+            yield slot.page
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(slot, broken=broken)
+
+    def summary(self):
+        self._sample_memory()
+        s = self.stats
+        print(
+            f"🧭 ブラウザプール: ジョブ {s['jobs']} 件 / コンテキスト生成 {s['contexts_created']} 回 / "
+            f"作り直し {s['recycled']} 回 / 再起動 {s['restarts']} 回 / ピークRSS {s['peak_rss_mb']:.0f} MB"
+        )
@@ -0,0 +1,242 @@
+import argparse
+import fcntl
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from glob import glob
+
+from feed_formats import entries_from_rss, iso8601
+from feed_writer import write_bytes
+
+# ===== 記事の変更イベントログ（JSONL） =====
+# サイトのフィードを書き換えたとき、前回のフィードとの差分を1行1イベントで追記する。
+#   {"seq": 42, "ts": "...", "society": "日本アレルギー学会", "feed": "Feed3.xml",
+#    "type": "new" | "changed" | "removed", "guid": "...", "title": "...", "link": "...", "pub_date": "..."}
+# changed はタイトル（またはリンク）が書き換わったもので、old_title を持つ（要約で本文が埋まっただけなら出さない）。
+# removed は今回のフィードが覆う期間の中から消えた記事だけ。新しい記事に押し出されて古い側から落ちた
+# ものは削除ではないので出さない。
+# seq はログ全体で単調に増えるので、利用側は最後に読んだ seq（カーソル）から続きだけ読めばよい。
+#
+# ログは rss_output/changes/changes-<先頭の seq>.jsonl に SEGMENT_EVENTS 件ずつ分かれる。
+# 閉じたセグメントは (学会, GUID) ごとに最後のイベントだけ残すよう圧縮し、
+# MAX_SEGMENTS を超えた古いセグメントは削除する。削除済みの範囲を指すカーソルで読むと
+# CursorExpired になるので、その場合はフィード全体を読み直してから最新の seq で再開する。
+#
+#   python change_log.py read --cursor 120
+#   python change_log.py compact
+
+CHANGES_DIR = "rss_output/changes"
+SEGMENT_EVENTS = 5000
+MAX_SEGMENTS = 20
+
+_SEGMENT = re.compile(r"changes-(\d+)\.jsonl$")
+
+
+class CursorExpired(Exception):
+    """カーソルより後のイベントの一部が、圧縮・削除で既に残っていない。"""
+
+
+def entry_key(entry):
+    return entry["guid"] or entry["link"]
+
+
+def _pushed_out(old_entries, new):
+    # サイトのフィードは古い順に並ぶ（entries_from_items が記事一覧を逆順にする）ので、前回のフィードで
+    # 今回も残っている最も古い記事より前（古い側）にある記事のキー。日付のない記事や同じ日付の記事も
+    # 並び順で判定できる。日付があれば、今回のフィードの最も古い日付より古いものも押し出されたとみなす
+    keys = [entry_key(e) for e in old_entries]
+    kept = [i for i, key in enumerate(keys) if key in new]
+    tail = set(keys[:kept[0]] if kept else keys)
+    dates = [d for d in (iso8601(e["pub_date"]) for e in new.values()) if d]
+    if dates:
+        oldest = min(dates)
+        tail |= {entry_key(e) for e in old_entries if (iso8601(e["pub_date"]) or oldest) < oldest}
+    return tail
+
+
+def diff_entries(old_entries, new_entries):
+    """前回と今回のエントリ一覧から (種類, エントリ, 前回のエントリ or None) を今回の並び順で返す。"""
+    old = {entry_key(e): e for e in old_entries}
+    new = {entry_key(e): e for e in new_entries}
+    changes = []
+    for key, entry in new.items():
+        before = old.get(key)
+        if before is None:
+            changes.append(("new", entry, None))
+        elif (before["title"], before["link"]) != (entry["title"], entry["link"]):
+            changes.append(("changed", entry, before))
+    pushed_out = _pushed_out(old_entries, new)
+    changes.extend(("removed", entry, None) for key, entry in old.items() if key not in new and key not in pushed_out)
+    return changes
+
+
+def read_entries(path):
+    try:
+        with open(path, "rb") as f:
+            return entries_from_rss(f.read())[1]
+    except (OSError, ValueError):
+        return []
+
+
+class ChangeLog:
+    def __init__(self, directory=CHANGES_DIR, segment_events=SEGMENT_EVENTS, max_segments=MAX_SEGMENTS):
+        self.directory = directory
+        self.segment_events = segment_events
+        self.max_segments = max_segments
+
+    # ----- セグメント -----
+    def segments(self):
+        """(先頭の seq, パス) を古い順に返す。"""
+        found = []
+        for path in glob(os.path.join(self.directory, "changes-*.jsonl")):
+            match = _SEGMENT.search(path)
+            if match:
+                found.append((int(match.group(1)), path))
+        return sorted(found)
+
+    def segment_path(self, first_seq):
+        return os.path.join(self.directory, f"changes-{first_seq:012d}.jsonl")
+
+    @staticmethod
+    def _read_segment(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @contextmanager
+    def _locked(self):
+        # 単体スクリプトが並行して動いても seq が重複しないよう、追記と圧縮は排他にする
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # ----- 書き込み -----
+    def append(self, society, feed, changes):
+        """diff_entries の結果をイベントとして追記し、最後の seq を返す（変化がなければ None）。"""
+        if not changes:
+            return None
+        ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with self._locked():
+            segments = self.segments()
+            if segments:
+                first_seq, path = segments[-1]
+                events = self._read_segment(path)
+                last_seq = events[-1]["seq"] if events else first_seq - 1
+            else:
+                first_seq, path, events, last_seq = 1, self.segment_path(1), [], 0
+
+            lines = []
+            for kind, entry, before in changes:
+                last_seq += 1
+                event = {
+                    "seq": last_seq,
+                    "ts": ts,
+                    "society": society,
+                    "feed": feed,
+                    "type": kind,
+                    "guid": entry_key(entry),
+                    "title": entry["title"],
+                    "link": entry["link"],
+                    "pub_date": iso8601(entry["pub_date"]) or None,
+                }
+                if before is not None:
+                    event["old_title"] = before["title"]
+                lines.append(json.dumps(event, ensure_ascii=False))
+
+            if events and len(events) >= self.segment_events:
+                # 今のセグメントはいっぱいなので閉じて圧縮し、新しいセグメントに書く
+                self._compact(path)
+                path = self.segment_path(last_seq - len(lines) + 1)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self._rotate()
+        return last_seq
+
+    def _compact(self, path):
+        # (学会, GUID) ごとに最後のイベントだけを残す（removed も墓標として残す）
+        events = self._read_segment(path)
+        last = {}
+        for event in events:
+            last[(event["society"], event["guid"])] = event["seq"]
+        kept = [event for event in events if last[(event["society"], event["guid"])] == event["seq"]]
+        if len(kept) < len(events):
+            data = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in kept)
+            write_bytes(data.encode("utf-8"), path)
+        return len(events) - len(kept)
+
+    def _rotate(self):
+        segments = self.segments()
+        for _, path in segments[:-self.max_segments]:
+            os.remove(path)
+
+    def compact(self):
+        """閉じたセグメントをすべて圧縮する。消したイベント数を返す。"""
+        with self._locked():
+            return sum(self._compact(path) for _, path in self.segments()[:-1])
+
+    # ----- 読み出し -----
+    def read(self, cursor=0, limit=None):
+        """seq が cursor より大きいイベントを古い順に返す（limit 件まで）。"""
+        segments = self.segments()
+        if not segments:
+            return []
+        if cursor + 1 < segments[0][0]:
+            raise CursorExpired(f"seq {cursor + 1}〜{segments[0][0] - 1} は既に削除されています")
+        events = []
+        for index, (first_seq, path) in enumerate(segments):
+            # 次のセグメントがカーソルより前から始まるなら、このセグメントは読まなくてよい
+            if index + 1 < len(segments) and segments[index + 1][0] <= cursor + 1:
+                continue
+            for event in self._read_segment(path):
+                if event["seq"] > cursor:
+                    events.append(event)
+                    if limit is not None and len(events) >= limit:
+                        return events
+        return events
+
+    def last_seq(self):
+        segments = self.segments()
+        if not segments:
+            return 0
+        events = self._read_segment(segments[-1][1])
+        return events[-1]["seq"] if events else segments[-1][0] - 1
+
+
+def record_changes(society, feed_path, old_entries, log=None):
+    """フィードを書き換えた後に呼ぶ。前回のエントリとの差分を追記し、イベント数を返す。"""
+    changes = diff_entries(old_entries, read_entries(feed_path))
+    (log or ChangeLog()).append(society, os.path.basename(feed_path), changes)
+    return len(changes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="記事の変更イベントログ")
+    parser.add_argument("--dir", default=CHANGES_DIR, help="ログのディレクトリ")
+    sub = parser.add_subparsers(dest="command", required=True)
+    read = sub.add_parser("read", help="カーソルより後のイベントを表示する")
+    read.add_argument("--cursor", type=int, default=0, help="最後に読んだ seq")
+    read.add_argument("--limit", type=int)
+    sub.add_parser("compact", help="閉じたセグメントを圧縮する")
+    args = parser.parse_args(argv)
+
+    log = ChangeLog(args.dir)
+    if args.command == "compact":
+        print(f"🗜 {log.compact()} 件のイベントをまとめました")
+        return
+    try:
+        events = log.read(args.cursor, args.limit)
+    except CursorExpired as e:
+        print(f"⚠ {e}。フィード全体を読み直し、seq {log.last_seq()} から再開してください")
+        return
+    for event in events:
+        print(json.dumps(event, ensure_ascii=False))
+    print(f"⏭ 次のカーソル: {events[-1]['seq'] if events else args.cursor}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import codecs
+import re
+import time
+from urllib.parse import urlsplit
+
+from state_store import load_state, save_state
+
+# ===== 日本語の古いエンコーディングの判定と、サイトごとの判定結果のキャッシュ =====
+# plaza.umin.ac.jp や *.umin.jp、heq.jp、josteo.com などの古いページは Shift_JIS / EUC-JP で、
+# Content-Type や <meta charset> が間違っている・書かれていないことが多い。
+#   - サイト（ホスト + 先頭のパス）ごとに一度だけ判定し、確信度が CONFIDENCE_THRESHOLD 以上なら保存する
+#   - 次からは保存したエンコーディングで応答のバイト列をそのままデコードする（判定しない）
+#   - そのエンコーディングでデコードできなかったときだけ判定し直す
+# 判定は、宣言されたもの → UTF-8 → CP932 → EUC-JP → ISO-2022-JP を厳密にデコードしてみて、
+# 日本語として自然な文字（ひらがな・カタカナ・漢字・ASCII・全角記号）の割合が高いものを選ぶ。
+# 判定結果は state/charsets.json に保存する。
+
+CHARSETS_PATH = "state/charsets.json"
+CONFIDENCE_THRESHOLD = 0.9
+
+# 判定に使う先頭のバイト数（全体を何度もデコードしない）
+SAMPLE_BYTES = 64 * 1024
+
+CANDIDATES = ("utf-8", "cp932", "euc_jp", "iso2022_jp")
+
+# 宣言されがちな名前 → 実際に使う codec（Shift_JIS と書いて ①・㈱ などの機種依存文字を使うページが多い）
+ALIASES = {
+    "shift_jis": "cp932",
+    "shift-jis": "cp932",
+    "sjis": "cp932",
+    "x-sjis": "cp932",
+    "windows-31j": "cp932",
+    "ms932": "cp932",
+    "euc-jp": "euc_jp",
+    "x-euc-jp": "euc_jp",
+    "iso-2022-jp": "iso2022_jp",
+}
+
+_HEADER_CHARSET = re.compile(r"charset=[\"']?([\w.-]+)", re.I)
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w.-]+)""", re.I)
+_XML_ENCODING = re.compile(rb"""<\?xml[^>]+encoding=["']([\w.-]+)""", re.I)
+# 日本語のページとして自然な文字（ASCII・全角記号・かな・漢字・全角英数・丸数字や罫線など）。
+# 半角カナは誤ったエンコーディングでデコードしたときに大量に現れるので数えない
+_NATURAL = re.compile(r"[\t\n\r\x20-\x7e\u2010-\u2312\u2460-\u24ff\u2500-\u26ff\u3000-\u30ff\u4e00-\u9fff\uff01-\uff5e]")
+
+
+def codec_name(name):
+    """宣言されたエンコーディング名を Python の codec 名にそろえる。知らない名前なら None。"""
+    if not name:
+        return None
+    name = ALIASES.get(name.lower(), name.lower())
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def declared_charsets(body, content_type=""):
+    names = []
+    match = _HEADER_CHARSET.search(content_type or "")
+    if match:
+        names.append(match.group(1))
+    head = body[:4096]
+    for pattern in (_XML_ENCODING, _META_CHARSET):
+        match = pattern.search(head)
+        if match:
+            names.append(match.group(1).decode("ascii", "ignore"))
+    return [c for c in (codec_name(n) for n in names) if c]
+
+
+def naturalness(text):
+    if not text:
+        return 0.0
+    return len(_NATURAL.findall(text)) / len(text)
+
+
+def detect(body, content_type=""):
+    """(codec 名, 確信度) を返す。どれでもデコードできなければ (None, 0.0)。"""
+    sample = body[:SAMPLE_BYTES]
+    if body.startswith(codecs.BOM_UTF8):
+        return "utf-8", 1.0
+    truncated = len(sample) < len(body)
+    best, best_score = None, 0.0
+    for charset in dict.fromkeys(declared_charsets(body, content_type) + [codec_name(c) for c in CANDIDATES]):
+        try:
+            # サンプルの末尾で多バイト文字が切れていても失敗にしない
+            text = codecs.getincrementaldecoder(charset)().decode(sample, final=not truncated)
+        except UnicodeDecodeError:
+            continue
+        score = naturalness(text)
+        # 同点なら先に試したもの（宣言されたもの、なければ UTF-8）を選ぶ
+        if score > best_score:
+            best, best_score = charset, score
+    return best, best_score
+
+
+def site_prefix(url):
+    # plaza.umin.ac.jp のように1つのホストに複数学会が同居するので、先頭のパスまでを区切りにする
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    first = segments[0] if len(segments) > 1 or (segments and "." not in segments[0]) else ""
+    return f"{(parts.hostname or '').lower()}/{first}"
+
+
+class CharsetCache:
+    def __init__(self, path=CHARSETS_PATH, now=None):
+        self.path = path
+        self.now = now or time.time
+        self.records = load_state(path)
+        self.dirty = set()
+        self.stats = {"cached": 0, "detected": 0, "redetected": 0}
+
+    def save(self):
+        if self.dirty:
+            self.records = save_state(self.path, self.records, self.dirty)
+            self.dirty = set()
+
+    def report(self):
+        if self.stats["detected"] or self.stats["redetected"]:
+            s = self.stats
+            print(f"🔤 エンコーディング: 覚えたもので {s['cached']} 件 / 新たに判定 {s['detected']} 件 / 判定し直し {s['redetected']} 件")
+
+    def decode(self, body, url, content_type=""):
+        """応答のバイト列を文字列にする。サイトごとに覚えたエンコーディングを優先する。"""
+        key = site_prefix(url)
+        learned = (self.records.get(key) or {}).get("encoding")
+        if learned:
+            try:
+                text = str(body, learned)
+                self.stats["cached"] += 1
+                return text
+            except UnicodeDecodeError:
+                self.stats["redetected"] += 1
+        else:
+            self.stats["detected"] += 1
+
+        charset, confidence = detect(body, content_type)
+        if charset is None:
+            return str(body, "utf-8", "replace")
+        if confidence >= CONFIDENCE_THRESHOLD:
+            self.records[key] = {"encoding": charset, "confidence": round(confidence, 3), "detected": self.now()}
+            self.dirty.add(key)
+        try:
+            return str(body, charset)
+        except UnicodeDecodeError:
+            # サンプルより後ろに壊れたバイトがある
+            return str(body, charset, "replace")
+
+
+_shared_cache = None
+
+
+def charset_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = CharsetCache()
+    return _shared_cache
+
+
+def decode(body, url, content_type=""):
+    return charset_cache().decode(body, url, content_type)
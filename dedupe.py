@@ -0,0 +1,169 @@
+import hashlib
+import random
+import re
+import unicodedata
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+# ===== 学会をまたいだ重複・ほぼ重複の検出 =====
+# 共同声明や気象庁・厚労省の同じ通知が、複数学会の一覧に少しずつ違うタイトルで載る。
+#   1. タイトルとリンクを NFKC 正規化し、完全一致はハッシュでまとめる
+#   2. 残りは文字 bigram（日本語は単語区切りがないので文字単位）の MinHash を取り、
+#      LSH のバンドで候補ペアだけを絞り込んでから Jaccard 係数で確かめる
+#      「第80回」と「第81回」のように数字だけ違うものは別の記事として扱う
+# 全ペア比較をしないので、件数に対してほぼ線形に伸びる。
+# 同じ学会どうしは（トップページへのリンクを共有する別記事などがあるため）まとめない。
+# 「お知らせ」「理事会報告」のような短い・どこにでもあるタイトルは、タイトルだけでは別学会の記事と
+# 区別できないので、タイトル（完全一致・ほぼ一致とも）ではまとめず、リンクが同じときだけまとめる。
+
+NGRAM = 2
+BANDS = 16
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+JACCARD_THRESHOLD = 0.6
+
+# 1つの LSH バケットにこれ以上集まったら「よくある言い回し」とみなして候補にしない
+MAX_BUCKET = 64
+
+# タイトルでまとめるのは、正規化後にこの文字数以上で、出現が MAX_TITLE_REPEATS 件以下のものだけ
+MIN_TITLE_CHARS = 8
+MAX_TITLE_REPEATS = 3
+
+_rng = random.Random(20260819)
+_MASKS = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+
+# 先頭の【2026-08-20】のような日付ラベルや記号の揺れは比較から外す
+_LABEL = re.compile(r"^(【[^】]*】)+")
+_DIGITS = re.compile(r"\d+")
+_NOISE = re.compile(r"[\s・･、。,.!！?？「」『』()（）\[\]［］<>〈〉《》\"'“”‘’:：;；/／\-‐－―ー〜~]+")
+
+
+def normalize_title(title):
+    text = unicodedata.normalize("NFKC", title or "").strip()
+    text = _LABEL.sub("", text)
+    return _NOISE.sub("", text).lower()
+
+
+def normalize_link(link):
+    text = unicodedata.normalize("NFKC", link or "").strip()
+    if not text:
+        return ""
+    parts = urlsplit(text)
+    path = parts.path.rstrip("/") or "/"
+    # http/https と末尾スラッシュ、#以降の違いは同じ URL とみなす
+    return urlunsplit(("", parts.netloc.lower(), path, parts.query, ""))
+
+
+def shingles(text):
+    if len(text) <= NGRAM:
+        return {text} if text else set()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash64(text):
+    # 組み込みの hash は実行ごとに種が変わり、MAX_BUCKET の打ち切りなどでグループが揺れるので、
+    # 実行をまたいで同じ値になる blake2b を使う（bigram は種類が限られるのでキャッシュする）
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(shingle_hashes):
+    # 1回だけハッシュした値をマスクとの XOR で並べ替えたものの最小値を取る（C レベルの min/map で高速）
+    return [min(map(mask.__xor__, shingle_hashes)) for mask in _MASKS]
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Groups:
+    # 学会の集合を持つ union-find。同じ学会を含むグループどうしはまとめない
+    def __init__(self, sources):
+        self.parent = list(range(len(sources)))
+        self.sources = [{s} for s in sources]
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj or self.sources[ri] & self.sources[rj]:
+            return False
+        self.parent[rj] = ri
+        self.sources[ri] |= self.sources[rj]
+        return True
+
+
+def specific_titles(titles):
+    """タイトルでまとめてよい（十分に長く、ありふれていない）正規化タイトルの集合。"""
+    counts = {}
+    for title in titles:
+        counts[title] = counts.get(title, 0) + 1
+    return {title for title, count in counts.items()
+            if len(title) >= MIN_TITLE_CHARS and count <= MAX_TITLE_REPEATS}
+
+
+def find_duplicate_groups(records, threshold=JACCARD_THRESHOLD, exact_links=True):
+    """records は (source, title, link) の並び。2件以上のグループをインデックスのリストで返す。
+
+    skip させたいリンク（学会トップページなど）は空文字にして渡す。
+    """
+    groups = _Groups([source for source, _, _ in records])
+    normalized = [normalize_title(title) for _, title, _ in records]
+    specific = specific_titles(normalized)
+    # ありふれたタイトルはタイトルの比較から外す（リンクの一致だけを見る）
+    titles = [title if title in specific else "" for title in normalized]
+
+    # 1. 完全一致（正規化タイトル / 正規化リンク）
+    by_key = {}
+    for i, (_, _, link) in enumerate(records):
+        keys = [("t", titles[i])] if titles[i] else []
+        if exact_links and link:
+            keys.append(("l", normalize_link(link)))
+        for key in keys:
+            first = by_key.setdefault(key, i)
+            if first != i:
+                groups.union(first, i)
+
+    # 2. ほぼ一致（MinHash + LSH）。完全一致のタイトルは代表1件だけを調べる
+    representatives = {}
+    for i, title in enumerate(titles):
+        if title:
+            representatives.setdefault(title, i)
+    shingle_sets = {}
+    buckets = {}
+    for title, i in representatives.items():
+        sh = shingles(title)
+        shingle_sets[i] = sh
+        signature = minhash([_hash64(s) for s in sh])
+        for band in range(BANDS):
+            key = (band, tuple(signature[band * ROWS:(band + 1) * ROWS]))
+            buckets.setdefault(key, []).append(i)
+
+    digits = {i: _DIGITS.findall(titles[i]) for i in shingle_sets}
+    checked = set()
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > MAX_BUCKET:
+            continue
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                i, j = members[a], members[b]
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if digits[i] == digits[j] and jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                    groups.union(i, j)
+    # 同じタイトルの他の記事も代表と同じグループに寄せる（学会が重なるものは別のまま）
+    for i, title in enumerate(titles):
+        if title and representatives[title] != i:
+            groups.union(representatives[title], i)
+
+    clusters = {}
+    for i in range(len(records)):
+        clusters.setdefault(groups.find(i), []).append(i)
+    return [sorted(members) for members in clusters.values() if len(members) > 1]
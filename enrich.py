@@ -0,0 +1,248 @@
+import io
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from http.client import HTTPException
+
+from charset import decode
+from http_pool import shared_pool
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf が入っていない環境では PDF の要約は作らない
+    PdfReader = None
+
+# ===== 記事のリンク先（詳細ページ / PDF）から要約を作る =====
+# extract_items の description はタイトルの写しなので、新しく出てきた記事だけ
+# リンク先を取得して本文の冒頭を要約として入れる。
+#   - 前回のフィードに載っていた記事は取得しない（要約はキャッシュか前回の description を使う）
+#   - 取得結果は URL ごとに ETag / Last-Modified と一緒にキャッシュし、次に同じ URL が
+#     新しい記事として出てきたときは条件付き GET で確かめる（304 なら本文を読まない）
+#   - 同時取得数は全体で MAX_WORKERS。同じサーバーへの同時数と間隔は http_pool が守る
+# 学会トップページへのリンクや、一覧内で複数の記事が共有しているリンクは対象にしない。
+
+ENRICH_CACHE_PATH = ".cache/enrich.json"
+ENRICH_CACHE_MAX = 5000
+
+MAX_WORKERS = 6
+MAX_BYTES = 8 * 1024 * 1024
+SUMMARY_CHARS = 200
+
+# 本文として読まない要素
+_SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "template", "svg"}
+_BLOCK_TAGS = {"p", "div", "li", "dd", "dt", "td", "th", "br", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+_SPACES = re.compile(r"\s+")
+
+
+class _TextExtractor(HTMLParser):
+    # meta description と、main / article（なければ body）内の本文テキストを集める
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta_description = ""
+        self.skip_depth = 0
+        self.main_depth = 0
+        self.main_parts = []
+        self.body_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name in ("description", "og:description") and not self.meta_description:
+                self.meta_description = attrs.get("content") or ""
+        elif tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in ("main", "article") or attrs.get("id") in ("main", "content", "contents"):
+            self.main_depth += 1
+        if tag in _BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in ("main", "article") and self.main_depth:
+            self.main_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self._append(data)
+
+    def _append(self, text):
+        self.body_parts.append(text)
+        if self.main_depth:
+            self.main_parts.append(text)
+
+
+def shorten(text, limit=SUMMARY_CHARS):
+    lines = [_SPACES.sub(" ", line).strip() for line in unicodedata.normalize("NFKC", text).splitlines()]
+    text = " ".join(line for line in lines if line)
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def summarize_html(body, content_type="", title="", url=""):
+    parser = _TextExtractor()
+    # エンコーディングはサイトごとに覚えたものを使う（charset.py）
+    parser.feed(decode(body, url, content_type))
+    parser.close()
+    text = "".join(parser.main_parts) or "".join(parser.body_parts)
+    text = shorten(text, SUMMARY_CHARS * 4)
+    # 本文に記事タイトル（見出し）があれば、その後ろから要約にする。短いタイトルは誤一致するので見ない
+    heading = shorten(title)
+    if len(heading) >= 6:
+        position = text.find(heading)
+        if position >= 0:
+            text = text[position + len(heading):]
+    return shorten(text) or shorten(parser.meta_description)
+
+
+def summarize_pdf(body):
+    if PdfReader is None:
+        return ""
+    reader = PdfReader(io.BytesIO(body))
+    texts = []
+    for page in reader.pages[:2]:
+        texts.append(page.extract_text() or "")
+        if sum(len(t) for t in texts) > SUMMARY_CHARS * 2:
+            break
+    return shorten("\n".join(texts))
+
+
+def summarize(body, content_type, url, title=""):
+    if "pdf" in (content_type or "").lower() or url.lower().endswith(".pdf") or body[:5] == b"%PDF-":
+        return summarize_pdf(body)
+    return summarize_html(body, content_type, title, url)
+
+
+class EnrichCache:
+    """URL → {etag, last_modified, summary, used} の LRU（件数で上限）。"""
+
+    def __init__(self, path=ENRICH_CACHE_PATH, max_entries=ENRICH_CACHE_MAX):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, url):
+        with self.lock:
+            cached = self.entries.get(url)
+            if cached is not None:
+                cached["used"] = time.time()
+            return cached
+
+    def put(self, url, record):
+        with self.lock:
+            record["used"] = time.time()
+            self.entries[url] = record
+
+    def save(self):
+        with self.lock:
+            if len(self.entries) > self.max_entries:
+                newest = sorted(self.entries.items(), key=lambda kv: kv[1]["used"], reverse=True)
+                self.entries = dict(newest[: self.max_entries])
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def fetch(url, cached=None, pool=None):
+    """(status, body, headers) を返す。キャッシュに検証子があれば条件付き GET にする。"""
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    response = (pool or shared_pool()).get(url, headers, MAX_BYTES)
+    if response.status >= 400:
+        raise HTTPException(f"HTTP {response.status}")
+    return response.status, response.body, response.headers
+
+
+class Enricher:
+    def __init__(self, cache=None, max_workers=MAX_WORKERS, pool=None):
+        self.cache = cache if cache is not None else EnrichCache()
+        self.max_workers = max_workers
+        self.pool = pool or shared_pool()
+        self.stats = {"fetched": 0, "not_modified": 0, "reused": 0, "failed": 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def summary_for(self, url, title):
+        cached = self.cache.get(url)
+        try:
+            status, body, headers = fetch(url, cached, self.pool)
+        except (HTTPException, OSError, ValueError) as e:
+            print(f"⚠ 詳細ページの取得に失敗しました: {url} ({e})")
+            self._count("failed")
+            return cached["summary"] if cached else ""
+        if status == 304 and cached:
+            self._count("not_modified")
+            return cached["summary"]
+        try:
+            summary = summarize(body, headers.get("Content-Type", ""), url, title)
+        except Exception as e:
+            print(f"⚠ 要約の抽出に失敗しました: {url} ({e})")
+            summary = ""
+        self.cache.put(url, {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "summary": summary,
+        })
+        self._count("fetched")
+        return summary
+
+    def enrich(self, items, previous_entries, base_url):
+        """items の description を要約で置き換える（前回なかった記事だけ取得する）。"""
+        previous = {e["link"]: e["description"] for e in previous_entries if e["description"] != e["title"]}
+        previous_links = {e["link"] for e in previous_entries}
+        shared = {link for link, count in Counter(item["link"] for item in items).items() if count > 1}
+        site_root = base_url.rstrip("/")
+
+        jobs = {}
+        for item in items:
+            link = item["link"]
+            if not link or link.rstrip("/") == site_root or link in shared:
+                continue
+            if link in previous_links:
+                # 既に載っている記事は取得しない
+                self._count("reused")
+                cached = self.cache.get(link)
+                item["description"] = (cached or {}).get("summary") or previous.get(link) or item["description"]
+                continue
+            jobs[link] = item
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {link: executor.submit(self.summary_for, link, item["title"]) for link, item in jobs.items()}
+            for link, future in futures.items():
+                summary = future.result()
+                if summary:
+                    jobs[link]["description"] = summary
+        return items
+
+    def report(self):
+        s = self.stats
+        print(f"📰 要約: 取得 {s['fetched']} / 304 {s['not_modified']} / 既存 {s['reused']} / 失敗 {s['failed']}")
+
+
+def enrich_items(items, previous_entries, base_url):
+    enricher = Enricher()
+    enricher.enrich(items, previous_entries, base_url)
+    enricher.cache.save()
+    enricher.report()
+    return items
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+# ===== RSS 2.0 / Atom / JSON Feed の一括出力 =====
+# 同じエントリ一覧から3形式を1回で組み立てる。各エントリのシリアライズ結果（断片）は
+# 形式ごとにエントリのハッシュをキーとしてキャッシュし、変わっていない記事は作り直さない。
+#
+# エントリは次のキーを持つ dict：
+#   title, link, description, guid, guid_permalink (bool), pub_date (RFC 822 文字列 or "")
+# チャンネルは title, link, description, language と、任意で self_link、
+# links（RFC 5005 の prev-archive などの (rel, href) の並び）、archive（過去ページなら True）を持つ dict。
+# self_link / links の href は RSS（.xml）のものを渡し、Atom / JSON Feed では拡張子を読み替える。
+
+HISTORY_NS = "http://purl.org/syndication/history/1.0"
+
+FRAGMENT_CACHE_PATH = ".cache/feed_fragments.json"
+FRAGMENT_CACHE_MAX = 20000
+
+GENERATOR = "Gakkai feed_formats"
+FORMATS = ("rss", "atom", "json")
+EXTENSIONS = {"rss": ".xml", "atom": ".atom", "json": ".json"}
+
+
+# ----- エントリの組み立て -----
+def rfc822(dt):
+    return format_datetime(dt.astimezone(timezone.utc)) if dt else ""
+
+
+def iso8601(pub_date):
+    if not pub_date:
+        return ""
+    try:
+        dt = parsedate_to_datetime(pub_date)
+    except (TypeError, ValueError):
+        return ""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_entry(title, link, description="", guid="", guid_permalink=False, pub_date=""):
+    return {
+        "title": title or "",
+        "link": link or "",
+        "description": description or "",
+        "guid": guid or link or "",
+        "guid_permalink": bool(guid_permalink),
+        "pub_date": pub_date or "",
+    }
+
+
+def entries_from_items(items):
+    """extract_items の記事一覧からエントリ一覧を作る。
+
+    日付があれば GUID は「リンク#YYYYMMDD」（permalink ではない）、なければリンクそのもの。
+    以前の feedgen（add_entry は先頭に追加）と同じく、記事一覧とは逆の並び順で返す。
+    """
+    entries = []
+    for item in items:
+        if item["pub_date"] is not None:
+            guid_value = f"{item['link']}#{item['pub_date'].strftime('%Y%m%d')}"
+            entries.append(make_entry(item["title"], item["link"], item["description"], guid_value, False, rfc822(item["pub_date"])))
+        else:
+            entries.append(make_entry(item["title"], item["link"], item["description"], item["link"], True))
+    entries.reverse()
+    return entries
+
+
+def entries_from_rss(xml_bytes):
+    """RSS 2.0 の XML からチャンネル情報とエントリ一覧を取り出す。"""
+    channel = ET.fromstring(xml_bytes).find("channel")
+    meta = {key: (channel.findtext(key) or "").strip() for key in ("title", "link", "description", "language")}
+    entries = []
+    for item in channel.findall("item"):
+        guid = item.find("guid")
+        entries.append(make_entry(
+            item.findtext("title"),
+            item.findtext("link"),
+            item.findtext("description"),
+            guid.text if guid is not None else "",
+            guid is not None and guid.get("isPermaLink", "true") == "true",
+            (item.findtext("pubDate") or "").strip(),
+        ))
+    return meta, entries
+
+
+def entry_hash(entry):
+    canonical = json.dumps(entry, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+# ----- 断片キャッシュ -----
+class FragmentCache:
+    def __init__(self, path=FRAGMENT_CACHE_PATH, max_entries=FRAGMENT_CACHE_MAX):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        # 形式ごとの断片と、初めて出力した時刻（日付のない記事の Atom updated に使う）
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            cached["used"] = time.time()
+        else:
+            self.misses += 1
+        return cached
+
+    def put(self, key, fragments):
+        fragments["used"] = time.time()
+        self.entries[key] = fragments
+
+    def save(self):
+        if not self.path:
+            return
+        if len(self.entries) > self.max_entries:
+            newest = sorted(self.entries.items(), key=lambda kv: kv[1]["used"], reverse=True)
+            self.entries = dict(newest[: self.max_entries])
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+# ----- 形式ごとの断片 -----
+def rss_fragment(entry):
+    parts = [f"<item><title>{escape(entry['title'])}</title><link>{escape(entry['link'])}</link>"]
+    parts.append(f"<description>{escape(entry['description'])}</description>")
+    if entry["guid"]:
+        permalink = "true" if entry["guid_permalink"] else "false"
+        parts.append(f'<guid isPermaLink="{permalink}">{escape(entry["guid"])}</guid>')
+    if entry["pub_date"]:
+        parts.append(f"<pubDate>{escape(entry['pub_date'])}</pubDate>")
+    parts.append("</item>")
+    return "".join(parts)
+
+
+def atom_fragment(entry, first_seen):
+    updated = iso8601(entry["pub_date"]) or first_seen
+    return (
+        f"<entry><id>{escape(entry['guid'] or entry['link'])}</id><title>{escape(entry['title'])}</title>"
+        f"<link href={quoteattr(entry['link'])} rel=\"alternate\"/>"
+        f"<summary>{escape(entry['description'])}</summary><updated>{updated}</updated></entry>"
+    )
+
+
+def json_fragment(entry):
+    item = {"id": entry["guid"] or entry["link"], "url": entry["link"], "title": entry["title"]}
+    if entry["description"]:
+        item["content_text"] = entry["description"]
+    published = iso8601(entry["pub_date"])
+    if published:
+        item["date_published"] = published
+    return json.dumps(item, ensure_ascii=False)
+
+
+def fragments_for(entry, cache):
+    key = entry_hash(entry)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+    first_seen = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    fragments = {
+        "rss": rss_fragment(entry),
+        "atom": atom_fragment(entry, first_seen),
+        "json": json_fragment(entry),
+    }
+    if cache is not None:
+        cache.put(key, fragments)
+    return fragments
+
+
+# ----- ドキュメント全体 -----
+def render_all(channel, entries, cache=None, build_date=None):
+    """1回の走査で RSS / Atom / JSON Feed のバイト列を作る。"""
+    build_date = build_date or datetime.now(timezone.utc)
+    fragments = [fragments_for(entry, cache) for entry in entries]
+    title = escape(channel["title"])
+    link = channel["link"]
+    description = escape(channel.get("description", ""))
+    language = channel.get("language", "ja")
+    self_link = channel.get("self_link", "")
+
+    links = channel.get("links", [])
+    archive = channel.get("archive", False)
+
+    rss_self = f'<atom:link href={quoteattr(self_link)} rel="self"/>' if self_link else ""
+    rss_self += "".join(f"<atom:link href={quoteattr(href)} rel={quoteattr(rel)}/>" for rel, href in links)
+    rss_self += "<fh:archive/>" if archive else ""
+    rss_ns = f' xmlns:fh="{HISTORY_NS}"' if archive else ""
+    rss = (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        f'<rss xmlns:atom="http://www.w3.org/2005/Atom" xmlns:content="http://purl.org/rss/1.0/modules/content/"{rss_ns} version="2.0">'
+        f"<channel><title>{title}</title><link>{escape(link)}</link><description>{description}</description>{rss_self}"
+        f"<docs>http://www.rssboard.org/rss-specification</docs><generator>{GENERATOR}</generator>"
+        f"<language>{escape(language)}</language><lastBuildDate>{rfc822(build_date)}</lastBuildDate>"
+        + "".join(f["rss"] for f in fragments)
+        + "</channel></rss>"
+    )
+
+    atom_self = f'<link href={quoteattr(format_href(self_link, "atom"))} rel="self"/>' if self_link.endswith(".xml") else ""
+    atom_self += "".join(f"<link href={quoteattr(format_href(href, 'atom'))} rel={quoteattr(rel)}/>" for rel, href in links)
+    atom_self += "<fh:archive/>" if archive else ""
+    atom_ns = f' xmlns:fh="{HISTORY_NS}"' if archive else ""
+    atom = (
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        f'<feed xmlns="http://www.w3.org/2005/Atom"{atom_ns} xml:lang={quoteattr(language)}>'
+        f"<id>{escape(self_link or link)}</id><title>{title}</title><subtitle>{description}</subtitle>"
+        f"<link href={quoteattr(link)} rel=\"alternate\"/>{atom_self}"
+        f"<updated>{build_date.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}</updated>"
+        f"<generator>{GENERATOR}</generator>"
+        + "".join(f["atom"] for f in fragments)
+        + "</feed>"
+    )
+
+    head = {
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": channel["title"],
+        "home_page_url": link,
+        "description": channel.get("description", ""),
+        "language": language,
+    }
+    if self_link.endswith(".xml"):
+        head["feed_url"] = format_href(self_link, "json")
+    # JSON Feed の next_url は「より古い記事のページ」なので prev-archive を指す
+    older = [href for rel, href in links if rel == "prev-archive"]
+    if older:
+        head["next_url"] = format_href(older[0], "json")
+    head_json = json.dumps(head, ensure_ascii=False)
+    json_feed = head_json[:-1] + ', "items": [' + ", ".join(f["json"] for f in fragments) + "]}"
+
+    return {
+        "rss": rss.encode("utf-8"),
+        "atom": atom.encode("utf-8"),
+        "json": json_feed.encode("utf-8"),
+    }
+
+
+def format_href(href, fmt):
+    """RSS（.xml）の URL / パスを指定形式の拡張子に読み替える。"""
+    return href[:-4] + EXTENSIONS[fmt] if href.endswith(".xml") else href
+
+
+def sibling_paths(rss_path):
+    """FeedN.xml に対する FeedN.atom / FeedN.json のパス。"""
+    stem = rss_path[:-4] if rss_path.endswith(".xml") else rss_path
+    return {fmt: stem + ext for fmt, ext in EXTENSIONS.items()}
@@ -0,0 +1,322 @@
+import argparse
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from feed_formats import entries_from_rss, iso8601, render_all
+
+# ===== rss_output/ を配信するローカル HTTP サーバー =====
+# FeedN / combined / topics / archive の各フィードとマニフェストを、ファイルを読んだ結果を
+# メモリ上のキャッシュ（合計バイト数で上限を決めた LRU）に置いて返す。
+#   - リクエストごとに stat して mtime / サイズが変わっていたらキャッシュを捨てて読み直す
+#   - ETag / Last-Modified を付け、If-None-Match / If-Modified-Since には 304 を返す
+#   - Accept-Encoding に応じて事前圧縮済みの .br / .gz をそのまま返す
+#   - ?since=YYYY-MM-DD / ?limit=N を付けると、記事を絞り込んだフィードを組み立てて返す
+#
+#   python feed_server.py --port 8000
+
+OUTPUT_DIR = "rss_output"
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+CONTENT_TYPES = {
+    ".xml": "application/rss+xml; charset=utf-8",
+    ".atom": "application/atom+xml; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+    ".jsonl": "application/x-ndjson; charset=utf-8",
+}
+FORMAT_BY_EXT = {".xml": "rss", ".atom": "atom", ".json": "json"}
+
+# 事前圧縮ファイルの拡張子と Content-Encoding（優先順）
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def etag_for(data, suffix=""):
+    return f'"{hashlib.sha1(data).hexdigest()[:20]}{suffix}"'
+
+
+def accepted_encodings(header):
+    # "gzip, br;q=0.5, *;q=0" を {"gzip": 1.0, "br": 0.5, "*": 0.0} にする
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    # 弱い比較（W/ の有無は無視）
+    tags = [tag.strip() for tag in header.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+class _Response:
+    # キャッシュに置く1件分。variants は Content-Encoding → (本文, ETag)
+    def __init__(self, stamp, content_type, last_modified, variants):
+        self.stamp = stamp
+        self.content_type = content_type
+        self.last_modified = last_modified
+        self.variants = variants
+        self.size = sum(len(body) for body, _ in variants.values())
+
+
+class FeedCache:
+    """(パス, 絞り込み条件) → _Response の LRU。合計バイト数が max_bytes を超えたら古いものから捨てる。"""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.total = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, stamp):
+        with self.lock:
+            response = self.items.get(key)
+            if response is None or response.stamp != stamp:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.total -= old.size
+            if response.size > self.max_bytes:
+                return
+            self.items[key] = response
+            self.total += response.size
+            while self.total > self.max_bytes:
+                _, evicted = self.items.popitem(last=False)
+                self.total -= evicted.size
+
+
+def file_stamp(path):
+    # 圧縮版も含めた (mtime, サイズ) の組。どれかが書き換わればキャッシュを捨てる
+    stamp = []
+    for p in (path, path + ".gz", path + ".br"):
+        try:
+            st = os.stat(p)
+        except OSError:
+            stamp.append(None)
+            continue
+        stamp.append((st.st_mtime_ns, st.st_size))
+    return tuple(stamp)
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_static(path, stamp):
+    data = read_file(path)
+    etag = etag_for(data)
+    variants = {"identity": (data, etag)}
+    for encoding, suffix in ENCODINGS:
+        if os.path.exists(path + suffix):
+            # 圧縮版ごとに ETag を分ける（同じ ETag で別の表現を返さないように）
+            variants[encoding] = (read_file(path + suffix), etag[:-1] + f"-{encoding}" + '"')
+    ext = os.path.splitext(path)[1]
+    mtime = os.stat(path).st_mtime
+    return _Response(stamp, CONTENT_TYPES.get(ext, "application/octet-stream"), mtime, variants)
+
+
+def load_filtered(path, stamp, since, limit):
+    # 記事の並びと中身は RSS（.xml）を正とし、要求された形式で組み立て直す
+    stem, ext = os.path.splitext(path)
+    rss_path = stem + ".xml"
+    mtime = os.stat(rss_path).st_mtime
+    channel, entries = entries_from_rss(read_file(rss_path))
+    if since:
+        entries = [e for e in entries if iso8601(e["pub_date"]) >= since]
+    if limit is not None:
+        entries = entries[:limit]
+    build_date = datetime.fromtimestamp(mtime, timezone.utc)
+    body = render_all(channel, entries, build_date=build_date)[FORMAT_BY_EXT[ext]]
+    etag = etag_for(body)
+    variants = {
+        "identity": (body, etag),
+        "gzip": (gzip.compress(body, compresslevel=6, mtime=0), etag[:-1] + '-gzip"'),
+    }
+    return _Response(stamp, CONTENT_TYPES[ext], mtime, variants)
+
+
+def parse_query(query):
+    """?since= / ?limit= を (since の ISO 文字列 or None, limit or None) にする。不正なら ValueError。"""
+    params = parse_qs(query)
+    since = params.get("since", [None])[-1]
+    limit = params.get("limit", [None])[-1]
+    if since:
+        since = datetime.strptime(since[:10], "%Y-%m-%d").strftime("%Y-%m-%dT00:00:00Z")
+    if limit is not None:
+        limit = int(limit)
+        if limit < 0:
+            raise ValueError("limit must not be negative")
+    return since or None, limit
+
+
+class FeedRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "GakkaiFeedServer"
+    # ヘッダーと本文を別々に送るので、小さい応答が Nagle + 遅延 ACK で 40ms 待たされないように
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self.handle_feed(send_body=False)
+
+    def do_GET(self):
+        self.handle_feed(send_body=True)
+
+    def handle_feed(self, send_body):
+        url = urlsplit(self.path)
+        path = self.resolve(unquote(url.path))
+        if path is None:
+            return self.send_plain(404, "not found")
+        try:
+            since, limit = parse_query(url.query)
+        except ValueError:
+            return self.send_plain(400, "invalid since / limit")
+        filtered = since is not None or limit is not None
+        stem, ext = os.path.splitext(path)
+        if filtered and ext not in FORMAT_BY_EXT:
+            return self.send_plain(400, "since / limit are only supported for feeds")
+
+        # 絞り込み結果は RSS から組み立てるので、RSS の更新でキャッシュを捨てる
+        stamp = file_stamp(stem + ".xml" if filtered else path)
+        if stamp[0] is None:
+            return self.send_plain(404, "not found")
+
+        key = (path, since, limit)
+        cache = self.server.cache
+        response = cache.get(key, stamp)
+        if response is None:
+            try:
+                if filtered:
+                    response = load_filtered(path, stamp, since, limit)
+                else:
+                    response = load_static(path, stamp)
+            except FileNotFoundError:
+                return self.send_plain(404, "not found")
+            cache.put(key, response)
+
+        encoding = self.choose_encoding(response)
+        body, etag = response.variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(response.last_modified, usegmt=True),
+            "Cache-Control": "public, max-age=60",
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(etag, response.last_modified):
+            return self.send(304, headers, b"", send_body)
+        headers["Content-Type"] = response.content_type
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        self.send(200, headers, body, send_body)
+
+    def resolve(self, url_path):
+        # rss_output/ の外を指すパスやディレクトリは配信しない
+        root = self.server.root
+        path = os.path.realpath(os.path.join(root, url_path.lstrip("/")))
+        if not path.startswith(root + os.sep) or os.path.isdir(path):
+            return None
+        if path.endswith((".gz", ".br", ".tmp")) or os.path.basename(path).startswith("."):
+            return None  # 事前圧縮版・書きかけの一時ファイル・ロックファイルは直接配信しない
+        return path
+
+    def choose_encoding(self, response):
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = "identity", 0.0
+        for encoding, _ in ENCODINGS:
+            q = accepted.get(encoding, wildcard)
+            if encoding in response.variants and q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def not_modified(self, etag, last_modified):
+        # If-None-Match があればそちらを優先し、If-Modified-Since は見ない（RFC 9110）
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(last_modified) <= since
+        return False
+
+    def send_plain(self, status, message):
+        self.send(status, {"Content-Type": "text/plain; charset=utf-8"}, message.encode("utf-8"),
+                  self.command != "HEAD")
+
+    def send(self, status, headers, body, send_body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+
+class FeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, root=OUTPUT_DIR, cache_max_bytes=CACHE_MAX_BYTES, quiet=False):
+        super().__init__(address, FeedRequestHandler)
+        self.root = os.path.realpath(root)
+        self.cache = FeedCache(cache_max_bytes)
+        self.quiet = quiet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="rss_output/ のフィードをローカルで配信する")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--root", default=OUTPUT_DIR, help="配信するディレクトリ")
+    parser.add_argument("--cache-mb", type=int, default=CACHE_MAX_BYTES // (1024 * 1024), help="メモリキャッシュの上限（MB）")
+    parser.add_argument("--quiet", action="store_true", help="アクセスログを出さない")
+    args = parser.parse_args(argv)
+
+    server = FeedServer((args.host, args.port), args.root, args.cache_mb * 1024 * 1024, args.quiet)
+    print(f"🌐 http://{args.host}:{server.server_address[1]}/combined.xml で配信中（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
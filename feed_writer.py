@@ -0,0 +1,233 @@
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+
+from feed_formats import FragmentCache, entries_from_items, iso8601, render_all, sibling_paths
+
+try:
+    import brotli
+except ImportError:  # brotli が入っていない環境では gzip だけを作る
+    brotli = None
+
+# ===== 変更検知つきフィード書き込み =====
+# lastBuildDate は毎回変わるため比較から除外し、チャンネル情報と item の中身だけで
+# 正規化ハッシュを作る。内容が同じならファイル（と mtime）には一切触れない。
+
+# ハッシュ対象にするチャンネル直下の要素
+CHANNEL_KEYS = ("title", "link", "description", "language")
+
+# 配信用の事前圧縮ファイルと、ポーリング用のマニフェスト
+MANIFEST_NAME = "manifest.json"
+MANIFEST_LOCK_NAME = ".manifest.lock"
+
+_fragment_cache = None
+_brotli_warned = False
+
+# mkstemp の一時ファイルは 0600 で作られ、os.replace でもそのまま残るので、
+# 通常の open と同じく umask を反映した 0644 に直してから置き換える
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o644 & ~_UMASK
+
+
+def _element_record(elem):
+    # 子要素を (タグ, 属性, テキスト) の並びに正規化する
+    return [
+        [child.tag, sorted(child.attrib.items()), (child.text or "").strip()]
+        for child in elem
+    ]
+
+
+def feed_digest(xml_bytes):
+    """RSS の XML からチャンネル情報と item 一覧の正規化ハッシュを返す。解析できなければ None。"""
+    try:
+        root = ET.fromstring(xml_bytes)
+    except ET.ParseError:
+        return None
+    channel = root.find("channel")
+    if channel is None:
+        return None
+
+    record = {
+        "channel": {key: (channel.findtext(key) or "").strip() for key in CHANNEL_KEYS},
+        "items": [_element_record(item) for item in channel.findall("item")],
+    }
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_digest(path):
+    """既存フィードファイルの正規化ハッシュ。存在しない・壊れている場合は None。"""
+    try:
+        with open(path, "rb") as f:
+            return feed_digest(f.read())
+    except OSError:
+        return None
+
+
+def temp_path_for(output_path):
+    # 同じディレクトリに一時ファイルを作る（os.replace を同一ファイルシステム内で行うため）
+    directory = os.path.dirname(output_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(output_path)}.", suffix=".tmp", dir=directory
+    )
+    os.close(fd)
+    return tmp_path
+
+
+def write_bytes(data, output_path):
+    # 一時ファイルに書いてから置き換える（読み手が書きかけのファイルを見ないように）
+    tmp_path = temp_path_for(output_path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_if_changed(xml_bytes, output_path):
+    """XML バイト列を変化がある場合のみアトミックに書き込む。更新したら True。"""
+    new_digest = feed_digest(xml_bytes)
+    if new_digest is not None and new_digest == file_digest(output_path):
+        return False
+    write_bytes(xml_bytes, output_path)
+    return True
+
+
+def write_compressed(path, force=False):
+    """FeedN.xml.gz / FeedN.xml.br を書き込む。force でなければ欠けているものだけ作る。
+
+    圧縮元は実際にディスクにある内容を使う（RSS を書かなかった場合も食い違わないように）。
+    """
+    global _brotli_warned
+    compressors = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors[".br"] = lambda data: brotli.compress(data, quality=11)
+    elif not _brotli_warned:
+        _brotli_warned = True
+        print("⚠ brotli が入っていないため .br は作りません（pip install brotli で有効になります）")
+    missing = {suffix: c for suffix, c in compressors.items() if force or not os.path.exists(path + suffix)}
+    if not missing:
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    for suffix, compress in missing.items():
+        write_bytes(compress(data), path + suffix)
+
+
+def variant_sizes(path):
+    return {
+        os.path.basename(p): os.path.getsize(p)
+        for p in (path, path + ".gz", path + ".br")
+        if os.path.exists(p)
+    }
+
+
+@contextmanager
+def _manifest_locked(directory):
+    # 単体スクリプトが並行して動いても他のフィードの行を消さないよう、読み直し〜書き込みは排他にする
+    with open(os.path.join(directory, MANIFEST_LOCK_NAME), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def update_manifest(output_path, rss_bytes, entries, paths):
+    """rss_output/manifest.json の該当フィードの行を更新する。内容が変わらなければ書き込まない。"""
+    directory = os.path.dirname(output_path) or "."
+    with _manifest_locked(directory):
+        return _update_manifest(os.path.join(directory, MANIFEST_NAME), output_path, rss_bytes, entries, paths)
+
+
+def _update_manifest(manifest_path, output_path, rss_bytes, entries, paths):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {"feeds": {}}
+
+    dates = [d for d in (iso8601(entry["pub_date"]) for entry in entries) if d]
+    record = {
+        "hash": feed_digest(rss_bytes),
+        "items": len(entries),
+        "newest_pub_date": max(dates) if dates else None,
+        "bytes": os.path.getsize(output_path),
+        "files": {},
+    }
+    for path in paths.values():
+        record["files"].update(variant_sizes(path))
+
+    name = os.path.basename(output_path)
+    if manifest["feeds"].get(name) == record:
+        return False
+    manifest["feeds"][name] = record
+    write_bytes(
+        json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode("utf-8"),
+        manifest_path,
+    )
+    return True
+
+
+def fragment_cache():
+    global _fragment_cache
+    if _fragment_cache is None:
+        _fragment_cache = FragmentCache()
+    return _fragment_cache
+
+
+def write_feeds(channel, entries, output_path):
+    """RSS / Atom / JSON Feed を1回で組み立て、RSS の内容に変化があるときだけ書き込む。
+
+    断片キャッシュはここでは保存しない（実行の最後に fragment_cache().save() を1回呼ぶ）。
+
+    Atom と JSON Feed、それぞれの gzip / brotli 版は RSS が更新されたとき、
+    またはまだ存在しないときに書き込み、最後に manifest.json の行を更新する。
+    RSS を更新したら True。
+    """
+    cache = fragment_cache()
+    outputs = render_all(channel, entries, cache)
+    paths = sibling_paths(output_path)
+    updated = write_if_changed(outputs["rss"], output_path)
+    for fmt, path in paths.items():
+        if fmt != "rss" and (updated or not os.path.exists(path)):
+            write_bytes(outputs[fmt], path)
+        write_compressed(path, force=updated)
+    update_manifest(output_path, outputs["rss"], entries, paths)
+    report(output_path, updated)
+    return updated
+
+
+def generate_rss(items, output_path, BASE_URL, gakkai_name):
+    """extract_items の記事一覧から3形式を組み立て、変化があるときだけ書き込む。
+
+    チャンネル情報と GUID・pubDate の付け方は共通の generate_rss と同じ
+    （日付があれば「リンク#YYYYMMDD」、なければリンクそのものを permalink の GUID にする）。
+    """
+    channel = {
+        "title": f"{gakkai_name}トピックス",
+        "link": BASE_URL,
+        "description": f"{gakkai_name}の最新トピック情報",
+        "language": "ja",
+    }
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    return write_feeds(channel, entries_from_items(items), output_path)
+
+
+def report(output_path, updated):
+    if updated:
+        print(f"📝 フィードを更新しました: {output_path}")
+    else:
+        print(f"⏭ 変更なしのため書き込みをスキップ: {output_path}")
@@ -0,0 +1,197 @@
+import http.client
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+from charset import decode
+
+# ===== ホスト単位の接続プールと礼儀正しいアクセス間隔 =====
+# 詳細ページ・事前チェックなどブラウザを使わない取得は、すべてこのプールを通す。
+#   - 同じサーバーへの同時リクエスト数を PER_HOST_CONNECTIONS までに抑える
+#   - 同じサーバーへのリクエスト開始間隔を MIN_INTERVAL_SEC 以上空ける
+#   - keep-alive の接続をホストごとに使い回す（TLS ハンドシェイクを毎回しない）
+#   - 429 / 503 の Retry-After が来たらそのサーバーへの次のリクエストを遅らせる
+# plaza.umin.ac.jp（RSS13 / RSS18）や *.umin.jp のように同じ運営元のホストは
+# HOST_GROUPS で1つのサーバーとして扱う。
+
+PER_HOST_CONNECTIONS = 2
+MIN_INTERVAL_SEC = 1.0
+TIMEOUT_SEC = 20
+IDLE_TIMEOUT_SEC = 30
+MAX_REDIRECTS = 5
+MAX_RETRY_AFTER_SEC = 60
+
+USER_AGENT = "Mozilla/5.0 (compatible; GakkaiRSS/1.0)"
+
+# ドメインの末尾 → サーバーのグループ名
+HOST_GROUPS = {
+    "umin.ac.jp": "umin",
+    "umin.jp": "umin",
+}
+
+_RETRYABLE = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+
+def host_group(host):
+    host = (host or "").lower().split(":")[0]
+    for suffix, group in HOST_GROUPS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return group
+    return host
+
+
+class Response:
+    def __init__(self, status, headers, body, url):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    def text(self):
+        # サイトごとに覚えたエンコーディングでデコードする（charset.py）
+        return decode(self.body, self.url, self.headers.get("Content-Type", ""))
+
+
+class _Host:
+    def __init__(self, limit):
+        self.semaphore = threading.BoundedSemaphore(limit)
+        self.lock = threading.Lock()
+        self.idle = []  # (scheme, netloc, 接続, 最後に使った時刻)
+        self.next_start = 0.0
+        self.stats = {"requests": 0, "connections": 0, "reused": 0, "wait_sec": 0.0}
+
+
+class HttpPool:
+    def __init__(self, per_host=PER_HOST_CONNECTIONS, min_interval=MIN_INTERVAL_SEC, timeout=TIMEOUT_SEC):
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def _host(self, group):
+        with self.lock:
+            if group not in self.hosts:
+                self.hosts[group] = _Host(self.per_host)
+            return self.hosts[group]
+
+    def _wait_turn(self, host):
+        # 開始時刻の枠を予約してから、その時刻まで待つ（ロックを持ったまま眠らない）
+        with host.lock:
+            now = time.monotonic()
+            start = max(now, host.next_start)
+            host.next_start = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+        return start - now
+
+    def _checkout(self, host, scheme, netloc):
+        with host.lock:
+            now = time.monotonic()
+            for i, (s, n, conn, used) in enumerate(host.idle):
+                if (s, n) == (scheme, netloc) and now - used < IDLE_TIMEOUT_SEC:
+                    del host.idle[i]
+                    host.stats["reused"] += 1
+                    return conn, True
+            host.stats["connections"] += 1
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout), False
+
+    def _checkin(self, host, scheme, netloc, conn):
+        with host.lock:
+            now = time.monotonic()
+            expired = [c for _, _, c, used in host.idle if now - used >= IDLE_TIMEOUT_SEC]
+            host.idle = [entry for entry in host.idle if now - entry[3] < IDLE_TIMEOUT_SEC]
+            host.idle.append((scheme, netloc, conn, now))
+        for c in expired:
+            c.close()
+
+    def _send(self, host, method, url, headers, max_bytes):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        conn, reused = self._checkout(host, parts.scheme, parts.netloc)
+        try:
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+        except _RETRYABLE:
+            conn.close()
+            if not reused:
+                raise
+            # 使い回した接続がサーバー側で切られていたら、新しい接続で1回だけやり直す
+            conn, _ = self._checkout(host, parts.scheme, parts.netloc)
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+        body = response.read(max_bytes) if max_bytes else response.read()
+        if response.will_close or not response.isclosed():
+            # 途中までしか読んでいない・サーバーが閉じる応答の接続は使い回さない
+            conn.close()
+        else:
+            self._checkin(host, parts.scheme, parts.netloc, conn)
+        return response.status, response.headers, body
+
+    def request(self, method, url, headers=None, max_bytes=None):
+        """url に method でリクエストし、リダイレクトを辿った Response を返す。"""
+        headers = dict({"User-Agent": USER_AGENT}, **(headers or {}))
+        for _ in range(MAX_REDIRECTS + 1):
+            host = self._host(host_group(urlsplit(url).hostname))
+            started = time.monotonic()
+            with host.semaphore:
+                self._wait_turn(host)
+                waited = time.monotonic() - started
+                status, response_headers, body = self._send(host, method, url, headers, max_bytes)
+            with host.lock:
+                host.stats["requests"] += 1
+                host.stats["wait_sec"] += waited
+                if status in (429, 503):
+                    self._back_off(host, response_headers.get("Retry-After"))
+            location = response_headers.get("Location")
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                if status == 303:
+                    method = "GET"
+                continue
+            return Response(status, response_headers, body, url)
+        raise http.client.HTTPException(f"too many redirects: {url}")
+
+    def _back_off(self, host, retry_after):
+        try:
+            delay = min(float(retry_after), MAX_RETRY_AFTER_SEC)
+        except (TypeError, ValueError):
+            delay = self.min_interval * 5
+        host.next_start = max(host.next_start, time.monotonic() + delay)
+
+    def get(self, url, headers=None, max_bytes=None):
+        return self.request("GET", url, headers, max_bytes)
+
+    def close(self):
+        with self.lock:
+            hosts = list(self.hosts.values())
+        for host in hosts:
+            with host.lock:
+                idle, host.idle = host.idle, []
+            for _, _, conn, _ in idle:
+                conn.close()
+
+    def report(self):
+        if not self.hosts:
+            return
+        print("🔌 ホスト別のリクエスト（接続の使い回し / 待ち時間）:")
+        for group, host in sorted(self.hosts.items()):
+            s = host.stats
+            print(f"  - {group}: {s['requests']} 件 / 新規接続 {s['connections']}・再利用 {s['reused']} / 待ち {s['wait_sec']:.1f} 秒")
+
+
+_shared_pool = None
+
+
+def shared_pool():
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = HttpPool()
+    return _shared_pool
+
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from browser_pool import descendant_pids
+from state_store import load_state, save_state
+
+# ===== サイトごとのピークメモリ（Python ＋ Chromium の子プロセス） =====
+# 小さな CI ランナーでメモリが足りなくなったときに、どの学会ページが重いのかを分かるようにする。
+#   - サイトの処理中、SAMPLE_SEC ごとに Python プロセスと子孫プロセス（Playwright ドライバ・Chromium）の
+#     RSS / PSS を測る（PSS は /proc/<pid>/smaps_rollup。読めなければ RSS で代用）
+#   - ピークをサイトと段階（native / navigate / extract / publish）ごとに記録する
+#   - ページを読み込んだ時点の DOM ノード数と転送バイト数、段階ごとの所要時間も一緒に記録する
+# サイトの RSSn.py に MEMORY_BUDGET_MB を書くと、その値を超えたサイトを報告で目立たせる。
+# 書いていなくても、直近のピークの中央値の REGRESSION_FACTOR 倍を超えたら増加として報告する。
+# 履歴は state/site_memory.json に保存する。
+
+MEMORY_PATH = "state/site_memory.json"
+SAMPLE_SEC = 0.2
+HISTORY_SIZE = 20
+REGRESSION_FACTOR = 1.5
+
+# ページ内で数える DOM ノード数と、ナビゲーション＋サブリソースの転送バイト数
+PAGE_METRICS_SCRIPT = """() => {
+  const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+  return {
+    dom_nodes: document.getElementsByTagName('*').length,
+    transferred_bytes: entries.reduce((sum, e) => sum + (e.transferSize || 0), 0),
+  };
+}"""
+
+_active = None
+
+
+def process_memory_kb(pid):
+    """(RSS, PSS) を kB で返す。プロセスが無ければ (0, 0)。"""
+    rss = 0
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                    break
+    except OSError:
+        return 0, 0
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return rss, int(line.split()[1])
+    except OSError:
+        pass
+    return rss, rss
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else None
+
+
+class MemoryWatch:
+    def __init__(self, path=MEMORY_PATH, interval=SAMPLE_SEC):
+        self.path = path
+        self.interval = interval
+        self.records = load_state(path)
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.key = None
+        self.stage_name = None
+        self.run = {}  # サイト → 今回の段階ごとのピークとページの指標
+
+    def save(self):
+        self.records = save_state(self.path, self.records, self.dirty)
+
+    # ----- 測定 -----
+    def start(self):
+        global _active
+        _active = self
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        python_rss, python_pss = process_memory_kb(os.getpid())
+        browser_rss = browser_pss = 0
+        for pid in descendant_pids():
+            rss, pss = process_memory_kb(pid)
+            browser_rss += rss
+            browser_pss += pss
+        with self.lock:
+            if self.key is None:
+                return
+            peaks = self.run[self.key]["stages"].setdefault(self.stage_name, {})
+            for name, kb in (("python_rss", python_rss), ("python_pss", python_pss),
+                             ("browser_rss", browser_rss), ("browser_pss", browser_pss),
+                             ("total_pss", python_pss + browser_pss)):
+                peaks[name] = max(peaks.get(name, 0), kb)
+
+    @contextmanager
+    def site(self, key, budget_mb=None):
+        """with の間に測った値を key のサイトの分として記録する。"""
+        with self.lock:
+            self.key = key
+            self.stage_name = "setup"
+            self.run[key] = {"stages": {}, "stage_sec": {}, "budget_mb": budget_mb}
+        self.sample()
+        try:
+            yield
+        finally:
+            self.sample()
+            with self.lock:
+                self.key = None
+            self._finish(key)
+
+    @contextmanager
+    def stage(self, name):
+        with self.lock:
+            previous, self.stage_name = self.stage_name, name
+            key = self.key
+        self.sample()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.sample()
+            with self.lock:
+                self.stage_name = previous
+                if key is not None:
+                    stage_sec = self.run[key]["stage_sec"]
+                    stage_sec[name] = stage_sec.get(name, 0.0) + elapsed
+
+    def page_metrics(self, dom_nodes, transferred_bytes):
+        with self.lock:
+            if self.key is not None:
+                self.run[self.key].update(dom_nodes=dom_nodes, transferred_bytes=transferred_bytes)
+
+    def _finish(self, key):
+        result = self.run[key]
+        stages = result["stages"]
+        if not stages:
+            return
+        peak_stage = max(stages, key=lambda s: stages[s]["total_pss"])
+        result["peak_mb"] = stages[peak_stage]["total_pss"] / 1024
+        result["peak_stage"] = peak_stage
+        rec = self.records.setdefault(key, {"peaks_mb": []})
+        previous = _median(rec["peaks_mb"])
+        result["regressed"] = previous is not None and result["peak_mb"] > previous * REGRESSION_FACTOR
+        result["previous_mb"] = previous
+        rec["peaks_mb"] = (rec["peaks_mb"] + [round(result["peak_mb"], 1)])[-HISTORY_SIZE:]
+        rec["last"] = {
+            "peak_stage": peak_stage,
+            "stages": {name: {k: round(v / 1024, 1) for k, v in peaks.items()} for name, peaks in stages.items()},
+            "dom_nodes": result.get("dom_nodes"),
+            "transferred_bytes": result.get("transferred_bytes"),
+            "checked": time.time(),
+        }
+        self.dirty.add(key)
+
+    # ----- 報告 -----
+    def report(self, limit=10):
+        measured = [(key, r) for key, r in self.run.items() if "peak_mb" in r]
+        if not measured:
+            return
+        measured.sort(key=lambda kv: kv[1]["peak_mb"], reverse=True)
+        print("🧠 サイトごとのピークメモリ（PSS 合計 / 段階 / Python / ブラウザ / DOM ノード / 転送量）:")
+        for key, r in measured[:limit]:
+            peak = r["stages"][r["peak_stage"]]
+            dom = r.get("dom_nodes")
+            transferred = r.get("transferred_bytes")
+            marks = []
+            if r["budget_mb"] and r["peak_mb"] > r["budget_mb"]:
+                marks.append(f"⚠ 予算 {r['budget_mb']} MB 超過")
+            if r["regressed"]:
+                marks.append(f"⚠ 増加（中央値 {r['previous_mb']:.0f} MB）")
+            print(
+                f"  - {key}: {r['peak_mb']:.0f} MB / {r['peak_stage']} / {peak['python_pss'] / 1024:.0f} MB / "
+                f"{peak['browser_pss'] / 1024:.0f} MB / {dom if dom is not None else '-'} / "
+                f"{f'{transferred / 1024:.0f} KB' if transferred is not None else '-'}"
+                + (f"  {' '.join(marks)}" if marks else "")
+            )
+        flagged = [key for key, r in measured[limit:] if r["regressed"] or (r["budget_mb"] and r["peak_mb"] > r["budget_mb"])]
+        if flagged:
+            print(f"  ⚠ ほかに予算超過・増加のあったサイト: {', '.join(flagged)}")
+
+
+@contextmanager
+def stage(name):
+    """測定中なら、with の間の値を name の段階の分として記録する（測定していなければ何もしない）。"""
+    watch = _active
+    if watch is None:
+        yield
+        return
+    with watch.stage(name):
+        yield
+
+
+def note_page(page):
+    # 読み込んだページの DOM ノード数と転送バイト数を記録する（取れなくても処理は続ける）
+    watch = _active
+    if watch is None:
+        return
+    try:
+        metrics = page.evaluate(PAGE_METRICS_SCRIPT)
+        watch.page_metrics(metrics["dom_nodes"], metrics["transferred_bytes"])
+    except Exception:
+        pass
@@ -1,46 +1,205 @@
+import os
+import re
+from datetime import datetime, timedelta, timezone
 from glob import glob
 import feedparser
-from feedgen.feed import FeedGenerator
-
-# RSSフィード生成器の初期設定
-fg = FeedGenerator()
-fg.title('学会RSS統合')
-fg.link(href='https://example.com/rss_output/combined.xml', rel='self')
-fg.description('複数フィードを統合したマスターRSS')
-fg.language('ja')
-fg.generator("python-feedgen")
-fg.docs("http://www.rssboard.org/rss-specification")
-
-# 各フィードファイルを走査
-for xml_file in glob('rss_output/*.xml'):
-    if 'combined' in xml_file:
-        continue  # 統合先自身を除外
-
-    d = feedparser.parse(xml_file)
-
-    # タイトルから学会名を抽出
-    feed_title = d.feed.get("title", "")
-    if feed_title.endswith("トピックス"):
-        source = feed_title.replace("トピックス", "").strip()
-    else:
-        source = feed_title.strip() or "出典不明"
-
-    for entry in d.entries:
-        fe = fg.add_entry()
-        fe.title(f"【{source}】{entry.title}")
-        fe.link(href=entry.link)
-        fe.description(entry.get("summary", ""))
-
-        # pubDate はそのまま文字列として出力（解析なし）
-        pub_str = entry.get("published", "")
-        if pub_str:
-            fe.pubDate(pub_str)
-
-        # GUID は entry.guid または entry.link を使用
-        guid = entry.get("guid") or entry.get("link")
-        if guid:
-            fe.guid(guid.strip(), permalink=False)
-
-# 出力
-fg.rss_file('rss_output/combined.xml')
-print("✅ 統合RSS生成完了: rss_output/combined.xml")
+from dedupe import find_duplicate_groups
+from feed_formats import entries_from_rss, iso8601, make_entry
+from feed_writer import fragment_cache, write_feeds
+from state_store import load_state, replace_state
+from topic_feeds import write_topic_feeds
+
+# ===== 統合フィード（RFC 5005 形式のページ分割つき） =====
+# combined.xml は「現在のウィンドウ」だけを持つ先頭ページ。
+#   - いずれかの FeedN.xml に載っている記事は常に先頭ページに残す
+#   - それ以外は新しい順に WINDOW_ITEMS 件以内かつ WINDOW_DAYS 日以内なら残す
+#   - ウィンドウから外れた記事が ARCHIVE_PAGE_SIZE 件たまったら、古い順に
+#     archive/combined-0001.xml, 0002, ... へ書き出す
+# アーカイブページは一度書いたら二度と作り直さないので、毎回書き換わるのは先頭ページだけ。
+# 先頭ページの件数は WINDOW_ITEMS + ARCHIVE_PAGE_SIZE 程度で頭打ちになる。
+# 複数の学会に載った同じお知らせは dedupe で1件にまとめる。
+
+OUTPUT_DIR = 'rss_output'
+COMBINED_PATH = 'rss_output/combined.xml'
+ARCHIVE_DIR = 'rss_output/archive'
+FEED_BASE_URL = 'https://example.com/rss_output/'
+
+WINDOW_ITEMS = 200
+WINDOW_DAYS = 30
+ARCHIVE_PAGE_SIZE = 100
+
+# 日付のない記事の並び順に使う「初めて見た時刻」（先頭ページの記事分だけ保持）
+FIRST_SEEN_PATH = 'state/combined_first_seen.json'
+
+# 統合フィードのチャンネル情報
+CHANNEL = {
+    "title": '学会RSS統合',
+    "link": 'https://example.com/rss_output/combined.xml',
+    "self_link": 'https://example.com/rss_output/combined.xml',
+    "description": '複数フィードを統合したマスターRSS',
+    "language": 'ja',
+}
+
+
+def collect_live_entries():
+    # entries と同じ並びで (学会名, 元のタイトル, 重複判定に使うリンク) を返す
+    entries = []
+    records = []
+
+    # 各フィードファイルを走査
+    for xml_file in glob(f'{OUTPUT_DIR}/*.xml'):
+        if 'combined' in xml_file:
+            continue  # 統合先自身を除外
+
+        d = feedparser.parse(xml_file)
+
+        # タイトルから学会名を抽出
+        feed_title = d.feed.get("title", "")
+        if feed_title.endswith("トピックス"):
+            source = feed_title.replace("トピックス", "").strip()
+        else:
+            source = feed_title.strip() or "出典不明"
+        # 学会トップページへのリンクは別記事どうしでも共有されるので重複判定に使わない
+        site_link = d.feed.get("link", "")
+
+        for entry in d.entries:
+            # pubDate はそのまま文字列として出力（解析なし）
+            pub_str = entry.get("published", "")
+
+            # GUID は entry.guid または entry.link を使用
+            guid = entry.get("guid") or entry.get("link")
+
+            entries.append(make_entry(
+                f"【{source}】{entry.title}",
+                entry.link,
+                entry.get("summary", ""),
+                guid.strip() if guid else "",
+                False,
+                pub_str,
+            ))
+            records.append((source, entry.title, "" if entry.link == site_link else entry.link))
+
+    # 以前の feedgen（add_entry は先頭に追加）と同じ並び順で出力する
+    entries.reverse()
+    records.reverse()
+    return entries, records
+
+
+def collapse_duplicates(entries, records):
+    """学会をまたいだ重複をまとめ、掲載元の学会をすべて並べた1件にする。
+
+    まとめた後の記事一覧と、代表以外として消した記事の GUID の集合を返す。
+    """
+    drop = set()
+    for group in find_duplicate_groups(records):
+        # 代表は日付の古いもの（同じなら学会名順）。日付のないものは後ろ
+        group.sort(key=lambda i: (iso8601(entries[i]['pub_date']) or '9999', records[i][0], entries[i]['guid']))
+        rep = group[0]
+        sources = [records[i][0] for i in group]
+        listing = " / ".join(f"{records[i][0]}: {entries[i]['link']}" for i in group)
+        merged = dict(entries[rep])
+        merged['title'] = f"【{'・'.join(sources)}】{records[rep][1]}"
+        merged['description'] = f"{merged['description']}\n\n掲載元: {listing}".strip()
+        entries[rep] = merged
+        drop.update(group[1:])
+    if drop:
+        print(f"🔗 学会をまたいだ重複を {len(drop)} 件まとめました")
+    kept = [entry for i, entry in enumerate(entries) if i not in drop]
+    return kept, {entries[i]['guid'] for i in drop}
+
+
+def previous_head_entries():
+    try:
+        with open(COMBINED_PATH, 'rb') as f:
+            return entries_from_rss(f.read())[1]
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+def archive_number(path):
+    return int(re.search(r'combined-(\d+)\.xml$', path).group(1))
+
+
+def archive_name(number):
+    return f'combined-{number:04d}.xml'
+
+
+def archive_href(number):
+    return f'{FEED_BASE_URL}archive/{archive_name(number)}'
+
+
+def existing_archives():
+    return sorted(archive_number(p) for p in glob(f'{ARCHIVE_DIR}/combined-*.xml'))
+
+
+def write_archive_page(number, entries):
+    # 次のページ番号は連番で決まるので next-archive も書いておく（次のページができた時点で辿れる）
+    path = os.path.join(ARCHIVE_DIR, archive_name(number))
+    if os.path.exists(path):
+        return  # アーカイブは不変。既にあれば作り直さない
+    links = [('current', CHANNEL['self_link']), ('next-archive', archive_href(number + 1))]
+    if number > 1:
+        links.append(('prev-archive', archive_href(number - 1)))
+    channel = dict(CHANNEL, self_link=archive_href(number), links=links, archive=True)
+    channel['title'] = f"{CHANNEL['title']}（アーカイブ {number}）"
+    write_feeds(channel, entries, path)
+
+
+def main(now=None):
+    now = now or datetime.now(timezone.utc)
+    now_iso = now.strftime('%Y-%m-%dT%H:%M:%SZ')
+    live, merged_away = collapse_duplicates(*collect_live_entries())
+    live_guids = {e['guid'] for e in live}
+
+    # 先頭ページ = 今載っている記事 + 前回の先頭ページに残っていた記事（GUID で重複排除）
+    # 今回ほかの学会の記事にまとめたものは、前回の先頭ページにあっても戻さない
+    head = list(live)
+    seen = live_guids | merged_away
+    for entry in previous_head_entries():
+        if entry['guid'] not in seen:
+            head.append(entry)
+            seen.add(entry['guid'])
+
+    first_seen = load_state(FIRST_SEEN_PATH)
+    first_seen = {e['guid']: first_seen.get(e['guid'], now_iso) for e in head}
+
+    def sort_key(entry):
+        return iso8601(entry['pub_date']) or first_seen[entry['guid']]
+
+    # 新しい順に並べ、ウィンドウ外かつ今どのフィードにも載っていない記事をはみ出し分とする
+    head.sort(key=sort_key, reverse=True)
+    cutoff = (now - timedelta(days=WINDOW_DAYS)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    kept, overflow = [], []
+    for rank, entry in enumerate(head):
+        in_window = rank < WINDOW_ITEMS and sort_key(entry) >= cutoff
+        (kept if entry['guid'] in live_guids or in_window else overflow).append(entry)
+
+    # はみ出し分がページ1枚分たまったら古い順にアーカイブへ。端数は先頭ページに残す
+    overflow.reverse()
+    numbers = existing_archives()
+    number = numbers[-1] if numbers else 0
+    while len(overflow) >= ARCHIVE_PAGE_SIZE:
+        page, overflow = overflow[:ARCHIVE_PAGE_SIZE], overflow[ARCHIVE_PAGE_SIZE:]
+        number += 1
+        page.reverse()
+        write_archive_page(number, page)
+    overflow.reverse()
+    # live の古い記事がはみ出し分より後ろに来ることがあるので、つないだ後で新しい順に並べ直す
+    head = sorted(kept + overflow, key=sort_key, reverse=True)
+
+    channel = dict(CHANNEL)
+    if number:
+        channel['links'] = [('prev-archive', archive_href(number))]
+
+    # 出力（RSS / Atom / JSON Feed）
+    write_feeds(channel, head, COMBINED_PATH)
+    replace_state(FIRST_SEEN_PATH, {e['guid']: first_seen[e['guid']] for e in head})
+    print(f"✅ 統合RSS生成完了: {COMBINED_PATH}（{len(head)} 件 / アーカイブ {number} ページ）")
+
+    # 先頭ページの記事からキーワード別のトピックフィードを作る
+    write_topic_feeds(head)
+    fragment_cache().save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import html
+import json
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from dedupe import normalize_link
+from http_pool import shared_pool
+from state_store import load_state, save_state
+
+# ===== サイトが自前で持つフィード / WordPress REST API の自動検出 =====
+# ブラウザで一覧ページを描画してセレクターで抜き出すより、サイト自身の RSS / Atom や
+# WordPress の /wp-json/wp/v2/posts を読むほうが1回の小さなリクエストで済み、日付も正確。
+#   1. ブラウザで取得したときに、ページの <link rel="alternate"> と WordPress の痕跡から候補を探す
+#   2. 候補から記事を取り、セレクターで取れた記事のリンクを COVERAGE_THRESHOLD 以上含み、
+#      含まれる記事のタイトル・日付・リンクがすべて一致するか確かめる（食い違うと切り替えのたびに
+#      GUID が変わってフィードが書き換わり、変更ログに偽の削除・追加が出る）
+#   3. 合格した候補があれば次回からはブラウザを使わずそれを読む（REVERIFY_DAYS ごとに再確認）
+# サイトマップの lastmod は記事のタイトルを持たないので、セレクターで日付が取れなかった記事の
+# 日付を補うためだけに使う。lastmod は記事を編集するたびに進み、そのまま使うと GUID（リンク#日付）が
+# 変わるので、リンクごとに最初に見た日付（サイトマップに無ければ「日付なし」）を記録して使い続ける。
+# サイトマップを取りに行くのは、記録にない日付なしの記事が現れたときと再確認のときだけ。
+# 判定結果は state/native_sources.json に保存する。
+
+SOURCES_PATH = "state/native_sources.json"
+
+COVERAGE_THRESHOLD = 0.8
+REVERIFY_DAYS = 7
+MAX_BYTES = 4 * 1024 * 1024
+
+FEED_TYPES = ("application/rss+xml", "application/atom+xml", "application/feed+json")
+_TAGS = re.compile(r"<[^>]+>")
+
+# セレクターで取る日付は一覧に書かれた日本時間の日付なので、フィードの日時も日本時間の日付にそろえる
+JST = timezone(timedelta(hours=9))
+
+
+class _LinkFinder(HTMLParser):
+    # <link rel="alternate" type="application/rss+xml"> と WordPress の REST API の場所を探す
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.feeds = []
+        self.wp_api = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "link":
+            return
+        attrs = dict(attrs)
+        rel = (attrs.get("rel") or "").lower()
+        href = attrs.get("href")
+        if not href:
+            return
+        if rel == "alternate" and (attrs.get("type") or "").lower() in FEED_TYPES:
+            self.feeds.append(href)
+        elif rel == "https://api.w.org/":
+            self.wp_api = href
+
+
+def discover(page_url, page_html):
+    """一覧ページの HTML から候補 [(種類, URL), ...] を優先順に返す。"""
+    finder = _LinkFinder()
+    finder.feed(page_html)
+    candidates = []
+    if finder.wp_api or "/wp-content/" in page_html or "vk_posts" in page_html:
+        api_root = finder.wp_api or urljoin(page_url, "/wp-json/")
+        candidates.append(("wp-json", urljoin(api_root.rstrip("/") + "/", "wp/v2/posts?per_page=20&_fields=date_gmt,link,title")))
+    for href in finder.feeds:
+        url = urljoin(page_url, href)
+        # コメントフィードは記事一覧ではない
+        if "comments" not in url:
+            candidates.append(("feed", url))
+    if candidates and candidates[0][0] == "wp-json":
+        candidates.append(("feed", urljoin(page_url, "/feed/")))
+    seen = set()
+    return [c for c in candidates if not (c[1] in seen or seen.add(c[1]))]
+
+
+def _clean(text):
+    return html.unescape(_TAGS.sub("", text or "")).strip()
+
+
+def local_day(dt):
+    """日時を、セレクターで取った日付と同じ形（日本時間の日付の 0 時・tzinfo は UTC）にする。"""
+    if dt is None:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(JST)
+    return datetime(dt.year, dt.month, dt.day, tzinfo=timezone.utc)
+
+
+def _item(title, link, pub_date):
+    return {"title": title, "link": link, "description": title, "pub_date": pub_date}
+
+
+def parse_wp_json(body):
+    items = []
+    for post in json.loads(body):
+        # date はサイトの現地時刻（日本時間）。date_gmt だと日本時間の午前の投稿が前日になる
+        date = post.get("date")
+        pub_date = local_day(datetime.fromisoformat(date)) if date else None
+        title = post.get("title")
+        items.append(_item(_clean(title.get("rendered") if isinstance(title, dict) else title), post.get("link", ""), pub_date))
+    return items
+
+
+def parse_feed(body):
+    import feedparser
+
+    parsed = feedparser.parse(body)
+    items = []
+    for entry in parsed.entries:
+        struct = entry.get("published_parsed") or entry.get("updated_parsed")
+        pub_date = local_day(datetime(*struct[:6], tzinfo=timezone.utc)) if struct else None
+        items.append(_item(_clean(entry.get("title")), entry.get("link", ""), pub_date))
+    return items
+
+
+def fetch_items(kind, url, pool=None):
+    response = (pool or shared_pool()).get(url, max_bytes=MAX_BYTES)
+    if response.status != 200:
+        raise ValueError(f"HTTP {response.status}: {url}")
+    return parse_wp_json(response.body) if kind == "wp-json" else parse_feed(response.body)
+
+
+def sitemap_dates(page_url, pool=None):
+    """robots.txt に書かれたサイトマップ（なければ /sitemap.xml）から リンク → lastmod を返す。"""
+    pool = pool or shared_pool()
+    root = urljoin(page_url, "/")
+    urls = []
+    robots = pool.get(urljoin(root, "robots.txt"), max_bytes=MAX_BYTES)
+    if robots.status == 200:
+        urls = re.findall(rb"(?im)^sitemap:\s*(\S+)", robots.body)
+        urls = [u.decode("utf-8", "ignore") for u in urls]
+    dates = {}
+    queue = urls or [urljoin(root, "sitemap.xml")]
+    index = 0
+    while index < min(len(queue), 10):
+        response = pool.get(queue[index], max_bytes=MAX_BYTES)
+        index += 1
+        if response.status != 200:
+            continue
+        is_index = b"<sitemapindex" in response.body[:2048]
+        for block in re.findall(rb"<(?:url|sitemap)>(.*?)</(?:url|sitemap)>", response.body, re.S):
+            loc = re.search(rb"<loc>\s*(.*?)\s*</loc>", block, re.S)
+            lastmod = re.search(rb"<lastmod>\s*(.*?)\s*</lastmod>", block, re.S)
+            if not loc:
+                continue
+            loc = html.unescape(loc.group(1).decode("utf-8", "ignore"))
+            if is_index:
+                queue.append(loc)  # サイトマップインデックスなら子のサイトマップを辿る
+            elif lastmod:
+                dates[normalize_link(loc)] = _parse_lastmod(lastmod.group(1).decode("ascii", "ignore"))
+    return {link: date for link, date in dates.items() if date}
+
+
+def _parse_lastmod(text):
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return local_day(dt)
+
+
+def coverage(scraped, candidate):
+    """セレクターで取れた記事のリンクのうち、候補にも載っている割合。"""
+    wanted = {normalize_link(item["link"]) for item in scraped if item["link"]}
+    if not wanted:
+        return 0.0
+    found = {normalize_link(item["link"]) for item in candidate}
+    return len(wanted & found) / len(wanted)
+
+
+def mismatches(scraped, candidate):
+    """両方に載っている記事のうち、タイトル・日付・リンクの表記のどれかが食い違うものの数。"""
+    found = {normalize_link(item["link"]): item for item in candidate}
+    count = 0
+    for item in scraped:
+        other = found.get(normalize_link(item["link"])) if item["link"] else None
+        if other is None:
+            continue
+        if (other["title"].strip(), other["link"], other["pub_date"]) != (item["title"].strip(), item["link"], item["pub_date"]):
+            count += 1
+    return count
+
+
+class NativeSources:
+    def __init__(self, path=SOURCES_PATH, now=None, pool=None):
+        self.path = path
+        self.now = now or time.time
+        self.pool = pool
+        self.records = load_state(path)
+        self.dirty = set()
+        self.sitemaps = {}
+
+    def save(self):
+        self.records = save_state(self.path, self.records, self.dirty)
+
+    def _sitemap_dates(self, key, page_url):
+        if key not in self.sitemaps:
+            try:
+                self.sitemaps[key] = sitemap_dates(page_url, self.pool)
+            except Exception:
+                self.sitemaps[key] = {}
+        return self.sitemaps[key]
+
+    def due(self, key):
+        """候補の確認（ブラウザでの取得と比較）が必要か。"""
+        rec = self.records.get(key)
+        return rec is None or self.now() - rec.get("checked", 0) > REVERIFY_DAYS * 24 * 3600
+
+    def source(self, key):
+        rec = self.records.get(key) or {}
+        return rec.get("source")
+
+    def items(self, key):
+        """確認済みのフィード / REST API から記事を取る。使えなければ None（ブラウザで取得する）。"""
+        source = self.source(key)
+        if not source or self.due(key):
+            return None
+        try:
+            items = fetch_items(source["kind"], source["url"], self.pool)
+        except Exception as e:
+            print(f"⚠ サイトのフィードを読めませんでした（ブラウザで取得します）: {e}")
+            return None
+        if not items:
+            return None
+        print(f"📡 サイトのフィードから取得しました: {source['url']}")
+        return items[: source.get("limit") or len(items)]
+
+    def verify(self, key, page_url, page_html, scraped):
+        """ブラウザで取れた記事と候補を比べ、合格した候補を記録する。"""
+        previous = self.records.get(key) or {}
+        rec = {"checked": self.now(), "source": None, "sitemap": False, "dates": previous.get("dates") or {}}
+        if scraped:
+            for kind, url in discover(page_url, page_html):
+                try:
+                    candidate = fetch_items(kind, url, self.pool)
+                except Exception:
+                    continue
+                ratio = coverage(scraped, candidate)
+                differ = mismatches(scraped, candidate)
+                if ratio >= COVERAGE_THRESHOLD and differ:
+                    print(f"📡 サイトのフィードはタイトル・日付・リンクが一覧と {differ} 件食い違うため使いません: {url}")
+                elif ratio >= COVERAGE_THRESHOLD:
+                    rec["source"] = {"kind": kind, "url": url, "coverage": round(ratio, 2), "limit": len(scraped)}
+                    print(f"📡 サイトのフィードが一覧と一致しました（{ratio:.0%}）。次回から {url} を使います")
+                    break
+            if rec["source"] is None and any(item["pub_date"] is None for item in scraped):
+                dates = self._sitemap_dates(key, page_url)
+                links = {normalize_link(item["link"]) for item in scraped}
+                rec["sitemap"] = bool(dates) and len(links & set(dates)) / len(links) >= COVERAGE_THRESHOLD
+        self.records[key] = rec
+        self.dirty.add(key)
+        return rec["source"]
+
+    def fill_dates(self, key, page_url, items):
+        """日付の取れなかった記事に、リンクごとに最初に見たサイトマップの lastmod を入れる。"""
+        rec = self.records.get(key) or {}
+        undated = [item for item in items if item["pub_date"] is None]
+        if not rec.get("sitemap") or not undated:
+            return
+        known = rec.get("dates") or {}
+        links = [normalize_link(item["link"]) for item in undated]
+        dates = self._sitemap_dates(key, page_url) if any(link not in known for link in links) else {}
+        seen = {}
+        for item, link in zip(undated, links):
+            if link in known:
+                seen[link] = known[link]
+            elif dates:
+                seen[link] = dates[link].date().isoformat() if link in dates else None
+            else:
+                continue  # サイトマップを読めなかった回は記録せず、次回また探す
+            if seen[link]:
+                item["pub_date"] = datetime.fromisoformat(seen[link]).replace(tzinfo=timezone.utc)
+        # 一覧から消えた記事の分は捨てる
+        if seen != rec.get("dates"):
+            rec["dates"] = seen
+            self.dirty.add(key)
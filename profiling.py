@@ -0,0 +1,165 @@
+import cProfile
+import os
+import pstats
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# ===== サイトごとのプロファイル（cProfile）と Playwright トレース =====
+# 遅くなったサイトの時間が Python 側（行ごとのループ・フィード出力）とブラウザ側
+# （ナビゲーション・スクリプト）のどちらに使われているかを見るための成果物を、実行ごとのディレクトリ
+# artifacts/<実行日時>/ に保存する。
+#   <サイト>.pstats         cProfile の結果（python -m pstats / snakeviz で読める）
+#   <サイト>.collapsed      flamegraph.pl / speedscope で読める collapsed 形式のスタック
+#   <サイト>-<n>-<profile>.zip  ページを借りてから返すまで（ナビゲーション〜抽出）の Playwright トレース
+# どちらもサイトごとに rate の確率で取る（本番の一部の実行でだけ有効にできるように）。
+# 1回の実行で保存する合計は max_bytes までで、超えた分は保存しない。
+
+ARTIFACTS_DIR = "artifacts"
+MAX_RUN_BYTES = 100 * 1024 * 1024
+
+# collapsed 形式に展開するときの深さの上限と、捨てる枝の小ささ（秒）
+MAX_STACK_DEPTH = 64
+MIN_BRANCH_SEC = 1e-5
+
+
+def func_label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name  # 組み込み関数（<built-in method time.sleep> など）
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+def collapsed_stacks(stats):
+    """pstats の呼び出し関係から「呼び出し元;…;関数 マイクロ秒」の行を作る。
+
+    cProfile は呼び出し元 → 呼び出し先の組ごとの時間しか持たないので、各関数の時間を呼び出し元ごとの
+    割合で分けて根から展開する（flameprof などと同じ近似）。
+    """
+    children = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, caller_stats in callers.items():
+            children.setdefault(caller, []).append((func, caller_stats[3]))
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    totals = Counter()
+
+    def walk(func, path, labels, inclusive):
+        _, _, tt, ct, _ = stats[func]
+        labels = labels + [func_label(func)]
+        stack = ";".join(labels)
+        scale = inclusive / ct if ct else 0.0
+        if len(labels) >= MAX_STACK_DEPTH:
+            totals[stack] += inclusive
+            return
+        self_sec = tt * scale
+        for child, child_ct in children.get(func, []):
+            branch = child_ct * scale
+            if child in path or branch < MIN_BRANCH_SEC:
+                self_sec += branch  # 再帰と細かすぎる枝は呼び出し元の時間に含める
+                continue
+            walk(child, path | {child}, labels, branch)
+        totals[stack] += self_sec
+
+    for root in roots:
+        walk(root, {root}, [], stats[root][3])
+    return [f"{stack} {round(sec * 1e6)}" for stack, sec in totals.items() if round(sec * 1e6) > 0]
+
+
+class RunArtifacts:
+    def __init__(self, directory=ARTIFACTS_DIR, profile_rate=0.0, trace_rate=0.0, max_bytes=MAX_RUN_BYTES, rng=None):
+        self.run_dir = os.path.join(directory, time.strftime("%Y%m%d-%H%M%S"))
+        self.profile_rate = profile_rate
+        self.trace_rate = trace_rate
+        self.max_bytes = max_bytes
+        self.rng = rng or random.Random()
+        self.used_bytes = 0
+        self.full = False
+        self.saved = []
+
+    def _sampled(self, rate):
+        return not self.full and rate > 0 and (rate >= 1 or self.rng.random() < rate)
+
+    def _path(self, name):
+        os.makedirs(self.run_dir, exist_ok=True)
+        return os.path.join(self.run_dir, name)
+
+    def _keep(self, path):
+        # 上限を超える成果物は消して、以降は取らない
+        size = os.path.getsize(path)
+        if self.used_bytes + size > self.max_bytes:
+            os.remove(path)
+            if not self.full:
+                print(f"⚠ プロファイル / トレースが上限（{self.max_bytes / 1024 / 1024:.0f} MB）に達したため、以降は保存しません")
+            self.full = True
+            return False
+        self.used_bytes += size
+        self.saved.append(path)
+        return True
+
+    # ----- cProfile -----
+    @contextmanager
+    def profile(self, key):
+        """with の中の Python 側の処理を、サンプルに当たったときだけ cProfile で記録する。"""
+        if not self._sampled(self.profile_rate):
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._write_profile(key, profiler)
+
+    def _write_profile(self, key, profiler):
+        try:
+            stats = pstats.Stats(profiler)
+            path = self._path(f"{key}.pstats")
+            stats.dump_stats(path)
+            if not self._keep(path):
+                return
+            path = self._path(f"{key}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(collapsed_stacks(stats.stats)) + "\n")
+            self._keep(path)
+        except Exception as e:
+            print(f"⚠ プロファイルの保存に失敗しました: {e}")
+
+    # ----- Playwright トレース -----
+    def traced(self, key, open_page):
+        """open_page(profile) を包み、サンプルに当たったサイトでは借りたページのコンテキストをトレースする。"""
+        if not self._sampled(self.trace_rate):
+            return open_page
+        borrowed = [0]
+
+        @contextmanager
+        def traced_page(profile):
+            with open_page(profile) as page:
+                borrowed[0] += 1
+                tracing = page.context.tracing
+                started = False
+                if not self.full:
+                    try:
+                        tracing.start(title=f"{key} ({profile})", screenshots=True, snapshots=True)
+                        started = True
+                    except Exception as e:
+                        print(f"⚠ トレースを開始できませんでした: {e}")
+                try:
+                    yield page
+                finally:
+                    if started:
+                        self._stop_trace(tracing, f"{key}-{borrowed[0]}-{profile}.zip")
+        return traced_page
+
+    def _stop_trace(self, tracing, name):
+        try:
+            path = self._path(name)
+            tracing.stop(path=path)
+            self._keep(path)
+        except Exception as e:
+            print(f"⚠ トレースの保存に失敗しました: {e}")
+
+    def report(self):
+        if self.saved:
+            print(f"🔬 プロファイル / トレース: {len(self.saved)} ファイル・{self.used_bytes / 1024 / 1024:.1f} MB → {self.run_dir}")
@@ -0,0 +1,84 @@
+import time
+
+from state_store import load_state, save_state
+
+# ===== サイトごとの描画プロファイル =====
+# cookie やリダイレクトのためにブラウザは要るが、一覧はサーバー側で HTML に入っているサイトでは
+# JavaScript の実行は無駄になる。そこでブラウザコンテキストの設定を2段階用意し、
+#   full : 通常どおり（JavaScript あり）
+#   lite : JavaScript なし・小さいビューポート・Service Worker 禁止・アニメーション抑制
+# サイトごとに lite で取れた記事が full と完全に一致することを確かめてから lite に切り替える。
+# 一致の確認は RECHECK_DAYS ごとにやり直し、lite で記事が取れなかった回はその場で full に戻す。
+# サイト側で RENDER_PROFILE = "full" と書けば常に full を使う。
+# 判定結果は state/render_profiles.json に保存する。
+
+PROFILES_PATH = "state/render_profiles.json"
+RECHECK_DAYS = 14
+
+FULL = "full"
+LITE = "lite"
+
+CONTEXT_OPTIONS = {
+    # 従来の browser.new_context() と同じ（既定値のまま）
+    FULL: {},
+    LITE: {
+        "java_script_enabled": False,
+        "viewport": {"width": 800, "height": 600},
+        "locale": "ja-JP",
+        "service_workers": "block",
+        "reduced_motion": "reduce",
+    },
+}
+
+
+def context_options(profile):
+    """browser.new_context(**context_options(profile)) に渡す設定。"""
+    return dict(CONTEXT_OPTIONS[profile])
+
+
+def comparable(items):
+    # 記事の比較に使う部分（description は抽出側でタイトルの写し）
+    return [(item["title"], item["link"], item["pub_date"]) for item in items]
+
+
+class RenderProfiles:
+    def __init__(self, path=PROFILES_PATH, now=None):
+        self.path = path
+        self.now = now or time.time
+        self.records = load_state(path)
+        self.dirty = set()
+
+    def save(self):
+        self.records = save_state(self.path, self.records, self.dirty)
+
+    def profile(self, key, site=None):
+        pinned = getattr(site, "RENDER_PROFILE", None)
+        if pinned:
+            return pinned
+        return (self.records.get(key) or {}).get("profile", FULL)
+
+    def due(self, key, site=None):
+        """full と lite の両方で取得して比べる時期か。固定されたサイトは比べない。"""
+        if getattr(site, "RENDER_PROFILE", None):
+            return False
+        rec = self.records.get(key)
+        return rec is None or self.now() - rec.get("checked", 0) > RECHECK_DAYS * 24 * 3600
+
+    def verify(self, key, full_items, lite_items):
+        """両方の結果を比べてプロファイルを決める。full が取れていなければ判定しない。"""
+        if not full_items:
+            return self.profile(key)
+        same = lite_items is not None and comparable(full_items) == comparable(lite_items)
+        profile = LITE if same else FULL
+        previous = self.profile(key)
+        self.records[key] = {"profile": profile, "checked": self.now()}
+        self.dirty.add(key)
+        if profile != previous:
+            label = "JavaScript なしで同じ記事が取れるため lite" if same else "JavaScript なしでは記事が変わるため full"
+            print(f"🎛 描画プロファイル: {label} にします")
+        return profile
+
+    def demote(self, key):
+        # lite で取れなかったので full に戻し、次の確認を待つ
+        self.records[key] = {"profile": FULL, "checked": self.now()}
+        self.dirty.add(key)
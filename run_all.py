@@ -0,0 +1,169 @@
+import argparse
+import importlib
+import re
+import subprocess
+import sys
+import time
+from glob import glob
+
+from playwright.sync_api import sync_playwright
+
+import shared_env  # noqa: F401  共通関数（rss_utils / scraper_utils）を読み込めるようにする
+from asset_cache import AssetCache
+from browser_pool import BrowserPool
+from charset import charset_cache
+from feed_writer import fragment_cache
+from http_pool import shared_pool
+from scheduler import RunScheduler
+from site_health import SiteHealth
+from memory_watch import MemoryWatch
+from native_feeds import NativeSources
+from profiling import RunArtifacts
+from render_profiles import RenderProfiles
+from run_metrics import RunMetrics, record_site
+from site_runner import run_native, run_site, site_host, site_key
+from structure_guard import StructureGuard
+from watermarks import Watermarks
+
+# ===== 全学会サイトを1つのブラウザで順番に処理し、統合フィードを作る =====
+
+
+def site_scripts():
+    # RSS1.py, RSS2.py, ... を番号順に並べる
+    return sorted(glob("RSS*.py"), key=lambda path: int(re.search(r"\d+", path).group()))
+
+
+def load_sites():
+    return [importlib.import_module(script[:-3]) for script in site_scripts()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="全学会サイトの RSS を生成して統合する")
+    parser.add_argument("--pool-size", type=int, default=2, help="使い回すコンテキスト数の上限")
+    parser.add_argument("--recycle-after", type=int, default=20, help="何回ナビゲーションしたらコンテキストを作り直すか")
+    parser.add_argument("--budget-sec", type=int, default=45 * 60, help="実行全体の時間予算（秒）。0 で無制限")
+    parser.add_argument("--memory-limit-mb", type=int, default=1024, help="ブラウザ子プロセスの RSS 合計がこれを超えたら再起動")
+    parser.add_argument("--no-asset-cache", action="store_true", help="静的ファイルのディスクキャッシュを使わない")
+    parser.add_argument("--enrich", action="store_true", help="新しい記事のリンク先（詳細ページ / PDF）から要約を取得する")
+    parser.add_argument("--profile", type=float, nargs="?", const=1.0, default=0.0, metavar="RATE",
+                        help="この確率でサイトごとに cProfile を取り artifacts/ に保存する（値なしは全サイト）")
+    parser.add_argument("--trace", type=float, nargs="?", const=1.0, default=0.0, metavar="RATE",
+                        help="この確率でサイトごとに Playwright のトレースを取り artifacts/ に保存する（値なしは全サイト）")
+    parser.add_argument("--artifacts-max-mb", type=int, default=100, help="1回の実行で保存するプロファイル / トレースの合計の上限")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    health = SiteHealth()
+    scheduler = RunScheduler(budget_sec=args.budget_sec or None)
+    sources = NativeSources()
+    profiles = RenderProfiles()
+    guard = StructureGuard()
+    watermarks = Watermarks()
+    sites = scheduler.order(load_sites(), site_key, site_host)
+    updated = []
+    failed = []
+    skipped = []
+    deferred = []
+
+    asset_cache = None if args.no_asset_cache else AssetCache()
+    memory = MemoryWatch().start()
+    metrics = RunMetrics()
+    metrics.begin_run()
+    artifacts = RunArtifacts(profile_rate=args.profile, trace_rate=args.trace, max_bytes=args.artifacts_max_mb * 1024 * 1024)
+
+    with sync_playwright() as p:
+        pool = BrowserPool(
+            p,
+            size=args.pool_size,
+            recycle_after=args.recycle_after,
+            memory_limit_mb=args.memory_limit_mb,
+            asset_cache=asset_cache,
+        ).start()
+        try:
+            for site in sites:
+                print(f"\n===== {site.GAKKAI}（{site.RSS_PATH}） =====")
+                key = site_key(site)
+                if not health.allow(key):
+                    print("⏸ バックオフ中のためスキップします（前回のフィードを維持）")
+                    skipped.append(site.GAKKAI)
+                    metrics.record(key, "skipped")
+                    continue
+                if scheduler.should_defer(key):
+                    print("⏭ 残り時間内に終わらない見込みのため次回に回します")
+                    scheduler.defer(key)
+                    deferred.append(site.GAKKAI)
+                    metrics.record(key, "deferred")
+                    continue
+                if asset_cache is not None:
+                    asset_cache.begin_site(site.GAKKAI)
+                started = time.monotonic()
+                site_updated = False
+                source = "native"
+                error = None
+                try:
+                    with memory.site(key, getattr(site, "MEMORY_BUDGET_MB", None)), artifacts.profile(key):
+                        # 確認済みのサイト自身のフィードがあればブラウザを使わない
+                        site_updated = run_native(site, sources, args.enrich)
+                        if site_updated is None:
+                            source = "browser"
+                            open_page = artifacts.traced(key, pool.page)
+                            site_updated = run_site(site, open_page, scheduler.timeouts(key), args.enrich,
+                                                    sources, profiles, guard, watermarks)
+                    health.success(key)
+                except Exception as e:
+                    print(f"⚠ {site.GAKKAI} の処理に失敗しました: {e}")
+                    health.failure(key, e)
+                    failed.append(site.GAKKAI)
+                    error = e
+                duration = time.monotonic() - started
+                scheduler.record(key, duration, site_updated, browser=source == "browser")
+                if site_updated:
+                    updated.append(site.RSS_PATH)
+                record_site(metrics, site, key, source, duration, site_updated, error, memory.run.get(key))
+            pool.summary()
+            shared_pool().report()
+            if asset_cache is not None:
+                asset_cache.report()
+            charset_cache().report()
+            artifacts.report()
+            memory.report()
+        finally:
+            memory.stop()
+            pool.close()
+            shared_pool().close()
+            if asset_cache is not None:
+                asset_cache.save()
+            health.save()
+            scheduler.save()
+            sources.save()
+            profiles.save()
+            guard.save()
+            watermarks.save()
+            charset_cache().save()
+            fragment_cache().save()
+            memory.save()
+            metrics.finish_run()
+            metrics.close()
+
+    print("\n===== merge_feeds.py =====")
+    subprocess.run([sys.executable, "merge_feeds.py"])
+
+    print("\n===== 実行結果 =====")
+    print(f"📝 更新されたフィード: {len(updated)} / {len(sites)}")
+    for path in updated:
+        print(f"  - {path}")
+    if failed:
+        print(f"⚠ 失敗したサイト: {', '.join(failed)}")
+    if skipped:
+        print(f"⏸ スキップしたサイト: {', '.join(skipped)}")
+    if deferred:
+        print(f"⏭ 次回に回したサイト: {', '.join(deferred)}")
+    health.report()
+    guard.report()
+    watermarks.report()
+
+
+if __name__ == "__main__":
+    main()
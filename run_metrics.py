@@ -0,0 +1,255 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+
+from change_log import read_entries
+from scheduler import percentile
+
+# ===== 実行ごとの指標の履歴（SQLite）と回帰の報告 =====
+# run_all.py と RSSn.py の単体実行は、サイトごとに次の値を1行ずつ追記する:
+#   結果（updated / unchanged / failed / skipped / deferred）、取得元（native / browser）、所要時間、
+#   段階ごとの所要時間（native / navigate / extract / publish）、記事数、転送バイト数、DOM ノード数、ピークメモリ
+# CI のログと違って実行をまたいで残るので、遅い学会ページや記事数の急な変化を後から探せる。
+# RETENTION_DAYS より古い行は実行の終わりに消す。
+# 毎時コミットされる state/ には置かず、.cache/ に置いて CI では actions/cache で引き継ぐ。
+#
+#   python run_metrics.py report --days 30              # サイトごとの p50 / p95 / p99 と変化の検出
+#   python run_metrics.py report --days 30 --csv summary.csv
+#   python run_metrics.py export --days 90 --csv runs.csv
+
+METRICS_PATH = ".cache/run_metrics.sqlite"
+RETENTION_DAYS = 365
+
+# 変化の検出: 直近 RECENT_RUNS 回と、それより前の期間内の実行を比べる
+RECENT_RUNS = 5
+SHIFT_THRESHOLD = 0.5
+
+STAGES = ("native", "navigate", "extract", "publish")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS site_runs (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    site TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    source TEXT,
+    duration_sec REAL,
+    native_sec REAL,
+    navigate_sec REAL,
+    extract_sec REAL,
+    publish_sec REAL,
+    items INTEGER,
+    transferred_bytes INTEGER,
+    dom_nodes INTEGER,
+    peak_mb REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS site_runs_site ON site_runs (site, run_id);
+"""
+
+COLUMNS = ("outcome", "source", "duration_sec") + tuple(f"{s}_sec" for s in STAGES) + (
+    "items", "transferred_bytes", "dom_nodes", "peak_mb", "error")
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+class RunMetrics:
+    def __init__(self, path=METRICS_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.run_id = None
+
+    def close(self):
+        self.conn.close()
+
+    # ----- 記録 -----
+    def begin_run(self, started=None):
+        with self.conn:
+            cur = self.conn.execute("INSERT INTO runs (started) VALUES (?)", (started or time.time(),))
+        self.run_id = cur.lastrowid
+        return self.run_id
+
+    def record(self, site, outcome, duration_sec=None, source=None, stage_sec=None, items=None,
+               transferred_bytes=None, dom_nodes=None, peak_mb=None, error=None):
+        stage_sec = stage_sec or {}
+        values = (outcome, source, _round(duration_sec)) + tuple(_round(stage_sec.get(s)) for s in STAGES) + (
+            items, transferred_bytes, dom_nodes, _round(peak_mb, 1), str(error)[:200] if error else None)
+        with self.conn:
+            self.conn.execute(
+                f"INSERT INTO site_runs (run_id, site, {', '.join(COLUMNS)}) VALUES (?, ?{', ?' * len(COLUMNS)})",
+                (self.run_id, site) + values,
+            )
+
+    def finish_run(self, finished=None):
+        finished = finished or time.time()
+        cutoff = finished - RETENTION_DAYS * 24 * 3600
+        with self.conn:
+            self.conn.execute("UPDATE runs SET finished = ? WHERE id = ?", (finished, self.run_id))
+            self.conn.execute("DELETE FROM site_runs WHERE run_id IN (SELECT id FROM runs WHERE started < ?)", (cutoff,))
+            self.conn.execute("DELETE FROM runs WHERE started < ?", (cutoff,))
+
+    # ----- 読み出し -----
+    def rows(self, since):
+        """since（UNIX 時刻）以降の実行の行を、実行の古い順に dict で返す。"""
+        cur = self.conn.execute(
+            f"SELECT r.started, s.site, {', '.join('s.' + c for c in COLUMNS)} FROM site_runs s "
+            "JOIN runs r ON r.id = s.run_id WHERE r.started >= ? ORDER BY r.started, s.site",
+            (since,),
+        )
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in cur]
+
+
+def record_site(metrics, site, key, source, duration, updated, error, measured=None):
+    """1サイト分の結果を記録する。measured は MemoryWatch で測った今回の値（測っていなければ None）。"""
+    measured = measured or {}
+    # 指標の履歴への記録に失敗しても実行は続ける
+    try:
+        metrics.record(
+            key,
+            "failed" if error else "updated" if updated else "unchanged",
+            duration,
+            source,
+            measured.get("stage_sec"),
+            None if error else len(read_entries(site.RSS_PATH)),
+            measured.get("transferred_bytes"),
+            measured.get("dom_nodes"),
+            measured.get("peak_mb"),
+            error,
+        )
+    except Exception as e:
+        print(f"⚠ 実行の指標を記録できませんでした: {e}")
+
+
+def _median(values):
+    return percentile(values, 50)
+
+
+def _shift(recent, baseline):
+    # 直近の中央値が基準の中央値からどれだけ変わったか（基準が 0 なら、直近も 0 のときだけ変化なし）
+    if not recent or not baseline:
+        return None
+    before, after = _median(baseline), _median(recent)
+    if not before:
+        return 0.0 if not after else float("inf")
+    return after / before - 1
+
+
+def summarize(rows, recent_runs=RECENT_RUNS, threshold=SHIFT_THRESHOLD):
+    """サイトごとの集計と、所要時間・記事数の変化の判定。"""
+    by_site = {}
+    for row in rows:
+        by_site.setdefault(row["site"], []).append(row)
+    summary = []
+    for site, site_rows in sorted(by_site.items()):
+        ran = [r for r in site_rows if r["outcome"] not in ("skipped", "deferred")]
+        durations = [r["duration_sec"] for r in ran if r["duration_sec"] is not None]
+        succeeded = [r for r in ran if r["outcome"] != "failed"]
+        items = [r["items"] for r in succeeded if r["items"] is not None]
+        recent, baseline = succeeded[-recent_runs:], succeeded[:-recent_runs]
+        latency_shift = _shift([r["duration_sec"] for r in recent], [r["duration_sec"] for r in baseline])
+        items_shift = _shift([r["items"] for r in recent if r["items"] is not None],
+                             [r["items"] for r in baseline if r["items"] is not None])
+        flags = []
+        if latency_shift is not None and latency_shift > threshold:
+            flags.append(f"遅くなった {latency_shift:+.0%}")
+        if items_shift is not None and abs(items_shift) > threshold:
+            flags.append(f"記事数 {items_shift:+.0%}")
+        summary.append({
+            "site": site,
+            "runs": len(ran),
+            "failures": len(ran) - len(succeeded),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "p99": percentile(durations, 99),
+            "items": _median(items),
+            "latency_shift": latency_shift,
+            "items_shift": items_shift,
+            "flags": flags,
+        })
+    return summary
+
+
+def write_csv(path, rows):
+    if not rows:
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: " / ".join(v) if isinstance(v, list) else v for k, v in row.items()})
+
+
+def _sec(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_report(summary, days):
+    print(f"📈 直近 {days} 日のサイトごとの所要時間（秒）と記事数:")
+    print(f"  {'サイト':<10}{'回数':>5}{'失敗':>5}{'p50':>8}{'p95':>8}{'p99':>8}{'記事数':>7}  変化")
+    for s in sorted(summary, key=lambda s: s["p95"] or 0, reverse=True):
+        items = "-" if s["items"] is None else str(s["items"])
+        flags = " ".join(f"⚠ {flag}" for flag in s["flags"])
+        print(f"  {s['site']:<10}{s['runs']:>5}{s['failures']:>5}{_sec(s['p50']):>8}{_sec(s['p95']):>8}{_sec(s['p99']):>8}{items:>7}  {flags}")
+    flagged = [s["site"] for s in summary if s["flags"]]
+    if flagged:
+        print(f"⚠ 変化のあったサイト: {', '.join(flagged)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="実行ごとの指標の履歴")
+    parser.add_argument("--db", default=METRICS_PATH, help="履歴のファイルのパス")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    report = sub.add_parser("report", help="サイトごとの p50 / p95 / p99 と変化を表示する")
+    report.add_argument("--days", type=int, default=30)
+    report.add_argument("--recent", type=int, default=RECENT_RUNS, help="直近として比べる実行回数")
+    report.add_argument("--threshold", type=float, default=SHIFT_THRESHOLD, help="変化とみなす中央値の変化率")
+    report.add_argument("--csv", help="集計を CSV に書き出す")
+    report.add_argument("--fail-on-shift", action="store_true", help="変化があれば終了コード 1 にする")
+
+    export = sub.add_parser("export", help="期間内の全行を CSV に書き出す")
+    export.add_argument("--days", type=int, default=30)
+    export.add_argument("--csv", required=True)
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"⚠ 履歴がありません: {args.db}")
+        return
+    metrics = RunMetrics(args.db)
+    try:
+        rows = metrics.rows(time.time() - args.days * 24 * 3600)
+    finally:
+        metrics.close()
+
+    if args.command == "export":
+        for row in rows:
+            row["started"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(row["started"]))
+        write_csv(args.csv, rows)
+        print(f"✅ {len(rows)} 行を書き出しました: {args.csv}")
+        return
+
+    summary = summarize(rows, args.recent, args.threshold)
+    print_report(summary, args.days)
+    if args.csv:
+        write_csv(args.csv, summary)
+        print(f"✅ 集計を書き出しました: {args.csv}")
+    if args.fail_on_shift and any(s["flags"] for s in summary):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
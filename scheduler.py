@@ -0,0 +1,137 @@
+import time
+
+from state_store import load_state, save_state
+
+# ===== 実行全体の時間予算とサイトごとのタイムアウト =====
+# CI ジョブには決まった時間枠があるので、
+#   - サイトごとの所要時間の履歴（p50 / p95）と「更新があった割合」を記録し
+#   - 速くて更新の多いサイトから先に、遅くて更新の少ないサイトは後ろに回し
+#   - タイムアウトは固定値ではなく各サイト自身の p95 から決め
+#   - 残り時間で終わりそうにないサイトは次回に回す（ジョブ全体は止めない）
+# 所要時間の履歴はブラウザで取得した回だけ（サイト自身のフィードで済んだ1秒未満の回を混ぜると
+# p95 が下がってタイムアウトが下限まで縮み、次にブラウザで取得したときに間に合わなくなる）。
+# 履歴は state/site_latency.json に保存する。
+
+LATENCY_PATH = "state/site_latency.json"
+HISTORY_SIZE = 50
+
+# 履歴がないサイトに使う従来の固定値（ミリ秒）
+DEFAULT_TIMEOUTS = {
+    "goto": 120000,
+    "networkidle": 120000,
+    "load": 30000,
+    "selector": 10000,
+}
+
+# p95（秒）に掛ける倍率と、タイムアウトの下限・上限（ミリ秒）
+TIMEOUT_RULES = {
+    "goto": (3.0, 15000, 120000),
+    "networkidle": (2.0, 10000, 120000),
+    "load": (1.0, 5000, 30000),
+    "selector": (1.0, 3000, 10000),
+}
+
+# 履歴がないサイトの所要時間の見積もり（秒）
+DEFAULT_ESTIMATE_SEC = 60
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class RunScheduler:
+    def __init__(self, budget_sec=None, path=LATENCY_PATH, now=None):
+        self.path = path
+        self.now = now or time.time
+        self.deadline = self.now() + budget_sec if budget_sec else None
+        self.records = load_state(path)
+        self.dirty = set()
+
+    def save(self):
+        self.records = save_state(self.path, self.records, self.dirty)
+
+    def _record(self, key):
+        self.dirty.add(key)
+        return self.records.setdefault(key, {"durations": [], "updates": [], "deferred": False})
+
+    # ----- 履歴から求める値 -----
+    def p50(self, key):
+        return percentile(self.records.get(key, {}).get("durations", []), 50)
+
+    def p95(self, key):
+        return percentile(self.records.get(key, {}).get("durations", []), 95)
+
+    def estimate_sec(self, key):
+        p95 = self.p95(key)
+        return DEFAULT_ESTIMATE_SEC if p95 is None else p95
+
+    def value(self, key):
+        # 最近の実行でフィードが更新された割合。履歴がなければ高めに見積もって先に回す
+        updates = self.records.get(key, {}).get("updates", [])
+        return sum(updates) / len(updates) if updates else 1.0
+
+    def remaining_sec(self):
+        return None if self.deadline is None else self.deadline - self.now()
+
+    def timeouts(self, key):
+        """サイトの p95 から決めたタイムアウト（ミリ秒）。残り時間でも頭打ちにする。"""
+        p95 = self.p95(key)
+        if p95 is None:
+            result = dict(DEFAULT_TIMEOUTS)
+        else:
+            result = {
+                name: int(min(max(p95 * factor * 1000, low), high))
+                for name, (factor, low, high) in TIMEOUT_RULES.items()
+            }
+        remaining = self.remaining_sec()
+        if remaining is not None:
+            cap = max(int(remaining * 1000), 1000)
+            result = {name: min(value, cap) for name, value in result.items()}
+        return result
+
+    # ----- 並び順と次回送り -----
+    def order(self, sites, key_func, host_func=None):
+        """前回次回送りにしたサイトを先頭に、残りは「更新割合 / 所要時間」の高い順に並べる。
+
+        host_func を渡すと、その順を保ちつつ同じサーバーのサイトが続かないように並べ替える。
+        """
+        def sort_key(site):
+            key = key_func(site)
+            deferred = self.records.get(key, {}).get("deferred", False)
+            score = (self.value(key) + 0.05) / max(self.p50(key) or DEFAULT_ESTIMATE_SEC, 1)
+            return (not deferred, -score)
+
+        ordered = sorted(sites, key=sort_key)
+        return spread_by_host(ordered, host_func) if host_func else ordered
+
+    def should_defer(self, key):
+        remaining = self.remaining_sec()
+        return remaining is not None and self.estimate_sec(key) > remaining
+
+    def defer(self, key):
+        self._record(key)["deferred"] = True
+
+    def record(self, key, duration_sec, updated, browser=True):
+        """1回分の結果を記録する。browser でなければ（サイト自身のフィード）所要時間は履歴に入れない。"""
+        rec = self._record(key)
+        if browser:
+            rec["durations"] = (rec["durations"] + [round(duration_sec, 2)])[-HISTORY_SIZE:]
+        rec["updates"] = (rec["updates"] + [1 if updated else 0])[-HISTORY_SIZE:]
+        rec["deferred"] = False
+
+
+def spread_by_host(items, host_func):
+    """優先順を保ちつつ、同じサーバーのジョブが続かないように並べ替える。"""
+    remaining = list(items)
+    ordered = []
+    last = None
+    while remaining:
+        index = next((i for i, item in enumerate(remaining) if host_func(item) != last), 0)
+        item = remaining.pop(index)
+        ordered.append(item)
+        last = host_func(item)
+    return ordered
@@ -0,0 +1,264 @@
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from datetime import datetime, timezone
+from glob import glob
+
+from feed_formats import entries_from_rss, iso8601
+
+# ===== 収集した記事の全文検索インデックス =====
+# SQLite FTS5 に、タイトルと学会名を文字 bigram に分けたものと、1文字ずつ（unigram）を入れておく。
+# 検索語も bigram に分けてフレーズ検索するので、単語区切りのない日本語でも
+# 「部分文字列として含む」記事が引ける。1文字の語（「癌」など）は unigram で引く。
+# 記事はスクレイパーが取得するたびに追加され（既にあるものは無視）、
+# rss_output/ の FeedN.xml とアーカイブページからまとめて作り直すこともできる。
+#
+#   python search_index.py query ガイドライン --society 日本癌学会 --since 2026-01-01
+#   python search_index.py rebuild
+
+INDEX_PATH = ".cache/search.sqlite"
+
+# トークンの作り方を変えたら上げる（古いインデックスは開いたときに作り直す）
+SCHEMA_VERSION = 2
+
+# 日付の下限だけ・上限だけが指定されたときに年トークンを並べる範囲
+MIN_YEAR = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    society TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    pub_date TEXT,
+    first_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_pub_date ON items (pub_date);
+CREATE INDEX IF NOT EXISTS items_society_pub_date ON items (society, pub_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5 (grams, content='', tokenize='unicode61 remove_diacritics 0');
+"""
+
+# 記号・空白で区切り、区切られた各部分の中だけで bigram を作る
+_SEPARATOR = re.compile(r"[\W_]+")
+_LABEL = re.compile(r"^【([^】]*)】")
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def bigrams(text):
+    grams = []
+    for chunk in _SEPARATOR.split(normalize(text)):
+        if len(chunk) == 1:
+            grams.append(chunk)
+        grams.extend(chunk[i:i + 2] for i in range(len(chunk) - 1))
+    return grams
+
+
+def unigrams(text):
+    # bigram のフレーズ検索を邪魔しないよう、bigram の後ろにまとめて並べる
+    return list(dict.fromkeys(ch for chunk in _SEPARATOR.split(normalize(text)) for ch in chunk))
+
+
+def index_tokens(society, title, pub_date):
+    tokens = bigrams(title) + bigrams(society) + unigrams(title + " " + society) + [society_token(society)]
+    if pub_date:
+        tokens.append(year_token(pub_date[:4]))
+    return " ".join(tokens)
+
+
+def society_token(society):
+    # 学会での絞り込みを FTS 側で行うための専用トークン（bigram と衝突しない長さ）
+    return "s" + hashlib.sha1(society.encode("utf-8")).hexdigest()[:12]
+
+
+def year_token(year):
+    return f"y{year}"
+
+
+def match_expression(query, society=None, since=None, until=None):
+    """検索語（空白区切りで AND）を FTS5 のフレーズ検索式にする。
+
+    学会と年の絞り込みも専用トークンとして式に含め、一致する行の集合を FTS 側で小さくする。
+    """
+    phrases = []
+    for term in query.split():
+        grams = bigrams(term)
+        if grams:
+            phrases.append('"' + " ".join(g.replace('"', '""') for g in grams) + '"')
+    if not phrases:
+        return ""
+    if society:
+        phrases.append(society_token(society))
+    if since or until:
+        first = int(since[:4]) if since else MIN_YEAR
+        last = int(until[:4]) if until else datetime.now(timezone.utc).year + 1
+        phrases.append("(" + " OR ".join(year_token(y) for y in range(first, last + 1)) + ")")
+    return " AND ".join(phrases)
+
+
+def item_key(society, title, link):
+    return hashlib.sha1(f"{society}\n{title}\n{link}".encode("utf-8")).hexdigest()
+
+
+def to_date(pub_date):
+    # datetime / RFC 822 文字列 / None を ISO 8601 の日付文字列（または None）にそろえる
+    if pub_date is None or pub_date == "":
+        return None
+    if isinstance(pub_date, datetime):
+        return pub_date.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return iso8601(pub_date) or None
+
+
+class SearchIndex:
+    def __init__(self, path=INDEX_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self.reindex()
+
+    def reindex(self):
+        """items の内容から FTS のトークンを作り直す（トークンの作り方を変えたとき用）。"""
+        with self.conn:
+            self.conn.execute("INSERT INTO items_fts (items_fts) VALUES ('delete-all')")
+            rows = self.conn.execute("SELECT id, society, title, pub_date FROM items").fetchall()
+            self.conn.executemany(
+                "INSERT INTO items_fts (rowid, grams) VALUES (?, ?)",
+                ((row_id, index_tokens(society, title, pub_date)) for row_id, society, title, pub_date in rows),
+            )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def add_items(self, society, items):
+        """extract_items の記事（title / link / pub_date）を追加する。追加した件数を返す。"""
+        rows = [(item["title"], item["link"], to_date(item.get("pub_date"))) for item in items]
+        return self.add_rows(society, rows)
+
+    def add_rows(self, society, rows):
+        # rows は (title, link, pub_date の ISO 文字列) の並び。既にある記事は無視する
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        added = 0
+        with self.conn:
+            for title, link, pub_date in rows:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO items (key, society, title, link, pub_date, first_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                    (item_key(society, title, link), society, title, link, pub_date, now),
+                )
+                if cur.rowcount:
+                    grams = index_tokens(society, title, pub_date)
+                    self.conn.execute("INSERT INTO items_fts (rowid, grams) VALUES (?, ?)", (cur.lastrowid, grams))
+                    added += 1
+        return added
+
+    def search(self, query, society=None, since=None, until=None, limit=20):
+        """検索語に一致する記事を関連度順（同点なら新しい順、日付なしは最後）に返す。"""
+        expression = match_expression(query, society, since, until)
+        if not expression:
+            return []
+        sql = [
+            "SELECT items.society, items.title, items.link, items.pub_date, bm25(items_fts)",
+            "FROM items_fts JOIN items ON items.id = items_fts.rowid",
+            "WHERE items_fts MATCH ?",
+        ]
+        params = [expression]
+        if society:
+            sql.append("AND items.society = ?")
+            params.append(society)
+        if since:
+            sql.append("AND items.pub_date >= ?")
+            params.append(since)
+        if until:
+            sql.append("AND items.pub_date < ?")
+            params.append(until)
+        # 一致したすべての行を bm25 で並べてから件数を絞る
+        sql.append("ORDER BY bm25(items_fts), items.pub_date IS NULL, items.pub_date DESC LIMIT ?")
+        params.append(limit)
+        rows = self.conn.execute(" ".join(sql), params).fetchall()
+        return [
+            {"society": row[0], "title": row[1], "link": row[2], "pub_date": row[3], "score": row[4]}
+            for row in rows
+        ]
+
+    def optimize(self):
+        # まとめて取り込んだ後は FTS のセグメントを1つにまとめておくと検索が速い
+        with self.conn:
+            self.conn.execute("INSERT INTO items_fts (items_fts) VALUES ('optimize')")
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+def feed_rows(path):
+    """FeedN.xml / アーカイブページから (学会名, タイトル, リンク, 日付) を取り出す。"""
+    with open(path, "rb") as f:
+        channel, entries = entries_from_rss(f.read())
+    feed_society = channel["title"].replace("トピックス", "").strip()
+    combined = os.path.basename(path).startswith("combined")
+    for entry in entries:
+        society, title = feed_society, entry["title"]
+        label = _LABEL.match(title)
+        if label and combined:
+            # 統合フィードのタイトルは【学会名】付き
+            society, title = label.group(1), title[label.end():]
+        yield society, title, entry["link"], iso8601(entry["pub_date"]) or None
+
+
+def rebuild(index, output_dir="rss_output"):
+    paths = sorted(glob(f"{output_dir}/Feed*.xml")) + sorted(glob(f"{output_dir}/archive/combined-*.xml"))
+    added = 0
+    for path in paths:
+        by_society = {}
+        for society, title, link, pub_date in feed_rows(path):
+            by_society.setdefault(society, []).append((title, link, pub_date))
+        for society, rows in by_society.items():
+            added += index.add_rows(society, rows)
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="収集した記事の全文検索")
+    parser.add_argument("--index", default=INDEX_PATH, help="インデックスファイルのパス")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    query = sub.add_parser("query", help="記事を検索する")
+    query.add_argument("words", nargs="+", help="検索語（複数指定で AND）")
+    query.add_argument("--society", help="学会名で絞り込む")
+    query.add_argument("--since", help="この日付以降（YYYY-MM-DD）")
+    query.add_argument("--until", help="この日付より前（YYYY-MM-DD）")
+    query.add_argument("--limit", type=int, default=20)
+
+    sub.add_parser("rebuild", help="rss_output/ のフィードから記事を取り込む")
+
+    args = parser.parse_args(argv)
+    index = SearchIndex(args.index)
+    try:
+        if args.command == "rebuild":
+            added = rebuild(index)
+            index.optimize()
+            print(f"✅ {added} 件を追加しました（合計 {index.count()} 件）")
+            return
+
+        started = time.perf_counter()
+        results = index.search(" ".join(args.words), args.society, args.since, args.until, args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for r in results:
+            print(f"{(r['pub_date'] or '----------')[:10]}  【{r['society']}】{r['title']}\n            {r['link']}")
+        print(f"🔎 {len(results)} 件（{elapsed_ms:.1f} ms）")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
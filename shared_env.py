@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+# ===== GitHub 上の共通関数を一時ディレクトリにクローン =====
+# 各学会スクリプトと run_all.py から import される。import は1プロセスにつき1回だけ
+# 実行されるので、複数サイトを続けて処理しても clone / pull は1回で済む。
+REPO_URL = "https://github.com/aiueo0306/shared-python-env.git"
+SHARED_DIR = os.path.join(tempfile.gettempdir(), "shared-python-env")
+
+if not os.path.exists(SHARED_DIR):
+    print("🔄 共通関数を初回クローン中...")
+    subprocess.run(["git", "clone", "--depth", "1", REPO_URL, SHARED_DIR], check=True)
+else:
+    print("🔁 共通関数を更新中...")
+    subprocess.run(["git", "-C", SHARED_DIR, "pull"], check=True)
+
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
@@ -0,0 +1,73 @@
+import time
+
+from state_store import load_state, save_state
+
+# ===== サイトごとのサーキットブレーカー =====
+# 落ちている学会サイトに毎時 goto(120秒) + networkidle(120秒) を払い続けないよう、
+# 連続失敗回数を記録して指数バックオフする。
+#   closed    : 通常どおり処理する
+#   open      : バックオフ中。処理をスキップし、前回の FeedN.xml をそのまま残す
+#   half_open : バックオフ明け。1回だけ試し（probe）、成功すれば closed、失敗すれば再び open
+# 状態は state/site_health.json に保存して次の実行に引き継ぐ。
+
+HEALTH_PATH = "state/site_health.json"
+
+BASE_BACKOFF_SEC = 2 * 60 * 60      # ブレーカーが開いたら最初は2時間休む（毎時実行なら1回分スキップ）
+MAX_BACKOFF_SEC = 24 * 60 * 60      # 最長1日
+FAILURE_THRESHOLD = 2               # この回数連続で失敗したらブレーカーを開く
+
+
+class SiteHealth:
+    def __init__(self, path=HEALTH_PATH, now=None):
+        self.path = path
+        self.now = now or time.time
+        self.records = load_state(path)
+        self.dirty = set()
+
+    def save(self):
+        self.records = save_state(self.path, self.records, self.dirty)
+
+    def record(self, key):
+        self.dirty.add(key)
+        return self.records.setdefault(key, {"failures": 0, "open_until": 0, "last_error": "", "last_success": 0})
+
+    def state(self, key):
+        rec = self.records.get(key)
+        if not rec or rec["failures"] < FAILURE_THRESHOLD:
+            return "closed"
+        if self.now() < rec["open_until"]:
+            return "open"
+        return "half_open"
+
+    def allow(self, key):
+        """このサイトを今回処理してよいか。open の間は False。"""
+        return self.state(key) != "open"
+
+    def success(self, key):
+        rec = self.record(key)
+        rec["failures"] = 0
+        rec["open_until"] = 0
+        rec["last_error"] = ""
+        rec["last_success"] = int(self.now())
+
+    def failure(self, key, error=""):
+        rec = self.record(key)
+        rec["failures"] += 1
+        rec["last_error"] = str(error)[:200]
+        if rec["failures"] >= FAILURE_THRESHOLD:
+            backoff = min(BASE_BACKOFF_SEC * 2 ** (rec["failures"] - FAILURE_THRESHOLD), MAX_BACKOFF_SEC)
+            rec["open_until"] = int(self.now() + backoff)
+
+    def open_breakers(self):
+        return sorted(key for key in self.records if self.state(key) == "open")
+
+    def report(self):
+        opened = self.open_breakers()
+        if not opened:
+            print("🟢 開いているサーキットブレーカーはありません")
+            return
+        print(f"🔴 開いているサーキットブレーカー: {len(opened)} 件")
+        for key in opened:
+            rec = self.records[key]
+            until = time.strftime("%Y-%m-%d %H:%M", time.gmtime(rec["open_until"]))
+            print(f"  - {key}: 連続失敗 {rec['failures']} 回 / {until} UTC まで停止 / {rec['last_error']}")
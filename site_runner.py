@@ -0,0 +1,286 @@
+import os
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+
+from asset_cache import AssetCache
+from change_log import read_entries, record_changes
+from charset import charset_cache
+from enrich import enrich_items
+from feed_writer import fragment_cache
+from http_pool import host_group, shared_pool
+from memory_watch import note_page, stage
+from native_feeds import NativeSources
+from render_profiles import FULL, LITE, RenderProfiles, context_options
+from run_metrics import RunMetrics, record_site
+from scheduler import DEFAULT_TIMEOUTS, RunScheduler
+from search_index import SearchIndex
+from site_health import SiteHealth
+from structure_guard import SiteStructureError, StructureGuard
+from watermarks import Watermarks, accepts_watermark
+
+# ===== 1サイト分の処理（ページ読込 → 記事抽出 → フィード出力） =====
+# 各 RSSn.py は BASE_URL / GAKKAI / RSS_PATH / scrape(page) / generate_rss を持つ。
+# 単体実行（RSSn.py）でも run_all.py からの一括実行でも同じ処理を通す。
+
+
+def site_key(site):
+    # 単体実行では __name__ が "__main__" になるのでファイル名（RSS13 など）を使う
+    return os.path.splitext(os.path.basename(site.__file__))[0]
+
+
+def site_host(site):
+    # 同じ運営元のサーバーをまとめたホスト名（plaza.umin.ac.jp と jspr.umin.jp は同じ "umin"）
+    return host_group(urlsplit(site.BASE_URL).hostname)
+
+
+def load_page(page, url, timeouts=DEFAULT_TIMEOUTS):
+    print("▶ ページにアクセス中...")
+    page.goto(url, timeout=timeouts["goto"])
+    try:
+        page.wait_for_load_state("networkidle", timeout=timeouts["networkidle"])
+    except Exception:
+        page.wait_for_load_state("domcontentloaded")
+    page.wait_for_load_state("load", timeout=timeouts["load"])
+
+
+def scrape_site(site, page, timeouts=DEFAULT_TIMEOUTS, guard=None, profile=FULL, watermarks=None):
+    """ページを読み込んで記事を抽出する。
+
+    guard（StructureGuard）を渡すと、抽出の前に一覧部分の構造を調べ、変わっていれば打ち切る。
+    watermarks（Watermarks）を渡すと、対応したサイトでは前回の最新記事で抽出を打ち切り、前回の記事とつなぐ。
+    """
+    # 抽出中のセレクター待ち（iframe など）はページの既定タイムアウトで縛る
+    page.set_default_timeout(timeouts["selector"])
+    try:
+        with stage("navigate"):
+            load_page(page, site.BASE_URL, timeouts)
+    except PlaywrightTimeoutError:
+        print("⚠ ページの読み込みに失敗しました。")
+        raise
+    note_page(page)
+    if guard is not None:
+        guard.check(site_key(site), site, page, profile)
+
+    print("▶ 記事を抽出しています...")
+    scrape = site.scrape
+    if watermarks is not None and accepts_watermark(site):
+        scrape = watermarks.scrape(site_key(site), site)
+    with stage("extract"):
+        items = scrape(page)
+
+    if not items:
+        print("⚠ 抽出できた記事がありません。HTML構造が変わっている可能性があります。")
+    return items
+
+
+def run_site(site, open_page, timeouts=DEFAULT_TIMEOUTS, enrich=False, sources=None, profiles=None, guard=None,
+             watermarks=None):
+    """サイトを読み込んでフィードを出力する。フィードを更新したら True。
+
+    open_page(profile) は描画プロファイルに合ったページを貸す context manager。
+    enrich なら新しく出てきた記事のリンク先から要約を取得して description にする。
+    sources（NativeSources）を渡すと、確認の時期が来ていればサイト自身のフィードと照合する。
+    profiles（RenderProfiles）を渡すと、確認済みなら JavaScript なしのコンテキストで取得する。
+    guard（StructureGuard）を渡すと、一覧の構造が変わったときや記事が0件のときに
+    フィードを書かずに SiteStructureError で打ち切る（前回のフィードを残す）。
+    watermarks（Watermarks）を渡すと、前回の最新記事より新しい行だけを抽出する。
+    """
+    key = site_key(site)
+    profile = profiles.profile(key, site) if profiles is not None else FULL
+    if profiles is not None and profiles.due(key, site):
+        watermarks = None  # full と lite の比較は一覧全体で行う
+    snapshot = None
+    try:
+        with open_page(profile) as page:
+            items = scrape_site(site, page, timeouts, guard, profile, watermarks)
+            if sources is not None and sources.due(key):
+                snapshot = (page.url or site.BASE_URL, page.content())
+    except Exception:
+        if profile == FULL:
+            raise
+        print("⚠ JavaScript なしで取得できなかったため、通常のブラウザで取り直します")
+        items = None
+
+    if profiles is not None and ((profile != FULL and not items) or profiles.due(key, site)):
+        items = check_profiles(site, open_page, timeouts, profiles, profile, items, guard)
+
+    if guard is not None:
+        if not items:
+            guard.flag(key, "抽出できた記事がありません")
+            raise SiteStructureError("抽出できた記事がありません")
+        guard.ok(key)
+
+    if sources is not None:
+        if snapshot is not None:
+            check_native_source(sources, key, snapshot, items)
+        sources.fill_dates(key, site.BASE_URL, items)
+    return publish(site, items, enrich)
+
+
+def check_profiles(site, open_page, timeouts, profiles, profile, items, guard=None):
+    # もう一方のプロファイルでも取得して比べ、出力には full で取れた記事を使う
+    key = site_key(site)
+    other = FULL if profile != FULL else LITE
+    try:
+        with open_page(other) as page:
+            other_items = scrape_site(site, page, timeouts, guard, other)
+    except Exception:
+        if other == FULL and not items:
+            raise
+        other_items = None
+    if other == FULL and other_items is None:
+        return items  # full が失敗した回は判定せず、lite で取れた記事を使う
+    full_items, lite_items = (items, other_items) if profile == FULL else (other_items, items)
+    if profile != FULL and not items:
+        profiles.demote(key)
+    else:
+        profiles.verify(key, full_items, lite_items)
+    return full_items
+
+
+def run_native(site, sources, enrich=False):
+    """確認済みのサイト自身のフィードから出力する。使えなければ None を返す（ブラウザで取得する）。"""
+    with stage("native"):
+        items = sources.items(site_key(site))
+    if items is None:
+        return None
+    return publish(site, items, enrich)
+
+
+def publish(site, items, enrich=False):
+    with stage("publish"):
+        previous = read_entries(site.RSS_PATH)
+        if enrich and items:
+            enrich_page_summaries(site, items, previous)
+        updated = site.generate_rss(items, site.RSS_PATH, site.BASE_URL, site.GAKKAI)
+        if updated:
+            log_changes(site, previous)
+        index_items(site, items)
+    return updated
+
+
+def check_native_source(sources, key, snapshot, items):
+    # 照合に失敗してもブラウザで取れた記事はそのまま出力する
+    try:
+        page_url, page_html = snapshot
+        sources.verify(key, page_url, page_html, items)
+    except Exception as e:
+        print(f"⚠ サイトのフィードの確認に失敗しました: {e}")
+
+
+def enrich_page_summaries(site, items, previous):
+    # 要約の取得に失敗しても description がタイトルのままになるだけ
+    try:
+        enrich_items(items, previous, site.BASE_URL)
+    except Exception as e:
+        print(f"⚠ 要約の取得に失敗しました: {e}")
+
+
+def log_changes(site, previous):
+    # 変更イベントの追記に失敗してもフィード出力は成功扱いにする
+    try:
+        count = record_changes(site.GAKKAI, site.RSS_PATH, previous)
+        if count:
+            print(f"🧾 変更イベントを {count} 件記録しました")
+    except Exception as e:
+        print(f"⚠ 変更イベントの記録に失敗しました: {e}")
+
+
+def index_items(site, items):
+    # 検索インデックスへの追加に失敗してもフィード出力は成功扱いにする
+    try:
+        index = SearchIndex()
+        try:
+            added = index.add_items(site.GAKKAI, items)
+        finally:
+            index.close()
+        if added:
+            print(f"🔎 検索インデックスに {added} 件追加しました")
+    except Exception as e:
+        print(f"⚠ 検索インデックスの更新に失敗しました: {e}")
+
+
+def run_standalone(site):
+    # RSSn.py を単体で実行したとき用：ブラウザを1つ起動してそのサイトだけ処理する
+    metrics = RunMetrics()
+    metrics.begin_run()
+    try:
+        _run_standalone(site, metrics)
+    finally:
+        metrics.finish_run()
+        metrics.close()
+
+
+def _run_standalone(site, metrics):
+    health = SiteHealth()
+    scheduler = RunScheduler()
+    sources = NativeSources()
+    key = site_key(site)
+    if not health.allow(key):
+        print(f"⏸ {site.GAKKAI} はバックオフ中のためスキップします（前回のフィードを維持）")
+        health.report()
+        metrics.record(key, "skipped")
+        return
+
+    started = time.monotonic()
+    updated = run_native(site, sources)
+    if updated is not None:
+        # サイト自身のフィードで済んだのでブラウザは起動しない
+        health.success(key)
+        scheduler.record(key, time.monotonic() - started, updated, browser=False)
+        record_site(metrics, site, key, "native", time.monotonic() - started, updated, None)
+        shared_pool().close()
+        health.save()
+        scheduler.save()
+        charset_cache().save()
+        fragment_cache().save()
+        return
+
+    asset_cache = AssetCache()
+    asset_cache.begin_site(site.GAKKAI)
+    profiles = RenderProfiles()
+    guard = StructureGuard()
+    watermarks = Watermarks()
+
+    with sync_playwright() as p:
+        print("▶ ブラウザを起動中...")
+        browser = p.chromium.launch(headless=True)
+
+        @contextmanager
+        def open_page(profile):
+            context = browser.new_context(**context_options(profile))
+            asset_cache.attach(context)
+            try:
+                yield context.new_page()
+            finally:
+                context.close()
+
+        updated = False
+        error = None
+        try:
+            updated = run_site(site, open_page, scheduler.timeouts(key), sources=sources, profiles=profiles, guard=guard,
+                               watermarks=watermarks)
+            health.success(key)
+        except Exception as e:
+            health.failure(key, e)
+            error = e
+            if not isinstance(e, (PlaywrightTimeoutError, SiteStructureError)):
+                raise
+        finally:
+            scheduler.record(key, time.monotonic() - started, updated)
+            record_site(metrics, site, key, "browser", time.monotonic() - started, updated, error)
+            browser.close()
+            shared_pool().close()
+            asset_cache.report()
+            asset_cache.save()
+            health.save()
+            scheduler.save()
+            sources.save()
+            profiles.save()
+            guard.save()
+            watermarks.save()
+            charset_cache().save()
+            fragment_cache().save()
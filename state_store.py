@@ -0,0 +1,38 @@
+import json
+import os
+
+# ===== state/ 以下の JSON 状態ファイルの読み書き =====
+# 単体スクリプトが並行して動いても他サイトの記録を消さないよう、
+# 保存直前に読み直して今回触ったキーだけを上書きし、一時ファイル経由で置き換える。
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path, records, dirty):
+    merged = load_state(path)
+    for key in dirty:
+        merged[key] = records[key]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return merged
+
+
+def replace_state(path, records):
+    """records で状態ファイルを丸ごと置き換える。内容が同じなら書き込まない。変えたら True。"""
+    if load_state(path) == records:
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return True
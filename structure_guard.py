@@ -0,0 +1,170 @@
+import argparse
+import hashlib
+import time
+
+from state_store import load_state, save_state
+
+# ===== 一覧部分の構造の指紋による早期打ち切り =====
+# サイトがリニューアルして SELECTOR_TITLE が一致しなくなると、抽出はタイムアウトまで待ち続け、
+# 空のフィードを書いてしまい、それを毎時繰り返す。そこでページを読み込んだ直後に
+#   - SELECTOR_TITLE に一致する行が無ければ QUICK_WAIT_SEC だけ待ち、それでも無ければ打ち切る
+#   - 一致した行の「タグ・クラスの骨組み」（最も多い行の形と、一覧までの祖先）のハッシュを
+#     前回までのものと比べ、違っていれば打ち切る
+#   - 抽出できた記事が0件でも、空のフィードは書かずに打ち切る
+# 打ち切ったサイトは前回のフィードを残し、「要確認」として記録する（失敗扱いなので site_health の
+# バックオフも効く）。同じ新しい骨組みが ACCEPT_AFTER 回続いたら、意図した変更とみなして基準にする。
+# 骨組みは描画プロファイル（full / lite）ごとに記録する。結果は state/site_structure.json に保存する。
+#
+#   python structure_guard.py list            # 要確認のサイト
+#   python structure_guard.py accept RSS3     # 次回の骨組みを基準にし直す
+
+STRUCTURE_PATH = "state/site_structure.json"
+QUICK_WAIT_SEC = 3
+POLL_MS = 500
+ACCEPT_AFTER = 3
+
+# 行の骨組み（タグとクラス。数字は # にまとめる）と、一覧までの祖先の並び
+FINGERPRINT_SCRIPT = """(selector) => {
+  const rows = Array.from(document.querySelectorAll(selector)).slice(0, 30);
+  if (!rows.length) return null;
+  const label = (el) => el.tagName.toLowerCase()
+    + Array.from(el.classList).map((c) => '.' + c.replace(/[0-9]+/g, '#')).sort().join('');
+  const skeleton = (el, depth) => label(el) + (depth > 0 && el.children.length
+    ? '(' + Array.from(el.children).map((c) => skeleton(c, depth - 1)).join(',') + ')' : '');
+  const counts = {};
+  for (const row of rows) {
+    const s = skeleton(row, 2);
+    counts[s] = (counts[s] || 0) + 1;
+  }
+  const common = Object.keys(counts).sort((a, b) => counts[b] - counts[a] || (a < b ? -1 : 1))[0];
+  const path = [];
+  for (let el = rows[0].parentElement; el && el !== document.body && path.length < 6; el = el.parentElement) {
+    path.push(label(el));
+  }
+  return {count: rows.length, skeleton: path.reverse().join('>') + '>' + common};
+}"""
+
+
+class SiteStructureError(Exception):
+    """一覧の構造が変わった・記事が取れないため、そのサイトの処理を打ち切った。"""
+
+
+def _find_rows(page, selector):
+    # iframe の中に一覧があるサイト（RSS3 など）もあるので全フレームを調べる
+    for frame in page.frames:
+        try:
+            found = frame.evaluate(FINGERPRINT_SCRIPT, selector)
+        except Exception:
+            continue
+        if found:
+            return found
+    return None
+
+
+def fingerprint(skeleton):
+    return hashlib.sha1(skeleton.encode("utf-8")).hexdigest()[:16]
+
+
+class StructureGuard:
+    def __init__(self, path=STRUCTURE_PATH, now=None):
+        self.path = path
+        self.now = now or time.time
+        self.records = load_state(path)
+        self.dirty = set()
+
+    def save(self):
+        self.records = save_state(self.path, self.records, self.dirty)
+
+    def _record(self, key):
+        self.dirty.add(key)
+        return self.records.setdefault(key, {"fingerprints": {}})
+
+    def check(self, key, site, page, profile):
+        """読み込んだページの一覧部分を調べる。打ち切るべきなら SiteStructureError。"""
+        selector = getattr(site, "SELECTOR_TITLE", None)
+        if not selector:
+            return None
+        found = _find_rows(page, selector)
+        waited = 0
+        while found is None and waited < QUICK_WAIT_SEC * 1000:
+            # JavaScript で一覧を描くサイトのために少しだけ待つ
+            page.wait_for_timeout(POLL_MS)
+            waited += POLL_MS
+            found = _find_rows(page, selector)
+        if found is None:
+            self.flag(key, f"「{selector}」に一致する要素がありません")
+            raise SiteStructureError(f"一覧が見つかりません（{selector}）")
+
+        value = fingerprint(found["skeleton"])
+        rec = self._record(key)
+        known = rec["fingerprints"].get(profile)
+        if known is None or known == value:
+            rec["fingerprints"][profile] = value
+            rec.pop("candidate", None)
+            return value
+
+        candidate = rec.get("candidate") or {}
+        count = candidate.get("count", 0) + 1 if candidate.get("fingerprint") == value else 1
+        if count >= ACCEPT_AFTER:
+            print(f"🧩 同じ新しい構造が {count} 回続いたため、これを基準にします")
+            rec["fingerprints"][profile] = value
+            rec.pop("candidate", None)
+            return value
+        rec["candidate"] = {"fingerprint": value, "count": count, "skeleton": found["skeleton"][:500]}
+        self.flag(key, f"一覧の構造が変わりました（{count}/{ACCEPT_AFTER}）")
+        raise SiteStructureError("一覧の構造が前回までと違います")
+
+    def flag(self, key, reason):
+        rec = self._record(key)
+        since = (rec.get("attention") or {}).get("since", self.now())
+        rec["attention"] = {"reason": reason, "since": since}
+        print(f"🚩 要確認: {reason}（前回のフィードを維持します）")
+
+    def ok(self, key):
+        # 記事が取れたので要確認を外す
+        rec = self.records.get(key)
+        if rec and rec.pop("attention", None) is not None:
+            self.dirty.add(key)
+
+    def accept(self, key):
+        """記録した骨組みを消し、次回の骨組みを基準にする。"""
+        rec = self._record(key)
+        rec["fingerprints"] = {}
+        rec.pop("candidate", None)
+        rec.pop("attention", None)
+
+    def attention(self):
+        return {key: rec["attention"] for key, rec in self.records.items() if rec.get("attention")}
+
+    def report(self):
+        flagged = self.attention()
+        if not flagged:
+            return
+        print("🚩 要確認のサイト（構造の変化・記事なし）:")
+        for key, info in sorted(flagged.items()):
+            since = time.strftime("%Y-%m-%d %H:%M", time.localtime(info["since"]))
+            print(f"  - {key}: {info['reason']}（{since} から）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="一覧部分の構造の指紋")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="要確認のサイトを表示する")
+    accept = sub.add_parser("accept", help="次回の構造を基準にし直す")
+    accept.add_argument("keys", nargs="+", help="サイト（RSS3 など）")
+    args = parser.parse_args(argv)
+
+    guard = StructureGuard()
+    if args.command == "list":
+        guard.report()
+        if not guard.attention():
+            print("✅ 要確認のサイトはありません")
+        return
+    for key in args.keys:
+        guard.accept(key)
+    guard.save()
+    print(f"✅ 次回の構造を基準にします: {', '.join(args.keys)}")
+
+
+if __name__ == "__main__":
+    main()
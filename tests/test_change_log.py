@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+
+from change_log import ChangeLog, CursorExpired, diff_entries
+from feed_formats import entries_from_items
+
+
+def items(*rows):
+    """新しい順の記事一覧（extract_items と同じ形）。"""
+    return [
+        {"title": title, "link": f"https://example.jp/{link}", "description": "",
+         "pub_date": datetime(2026, 10, day) if day else None}
+        for title, link, day in rows
+    ]
+
+
+def kinds(changes):
+    return [(kind, entry["title"]) for kind, entry, _ in changes]
+
+
+def test_undated_item_pushed_out_is_not_removed():
+    old = entries_from_items(items(("c", "c", None), ("b", "b", None), ("a", "a", None)))
+    new = entries_from_items(items(("d", "d", None), ("c", "c", None), ("b", "b", None)))
+    assert kinds(diff_entries(old, new)) == [("new", "d")]
+
+
+def test_same_day_item_pushed_out_is_not_removed():
+    old = entries_from_items(items(("c", "c", 5), ("b", "b", 5), ("a", "a", 5)))
+    new = entries_from_items(items(("d", "d", 5), ("c", "c", 5), ("b", "b", 5)))
+    assert kinds(diff_entries(old, new)) == [("new", "d")]
+
+
+def test_item_missing_inside_the_feed_is_removed():
+    old = entries_from_items(items(("c", "c", None), ("b", "b", None), ("a", "a", None)))
+    new = entries_from_items(items(("d", "d", None), ("c", "c", None), ("a", "a", None)))
+    assert sorted(kinds(diff_entries(old, new))) == [("new", "d"), ("removed", "b")]
+
+
+def test_changed_title_keeps_old_title():
+    old = entries_from_items(items(("b", "b", 3), ("a", "a", 2)))
+    new = entries_from_items(items(("b2", "b", 3), ("a", "a", 2)))
+    changes = diff_entries(old, new)
+    assert kinds(changes) == [("changed", "b2")]
+    assert changes[0][2]["title"] == "b"
+
+
+def test_append_and_read_with_cursor(tmp_path):
+    log = ChangeLog(str(tmp_path), segment_events=2)
+    entries = entries_from_items(items(("c", "c", 3), ("b", "b", 2), ("a", "a", 1)))
+    changes = [("new", entry, None) for entry in entries]
+    assert log.append("学会", "Feed1.xml", changes) == 3
+    assert log.append("学会", "Feed1.xml", changes[:1]) == 4
+    assert log.append("学会", "Feed1.xml", []) is None
+
+    assert [e["seq"] for e in log.read()] == [1, 2, 3, 4]
+    assert [e["seq"] for e in log.read(2)] == [3, 4]
+    assert [e["seq"] for e in log.read(0, limit=2)] == [1, 2]
+    assert log.last_seq() == 4
+    assert len(log.segments()) == 2
+
+
+def test_closed_segment_keeps_last_event_per_guid(tmp_path):
+    log = ChangeLog(str(tmp_path), segment_events=2)
+    a, b = entries_from_items(items(("b", "b", 2), ("a", "a", 1)))
+    log.append("学会", "Feed1.xml", [("new", a, None)])
+    log.append("学会", "Feed1.xml", [("changed", a, a)])
+    log.append("学会", "Feed1.xml", [("new", b, None)])
+    assert [(e["seq"], e["type"]) for e in log.read()] == [(2, "changed"), (3, "new")]
+
+
+def test_read_behind_deleted_segments_raises(tmp_path):
+    log = ChangeLog(str(tmp_path), segment_events=1, max_segments=1)
+    entries = entries_from_items(items(("b", "b", 2), ("a", "a", 1)))
+    for entry in entries:
+        log.append("学会", "Feed1.xml", [("new", entry, None)])
+    assert [e["seq"] for e in log.read(1)] == [2]
+    with pytest.raises(CursorExpired):
+        log.read(0)
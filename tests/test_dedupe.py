@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+from dedupe import find_duplicate_groups
+
+RECORDS = [
+    ("日本内科学会", "【2026-08-20】熱中症予防に関する共同声明について", "https://a.example.jp/news/1"),
+    ("日本小児科学会", "熱中症予防に関する共同声明", "https://b.example.jp/topics/9"),
+    ("日本皮膚科学会", "第80回学術集会のご案内", "https://c.example.jp/80"),
+    ("日本眼科学会", "第81回学術集会のご案内", "https://d.example.jp/81"),
+    ("日本内科学会", "お知らせ", "https://a.example.jp/"),
+    ("日本眼科学会", "お知らせ", "https://d.example.jp/"),
+    ("日本眼科学会", "厚生労働省からの通知（医療機関向け）", "https://www.mhlw.go.jp/x.html"),
+    ("日本皮膚科学会", "厚労省からの通知", "http://www.mhlw.go.jp/x.html/"),
+    ("日本内科学会", "厚労省からの通知", "https://www.mhlw.go.jp/x.html"),
+]
+
+_SCRIPT = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from dedupe import find_duplicate_groups
+records = [tuple(r) for r in json.loads(sys.stdin.read())]
+print(json.dumps(find_duplicate_groups(records)))
+"""
+
+
+def groups(records):
+    return sorted(sorted(group) for group in find_duplicate_groups(records))
+
+
+def test_near_duplicate_titles_across_societies():
+    assert groups(RECORDS) == [[0, 1], [6, 7, 8]]
+
+
+def test_same_society_is_not_merged():
+    records = [("日本内科学会", "熱中症予防に関する共同声明について", "https://a.example.jp/1"),
+               ("日本内科学会", "熱中症予防に関する共同声明", "https://a.example.jp/2")]
+    assert groups(records) == []
+
+
+def test_groups_are_stable_across_hash_seeds():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = set()
+    for seed in ("1", "2", "3"):
+        out = subprocess.run(
+            [sys.executable, "-c", _SCRIPT, root], input=json.dumps(RECORDS),
+            env=dict(os.environ, PYTHONHASHSEED=seed), capture_output=True, text=True, check=True,
+        ).stdout
+        results.add(out)
+    assert len(results) == 1
@@ -0,0 +1,23 @@
+import os
+from datetime import datetime
+
+from change_log import read_entries
+from feed_writer import generate_rss
+
+
+def test_generate_rss_guid_and_order(tmp_path):
+    items = [
+        {"title": "新しい記事", "link": "https://example.jp/2", "description": "", "pub_date": datetime(2026, 10, 2)},
+        {"title": "日付なし", "link": "https://example.jp/1", "description": "", "pub_date": None},
+    ]
+    path = str(tmp_path / "rss_output" / "Feed1.xml")
+    assert generate_rss(items, path, "https://example.jp/", "日本テスト学会") is True
+    assert generate_rss(items, path, "https://example.jp/", "日本テスト学会") is False
+
+    entries = read_entries(path)
+    assert [(e["title"], e["guid"], e["guid_permalink"], bool(e["pub_date"])) for e in entries] == [
+        ("日付なし", "https://example.jp/1", True, False),
+        ("新しい記事", "https://example.jp/2#20261002", False, True),
+    ]
+    for name in ("Feed1.atom", "Feed1.json", "Feed1.xml.gz", "manifest.json"):
+        assert os.path.exists(os.path.join(os.path.dirname(path), name))
@@ -0,0 +1,65 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("feedparser")
+
+import merge_feeds  # noqa: E402
+from feed_formats import entries_from_rss  # noqa: E402
+from feed_writer import generate_rss  # noqa: E402
+
+NOW = datetime(2026, 10, 10, tzinfo=timezone.utc)
+
+
+def write_site_feed(days):
+    items = [
+        {"title": f"記事{day}", "link": f"https://example.jp/{day}", "description": "", "pub_date": datetime(2026, 10, day)}
+        for day in sorted(days, reverse=True)
+    ]
+    generate_rss(items, "rss_output/Feed1.xml", "https://example.jp/", "日本テスト学会")
+
+
+def titles(path):
+    with open(path, "rb") as f:
+        return [e["title"] for e in entries_from_rss(f.read())[1]]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(merge_feeds, "WINDOW_ITEMS", 2)
+    monkeypatch.setattr(merge_feeds, "ARCHIVE_PAGE_SIZE", 2)
+    return tmp_path
+
+
+def test_overflow_is_archived_in_full_pages_oldest_first(workdir):
+    write_site_feed([1, 2, 3, 4, 5])
+    merge_feeds.main(now=NOW)
+    assert len(titles(merge_feeds.COMBINED_PATH)) == 5
+    assert merge_feeds.existing_archives() == []
+
+    # 記事6だけが載るようになると、ウィンドウ外の 1〜4 が2件ずつアーカイブに移る
+    write_site_feed([6])
+    merge_feeds.main(now=NOW)
+    assert titles(merge_feeds.COMBINED_PATH) == ["【日本テスト学会】記事6", "【日本テスト学会】記事5"]
+    assert merge_feeds.existing_archives() == [1, 2]
+    archive = os.path.join(merge_feeds.ARCHIVE_DIR, "combined-{:04d}.xml")
+    assert titles(archive.format(1)) == ["【日本テスト学会】記事2", "【日本テスト学会】記事1"]
+    assert titles(archive.format(2)) == ["【日本テスト学会】記事4", "【日本テスト学会】記事3"]
+
+
+def test_archive_pages_are_not_rewritten(workdir):
+    write_site_feed([1, 2, 3, 4, 5])
+    merge_feeds.main(now=NOW)
+    write_site_feed([6])
+    merge_feeds.main(now=NOW)
+    path = os.path.join(merge_feeds.ARCHIVE_DIR, "combined-0001.xml")
+    before = os.stat(path).st_mtime_ns
+
+    write_site_feed([6, 7])
+    merge_feeds.main(now=NOW)
+    assert os.stat(path).st_mtime_ns == before
+    # 記事5 は1件だけはみ出したので、ページ1枚分たまるまで先頭ページに残る
+    assert titles(merge_feeds.COMBINED_PATH) == ["【日本テスト学会】記事7", "【日本テスト学会】記事6", "【日本テスト学会】記事5"]
+    assert merge_feeds.existing_archives() == [1, 2]
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from native_feeds import NativeSources
+
+SITE = "https://example.jp/"
+
+
+class FakePool:
+    def __init__(self, sitemap):
+        self.sitemap = sitemap
+        self.requests = []
+
+    def get(self, url, headers=None, max_bytes=None):
+        self.requests.append(url)
+        if url.endswith("/sitemap.xml"):
+            return SimpleNamespace(status=200, body=self.sitemap.encode("utf-8"))
+        return SimpleNamespace(status=404, body=b"")
+
+
+def sitemap(**lastmods):
+    urls = "".join(f"<url><loc>{SITE}{name}</loc><lastmod>{date}</lastmod></url>" for name, date in lastmods.items())
+    return f'<?xml version="1.0"?><urlset>{urls}</urlset>'
+
+
+def undated(*names):
+    return [{"title": name, "link": SITE + name, "description": "", "pub_date": None} for name in names]
+
+
+def sources(tmp_path, pool):
+    s = NativeSources(path=str(tmp_path / "native_sources.json"), now=lambda: 0, pool=pool)
+    s.records["k"] = {"checked": 0, "source": None, "sitemap": True}
+    return s
+
+
+def test_first_lastmod_is_kept_across_edits(tmp_path):
+    pool = FakePool(sitemap(a="2026-10-01T10:00:00+09:00"))
+    s = sources(tmp_path, pool)
+    items = undated("a")
+    s.fill_dates("k", SITE, items)
+    assert items[0]["pub_date"] == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    s.save()
+
+    # 記事が編集されて lastmod が進んでも、次の実行では最初の日付のまま・サイトマップも読まない
+    pool = FakePool(sitemap(a="2026-10-05T10:00:00+09:00"))
+    s = NativeSources(path=str(tmp_path / "native_sources.json"), now=lambda: 0, pool=pool)
+    items = undated("a")
+    s.fill_dates("k", SITE, items)
+    assert items[0]["pub_date"] == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    assert pool.requests == []
+
+
+def test_link_missing_from_sitemap_stays_undated(tmp_path):
+    pool = FakePool(sitemap(a="2026-10-01"))
+    s = sources(tmp_path, pool)
+    s.fill_dates("k", SITE, undated("a", "b"))
+    pool.sitemap = sitemap(a="2026-10-01", b="2026-10-02")
+    pool.requests.clear()
+    items = undated("a", "b")
+    s.fill_dates("k", SITE, items)
+    assert [item["pub_date"] for item in items] == [datetime(2026, 10, 1, tzinfo=timezone.utc), None]
+    assert pool.requests == []
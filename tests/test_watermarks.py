@@ -0,0 +1,62 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from watermarks import FULL_EVERY_SEC, Watermarks
+
+SITE = SimpleNamespace(BASE_URL="https://example.jp/")
+
+
+def items(*names):
+    return [{"title": name, "link": SITE.BASE_URL + name, "description": "", "pub_date": datetime(2026, 10, 1)} for name in names]
+
+
+def watermarks(tmp_path, clock):
+    return Watermarks(path=str(tmp_path / "site_watermarks.json"), now=lambda: clock[0])
+
+
+def test_new_rows_are_joined_to_previous_items(tmp_path):
+    clock = [0]
+    marks = watermarks(tmp_path, clock)
+    assert marks.mark("k") is None
+    assert marks.merge("k", SITE, items("c", "b", "a"), None) == items("c", "b", "a")
+    marks.save()
+
+    marks = watermarks(tmp_path, clock)
+    watermark = marks.mark("k")
+    assert watermark.link == SITE.BASE_URL + "c"
+    # 抽出側は c に着いた時点で打ち切り、新しい行 d だけを返す
+    assert [watermark.reached(item["link"]) for item in items("d", "c")] == [False, True]
+    assert marks.merge("k", SITE, items("d"), watermark) == items("d", "c", "b")
+    assert marks.stopped == {"k": 1}
+    assert marks.mark("k").link == SITE.BASE_URL + "d"
+
+
+def test_full_scrape_when_due_or_watermark_missing(tmp_path):
+    clock = [0]
+    marks = watermarks(tmp_path, clock)
+    marks.merge("k", SITE, items("b", "a"), None)
+
+    # ウォーターマークが一覧から消えた（打ち切らずに最後まで読んだ）なら、取れた行をそのまま使う
+    watermark = marks.mark("k")
+    for item in items("x", "y"):
+        watermark.reached(item["link"])
+    assert marks.merge("k", SITE, items("x", "y"), watermark) == items("x", "y")
+
+    clock[0] = FULL_EVERY_SEC
+    assert marks.mark("k") is None
+
+
+def test_empty_extraction_is_a_failure(tmp_path):
+    clock = [0]
+    marks = watermarks(tmp_path, clock)
+    marks.merge("k", SITE, items("b", "a"), None)
+    assert marks.merge("k", SITE, [], marks.mark("k")) == []
+    # 前回の記録は残る
+    assert marks.mark("k").link == SITE.BASE_URL + "b"
+
+
+def test_ambiguous_newest_link_disables_watermark(tmp_path):
+    marks = watermarks(tmp_path, [0])
+    top = {"title": "トップ", "link": SITE.BASE_URL, "description": "", "pub_date": None}
+    marks.merge("k", SITE, [top] + items("a"), None)
+    assert marks.mark("k") is None
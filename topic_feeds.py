@@ -0,0 +1,136 @@
+import os
+import unicodedata
+from collections import deque
+
+from feed_formats import entries_from_rss
+from feed_writer import write_feeds
+
+# ===== キーワード別のトピックフィード =====
+# 統合後の記事を1回ずつ走査し、どのトピックのキーワードを含むかを Aho-Corasick で判定して
+# rss_output/topics/<トピック>.xml に書き出す。キーワードが何百・何千に増えても、
+# 1記事あたりの処理はタイトルの長さに比例するだけで済む。
+
+TOPICS_DIR = 'rss_output/topics'
+COMBINED_PATH = 'rss_output/combined.xml'
+FEED_BASE_URL = 'https://example.com/rss_output/'
+
+# トピック名（ファイル名）→ 表示名とキーワード。キーワードは NFKC・小文字で比較する
+TOPICS = {
+    "guideline": {
+        "title": "ガイドライン",
+        "keywords": ["ガイドライン", "診療指針", "適正使用指針", "手引き", "提言", "正誤表"],
+    },
+    "meeting": {
+        "title": "学術集会/演題募集",
+        "keywords": ["学術集会", "学術大会", "総会", "演題募集", "演題登録", "一般演題", "大会"],
+    },
+    "covid": {
+        "title": "COVID",
+        "keywords": ["covid", "新型コロナ", "コロナウイルス", "sars-cov-2"],
+    },
+    "supply": {
+        "title": "医薬品の供給・出荷",
+        "keywords": ["限定出荷", "出荷停止", "供給停止", "供給不足", "販売中止"],
+    },
+}
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+class KeywordMatcher:
+    """Aho-Corasick 法で、テキストに含まれるキーワードのラベルを一度の走査で求める。"""
+
+    def __init__(self, rules):
+        # rules は キーワード → ラベルの集合
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [frozenset()]
+        for keyword, labels in rules.items():
+            self._add(normalize(keyword), labels)
+        self._build()
+
+    def _add(self, keyword, labels):
+        if not keyword:
+            return
+        node = 0
+        for ch in keyword:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(frozenset())
+            node = nxt
+        self.out[node] = self.out[node] | frozenset(labels)
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                # 根の直下のノードは自分自身に戻らないよう根へ
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] | self.out[self.fail[nxt]]
+
+    def match(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        found = set()
+        for ch in normalize(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+def build_matcher(topics=TOPICS):
+    rules = {}
+    for name, topic in topics.items():
+        for keyword in topic["keywords"]:
+            rules.setdefault(keyword, set()).add(name)
+    return KeywordMatcher(rules)
+
+
+def classify(entries, matcher):
+    """記事ごとに1回だけ走査し、トピック名 → 記事一覧 を返す（並びは元の順）。"""
+    by_topic = {}
+    for entry in entries:
+        for name in matcher.match(entry["title"] + "\n" + entry["description"]):
+            by_topic.setdefault(name, []).append(entry)
+    return by_topic
+
+
+def write_topic_feeds(entries, topics=TOPICS):
+    by_topic = classify(entries, build_matcher(topics))
+    for name, topic in topics.items():
+        href = f"{FEED_BASE_URL}topics/{name}.xml"
+        channel = {
+            "title": f"学会RSS統合：{topic['title']}",
+            "link": href,
+            "self_link": href,
+            "description": f"「{topic['title']}」に関する学会のお知らせ",
+            "language": "ja",
+        }
+        write_feeds(channel, by_topic.get(name, []), os.path.join(TOPICS_DIR, f"{name}.xml"))
+    counts = ", ".join(f"{topics[name]['title']} {len(by_topic.get(name, []))} 件" for name in topics)
+    print(f"🏷 トピックフィード: {counts}")
+
+
+def main():
+    with open(COMBINED_PATH, 'rb') as f:
+        _, entries = entries_from_rss(f.read())
+    write_topic_feeds(entries)
+
+
+if __name__ == "__main__":
+    main()
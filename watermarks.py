@@ -0,0 +1,114 @@
+import inspect
+import time
+from datetime import datetime
+
+from state_store import load_state, save_state
+
+# ===== 前回の最新記事（ウォーターマーク）での抽出の打ち切り =====
+# 一覧は新しい順に並んでいるのに、抽出は毎回 max_items 行まで読み、前回出力したタイトル・リンク・日付を
+# 解析し直している。そこでサイトごとに前回の最新記事のリンクと前回の記事一覧を覚えておき、
+#   - 抽出側は行のリンクがウォーターマークに一致した時点で打ち切る（新しい行だけを返す）
+#   - 新しい行の後ろに前回の記事をつなぎ、前回と同じ件数に切り詰めて出力する
+# 記事の書き換え・削除も拾えるよう、FULL_EVERY_SEC ごとに一度は一覧を全部読み直す。
+# リンクが空・サイトのトップ・重複しているなど最新記事を一意に指せないときは、次回も全部読む。
+# scrape(page, watermark=None) を受け付けるサイトだけが対象（共通の scraper_utils.extract_items は
+# 引数を増やせないので、これまでどおり全部読む）。記録は state/site_watermarks.json に保存する。
+
+WATERMARKS_PATH = "state/site_watermarks.json"
+FULL_EVERY_SEC = 24 * 3600
+
+
+def accepts_watermark(site):
+    try:
+        return "watermark" in inspect.signature(site.scrape).parameters
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+def _dump(item):
+    pub_date = item["pub_date"]
+    return dict(item, pub_date=pub_date.isoformat() if pub_date else None)
+
+
+def _load(item):
+    pub_date = item["pub_date"]
+    return dict(item, pub_date=datetime.fromisoformat(pub_date) if pub_date else None)
+
+
+class Watermark:
+    """前回の最新記事のリンク。抽出側は行のリンクで reached() を呼び、True なら打ち切る。"""
+
+    def __init__(self, link):
+        self.link = link
+        self.stopped = False
+
+    def reached(self, link):
+        if link == self.link:
+            self.stopped = True
+        return self.stopped
+
+
+class Watermarks:
+    def __init__(self, path=WATERMARKS_PATH, now=None):
+        self.path = path
+        self.now = now or time.time
+        self.records = load_state(path)
+        self.dirty = set()
+        self.stopped = {}  # サイト → 今回打ち切るまでに抽出した行数
+
+    def save(self):
+        self.records = save_state(self.path, self.records, self.dirty)
+
+    def mark(self, key):
+        """今回渡すウォーターマーク。全部読み直す時期なら None。"""
+        rec = self.records.get(key)
+        if not rec or not rec.get("link") or self.now() - rec.get("full", 0) >= FULL_EVERY_SEC:
+            return None
+        return Watermark(rec["link"])
+
+    def scrape(self, key, site):
+        """site.scrape(page, watermark) の結果に前回の記事をつないで返す関数を作る。"""
+        def scrape(page):
+            watermark = self.mark(key)
+            items = site.scrape(page, watermark)
+            return self.merge(key, site, items, watermark)
+        return scrape
+
+    def merge(self, key, site, items, watermark):
+        if watermark is not None and not watermark.stopped and not items:
+            # ウォーターマークにも着かず1行も取れなかったのは抽出の失敗（JavaScript なしで描画できなかった
+            # など）。前回の記事をつないで成功に見せると、lite から full に戻す判定が働かなくなる
+            print("⚠ 前回の最新記事も新しい記事も見つかりませんでした（抽出の失敗として扱います）")
+            self.stopped.pop(key, None)
+            return []
+        if watermark is None or not watermark.stopped:
+            # 全部読んだ（ウォーターマークが一覧から消えた場合も含む）
+            self.stopped.pop(key, None)
+            self._remember(key, site, items, full=True)
+            return items
+        self.stopped[key] = len(items)
+        previous = [_load(item) for item in self.records[key]["items"]]
+        links = {item["link"] for item in items}
+        merged = items + [item for item in previous if item["link"] not in links]
+        merged = merged[:max(len(previous), len(items))]
+        self._remember(key, site, merged, full=False)
+        return merged
+
+    def _remember(self, key, site, items, full):
+        if not items:
+            return  # 取れなかった回は前回の記録を残す
+        links = [item["link"] for item in items]
+        unique = links[0] and links[0] != site.BASE_URL and links.count(links[0]) == 1
+        rec = self.records.get(key) or {}
+        self.records[key] = {
+            "link": links[0] if unique else None,
+            "items": [_dump(item) for item in items],
+            "full": self.now() if full else rec.get("full", 0),
+        }
+        self.dirty.add(key)
+
+    def report(self):
+        if not self.stopped:
+            return
+        rows = sum(self.stopped.values())
+        print(f"⏩ 前回の最新記事で抽出を打ち切ったサイト: {len(self.stopped)}（新しい行 {rows}）")